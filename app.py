@@ -30,6 +30,77 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 }
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Configure the per-profile recommendation cache
+app.config["RECOMMENDATION_CACHE_SIZE"] = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", 1024))
+app.config["RECOMMENDATION_CACHE_TTL"] = int(os.environ.get("RECOMMENDATION_CACHE_TTL", 3600))
+# Full score vectors kept per worker for paging through /api/recommendations;
+# each entry holds one float per career, so keep this small for big catalogs
+app.config["SCORE_CACHE_SIZE"] = int(os.environ.get("SCORE_CACHE_SIZE", 32))
+# Users whose per-field score vectors are kept per worker, so ranking after a
+# profile edit only recomputes the changed fields; five floats per career each
+app.config["FIELD_SCORE_CACHE_SIZE"] = int(os.environ.get("FIELD_SCORE_CACHE_SIZE", 16))
+
+# Rank in a background process pool instead of inside the request when
+# RECOMMENDATION_JOB_WORKERS > 0 (the default 0 ranks synchronously); jobs
+# not finished after RECOMMENDATION_JOB_TIMEOUT seconds count as failed.
+# Every web worker spawns its own pool. The processes memory-map an engine
+# bundle read-only (the ENGINE_SHARED_DIR or ENGINE_ARTIFACTS_DIR one when
+# current, else one the web worker writes per catalog version), so each adds
+# its bare interpreter and imports (~170 MB), its profile caches and its
+# FIELD_SCORE_CACHE_SIZE field scores, but no engine of its own
+app.config["RECOMMENDATION_JOB_WORKERS"] = int(os.environ.get("RECOMMENDATION_JOB_WORKERS", 0))
+app.config["RECOMMENDATION_JOB_TIMEOUT"] = int(os.environ.get("RECOMMENDATION_JOB_TIMEOUT", 300))
+
+# Directory of prebuilt engine artifacts (see `flask build-artifacts`); when
+# unset or empty, every worker fits the engine itself
+app.config["ENGINE_ARTIFACTS_DIR"] = os.environ.get("ENGINE_ARTIFACTS_DIR", "")
+
+# Share one copy of the engine between the processes of a host: the first
+# worker to need an engine for the current catalog fits it and publishes it
+# as an artifact bundle under ENGINE_SHARED_DIR (e.g. /dev/shm/career-engine),
+# which every worker then memory-maps read-only instead of holding its own
+# copy. Takes precedence over ENGINE_ARTIFACTS_DIR
+app.config["ENGINE_SHARED_DIR"] = os.environ.get("ENGINE_SHARED_DIR", "")
+
+# Career catalog the engine is built from; workers rebuild the engine in the
+# background when it (or the artifact bundle) changes, checked at most every
+# CATALOG_RELOAD_INTERVAL seconds (0 disables watching)
+app.config["CAREER_CATALOG_PATH"] = os.environ.get("CAREER_CATALOG_PATH", "static/data/careers.json")
+app.config["CATALOG_RELOAD_INTERVAL"] = int(os.environ.get("CATALOG_RELOAD_INTERVAL", 30))
+
+# Careers passed from the candidate stage to full scoring per request; 0
+# scores the whole catalog. Trade recall for latency with
+# `python -m benchmarks.candidate_recall`
+app.config["ENGINE_CANDIDATE_POOL"] = int(os.environ.get("ENGINE_CANDIDATE_POOL", 0))
+
+# Semantic similarity from the sparse TF-IDF vectors ('sparse', exact) or from
+# a dense LSA index of ENGINE_LSA_COMPONENTS dimensions stored as float32
+# ('lsa') or int8 ('lsa_int8'). Compare them with `python -m benchmarks.semantic_index`
+app.config["ENGINE_SEMANTIC_MODE"] = os.environ.get("ENGINE_SEMANTIC_MODE", "sparse")
+app.config["ENGINE_LSA_COMPONENTS"] = int(os.environ.get("ENGINE_LSA_COMPONENTS", 128))
+
+# Opt-in per-stage timings and counters, served at /metrics in the
+# Prometheus text format; when off, instrumented code does no extra work
+app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+
+# Request profiling (see request_profiler.py): when PROFILE_DIR is set,
+# requests slower than PROFILE_THRESHOLD seconds (0 disables) and admin
+# requests sent with an X-Profile-Request header are profiled into it,
+# keeping the newest PROFILE_MAX_CAPTURES
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR", "")
+app.config["PROFILE_THRESHOLD"] = float(os.environ.get("PROFILE_THRESHOLD", 1.0))
+app.config["PROFILE_MAX_CAPTURES"] = int(os.environ.get("PROFILE_MAX_CAPTURES", 100))
+if app.config["PROFILE_DIR"]:
+    from request_profiler import ProfilingMiddleware
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app.config["PROFILE_DIR"],
+                                       threshold=app.config["PROFILE_THRESHOLD"],
+                                       max_captures=app.config["PROFILE_MAX_CAPTURES"])
+
+# Comma-separated emails of users allowed to use the /admin endpoints
+app.config["ADMIN_EMAILS"] = frozenset(
+    email.strip().lower() for email in os.environ.get("ADMIN_EMAILS", "").split(",") if email.strip()
+)
+
 # Initialize the database with the app
 db.init_app(app)
 
@@ -38,10 +109,14 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-# Import models and create tables
-with app.app_context():
-    import models  # noqa: F401
-    db.create_all()
+# Import models so they are registered with SQLAlchemy; tables are created
+# by the explicit `flask init-db` startup command, not on every import
+import models  # noqa: F401
+
+def init_database():
+    """Create any missing tables"""
+    with app.app_context():
+        db.create_all()
 
 # User loader callback for Flask-Login
 @login_manager.user_loader
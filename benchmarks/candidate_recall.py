@@ -0,0 +1,73 @@
+"""Recall and latency of two-stage candidate scoring against exhaustive scoring
+
+For each catalog size the engine is built once; every profile is then ranked
+with exhaustive scoring and with each candidate pool size. Recall@k is the
+share of the exhaustive top k that the two-stage ranking also returns.
+
+    python -m benchmarks.candidate_recall --sizes 10000 100000 --pools 100 300 1000
+"""
+import argparse
+import json
+import logging
+
+import numpy as np
+
+from benchmarks.measure import latency_summary, time_calls
+from benchmarks.synthetic import synthetic_catalog, synthetic_engine, synthetic_profiles
+
+
+def recall_at_k(exhaustive, approximate, k):
+    """Share of the exhaustive top-k career ids found in the approximate top k"""
+    expected = {recommendation['career_id'] for recommendation in exhaustive[:k]}
+    if not expected:
+        return 1.0
+    found = {recommendation['career_id'] for recommendation in approximate[:k]}
+    return len(expected & found) / len(expected)
+
+
+def run(sizes, pools, num_profiles, k, seed):
+    results = []
+    profiles = synthetic_profiles(num_profiles, seed=seed)
+    for size in sizes:
+        # Built with the largest pool so the candidate postings exist
+        engine = synthetic_engine(synthetic_catalog(size, seed=seed), candidate_pool=max(pools))
+        rank = lambda profile: engine.get_recommendations(profile, num_recommendations=k)
+        
+        engine.candidate_pool = None
+        latencies, exhaustive = time_calls(rank, profiles)
+        results.append(dict(catalog_size=size, candidate_pool=None, recall_at_k=1.0, **latency_summary(latencies)))
+        
+        for pool in pools:
+            engine.candidate_pool = pool
+            latencies, approximate = time_calls(rank, profiles)
+            recalls = [recall_at_k(full, approx, k) for full, approx in zip(exhaustive, approximate)]
+            results.append(dict(catalog_size=size, candidate_pool=pool,
+                                recall_at_k=round(float(np.mean(recalls)), 4),
+                                min_recall_at_k=round(float(np.min(recalls)), 4),
+                                **latency_summary(latencies)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--pools', type=int, nargs='+', default=[50, 100, 300, 1000])
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    
+    results = run(args.sizes, args.pools, args.profiles, args.k, args.seed)
+    print(f"{'careers':>8} {'pool':>6} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8} {'per s':>8}")
+    for row in results:
+        print(f"{row['catalog_size']:>8} {str(row['candidate_pool'] or 'all'):>6} {row['recall_at_k']:>10.3f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['throughput_per_s']:>8.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'k': args.k, 'profiles': args.profiles, 'seed': args.seed, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Memory held by the career catalog and by a whole engine, per catalog size
+
+For each size a synthetic catalog is written to a JSON file and loaded two
+ways: as the list of dicts json.load returns and as a CareerCatalog, the
+engine's compact representation. Retained memory is what tracemalloc still
+counts after loading. An engine is then built from the file in a fresh
+process, reporting its RSS the way a gunicorn worker would see it.
+
+    python -m benchmarks.catalog_memory --sizes 10000 100000 --output memory.json
+"""
+import argparse
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.hot_path import git_commit
+from benchmarks.synthetic import synthetic_catalog
+from career_catalog import CareerCatalog, iter_json_records
+
+
+def load_dicts(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def load_catalog(path):
+    with open(path, 'r') as f:
+        return CareerCatalog.from_records(iter_json_records(f))
+
+
+def retained_memory(name, size, load, path):
+    """Time and traced memory (peak and still held) of loading the catalog file one way"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        catalog = load(path)
+        seconds = time.perf_counter() - start
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del catalog
+    return {'benchmark': name, 'catalog_size': size, 'seconds': round(seconds, 3),
+            'retained_mb': round(retained / 2 ** 20, 2), 'peak_memory_mb': round(peak / 2 ** 20, 2)}
+
+
+def current_rss_mb():
+    """Resident set size of this process; the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_engine(path, results):
+    """Run in a fresh process: RSS before and after building an engine from the catalog file"""
+    logging.disable(logging.WARNING)
+    from ml_engine import CareerRecommendationEngine
+    
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    engine = CareerRecommendationEngine(catalog_path=path)
+    gc.collect()
+    results.put({'seconds': round(time.perf_counter() - start, 3),
+                 'rss_mb': round(current_rss_mb() - baseline, 2),
+                 'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline, 2),
+                 'num_careers': len(engine.careers_data)})
+
+
+def engine_rss(size, path):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=build_engine, args=(path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return {'benchmark': 'engine_build_rss', 'catalog_size': size, **result}
+
+
+def format_result(result):
+    label = f"{result['benchmark']:<20} {result['catalog_size']:>7}  {result['seconds']:>7.2f}s"
+    if 'rss_mb' in result:
+        return f"{label}  RSS +{result['rss_mb']:.1f} MiB (peak +{result['peak_rss_mb']:.1f} MiB)"
+    return f"{label}  retained {result['retained_mb']:.1f} MiB (peak {result['peak_memory_mb']:.1f} MiB)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-engine', dest='engine', action='store_false',
+                        help='Skip building an engine (slow for large catalogs)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='career-memory-')
+    results = []
+    for size in args.sizes:
+        path = os.path.join(workdir, f'careers-{size}.json')
+        with open(path, 'w') as f:
+            json.dump(synthetic_catalog(size, seed=args.seed), f)
+        size_results = [retained_memory('catalog_dicts', size, load_dicts, path),
+                        retained_memory('career_catalog', size, load_catalog, path)]
+        if args.engine:
+            size_results.append(engine_rss(size, path))
+        for result in size_results:
+            print(format_result(result))
+        results.extend(size_results)
+        os.remove(path)
+    os.rmdir(workdir)
+    
+    if args.output:
+        report = {'commit': git_commit(), 'created_at': datetime.utcnow().isoformat(), 'seed': args.seed,
+                  'results': results}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
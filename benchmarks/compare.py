@@ -0,0 +1,57 @@
+"""Compare two benchmark result files, e.g. from two commits
+
+Prints the relative change of every latency, throughput, memory and recall figure
+and exits with status 1 if any got worse by more than --threshold percent.
+
+    python -m benchmarks.compare before.json after.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a higher value is a regression; throughput and recall are the opposite
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms', 'p99_ms', 'seconds', 'peak_memory_mb', 'retained_mb', 'rss_mb', 'peak_rss_mb',
+                   'index_mb', 'semantic_p50_ms', 'semantic_p95_ms', 'semantic_batch_ms')
+HIGHER_IS_BETTER = ('throughput_per_s', 'recall_at_k', 'semantic_recall_at_100')
+
+
+def load_results(path):
+    with open(path, 'r') as f:
+        report = json.load(f)
+    return report, {(result['benchmark'], result['catalog_size']): result for result in report['results']}
+
+
+def compare(before, after, threshold):
+    """Rows of (benchmark, size, metric, before, after, change %, regressed)"""
+    rows = []
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[1], key[0])):
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old = before[key].get(metric)
+            new = after[key].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = change if metric in LOWER_IS_BETTER else -change
+            rows.append((key[0], key[1], metric, old, new, change, worse > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Regression threshold in percent')
+    args = parser.parse_args()
+    
+    before_report, before = load_results(args.before)
+    after_report, after = load_results(args.after)
+    print(f"{before_report.get('commit')} -> {after_report.get('commit')}")
+    rows = compare(before, after, args.threshold)
+    for benchmark, size, metric, old, new, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{benchmark:<28} {size:>7} {metric:<16} {old:>12.4f} -> {new:>12.4f} {change:>+7.1f}%{flag}")
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Latency, throughput and memory of the recommendation hot path
+
+Builds synthetic catalogs of each size and measures the engine functions
+on the request path, each call with the engine's text caches emptied,
+then the /get-recommendations and /career/<id> routes
+through the Flask test client against a throwaway SQLite database. Results
+are printed and can be saved as JSON, e.g. one file per commit, to compare
+with `python -m benchmarks.compare`.
+
+    python -m benchmarks.hot_path --sizes 1000 10000 100000 --output bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.measure import latency_summary, peak_memory_mb, time_calls
+from benchmarks.synthetic import synthetic_catalog, synthetic_profiles
+
+# Calls traced for peak memory; tracing is slow, so only a sample is used
+MEMORY_SAMPLE = 20
+
+
+def profile_texts(profiles):
+    """Free-text fields of the profiles, as passed to _extract_keywords"""
+    return [profile[field] for profile in profiles for field in ('skills', 'interests', 'education', 'experience')
+            if profile[field]]
+
+
+def keyword_pairs(engine, profiles, count, seed):
+    """(user keyword, career keyword) pairs like those _keyword_match compares"""
+    rng = np.random.default_rng(seed)
+    user_keywords = [keyword for text in profile_texts(profiles) for keyword in engine._extract_keywords(text)]
+    career_keywords = list(engine.keyword_vocabulary)
+    return [(user_keywords[i], career_keywords[j])
+            for i, j in zip(rng.integers(len(user_keywords), size=count),
+                            rng.integers(len(career_keywords), size=count))]
+
+
+def measure(name, size, function, inputs, batch=1, memory=True, setup=None):
+    """Benchmark result for one function over some inputs (setup runs before each call, untimed)"""
+    try:
+        latencies, _ = time_calls(function, inputs, batch, setup)
+    except LookupError as e:
+        # e.g. NLTK data that cannot be downloaded here
+        message = next(line.strip() for line in str(e).splitlines() + [type(e).__name__] if line.strip(' *'))
+        return {'benchmark': name, 'catalog_size': size, 'error': message}
+    result = {'benchmark': name, 'catalog_size': size, **latency_summary(latencies)}
+    if memory:
+        result['peak_memory_mb'] = peak_memory_mb(function, inputs[:MEMORY_SAMPLE], setup)
+    return result
+
+
+def engine_benchmarks(size, careers, profiles, args):
+    """Engine build plus the engine functions on the request path"""
+    from ml_engine import CareerRecommendationEngine
+    
+    # The engine is built from its catalog file, as in the app; writing the file is not timed
+    catalog_path = os.environ['CAREER_CATALOG_PATH']
+    with open(catalog_path, 'w') as f:
+        json.dump(careers, f)
+    results = []
+    start = time.perf_counter()
+    engine = CareerRecommendationEngine(catalog_path=catalog_path)
+    build = {'benchmark': 'engine_build', 'catalog_size': size, 'seconds': round(time.perf_counter() - start, 3)}
+    if args.memory:
+        build['peak_memory_mb'] = peak_memory_mb(lambda path: CareerRecommendationEngine(catalog_path=path),
+                                                 [catalog_path])
+    results.append(build)
+    
+    # Inputs repeat (across profiles, and between benchmarks), so the text
+    # caches are emptied before each call: every call tokenises its input
+    clear_caches = engine.text_normalizer.cache_clear
+    results.append(measure('get_recommendations', size, engine.get_recommendations, profiles,
+                           memory=args.memory, setup=clear_caches))
+    results.append(measure('_extract_keywords', size, engine._extract_keywords, profile_texts(profiles),
+                           batch=100, memory=args.memory, setup=clear_caches))
+    pairs = keyword_pairs(engine, profiles, args.keyword_pairs, args.seed)
+    results.append(measure('_keyword_match', size, lambda pair: engine._keyword_match(*pair), pairs,
+                           batch=1000, memory=args.memory))
+    texts = [' '.join(profile.values()) for profile in profiles]
+    results.append(measure('extract_skills_from_text', size, engine.extract_skills_from_text, texts,
+                           memory=args.memory, setup=clear_caches))
+    return results
+
+
+def route_benchmarks(size, careers, profiles, args):
+    """/get-recommendations and /career/<id> through the Flask test client"""
+    import routes  # noqa: F401  (registers the views)
+    from app import app, db, init_database
+    from engine_loader import engine_provider
+    from models import Recommendation, User
+    from werkzeug.security import generate_password_hash
+    
+    with open(app.config["CAREER_CATALOG_PATH"], 'w') as f:
+        json.dump(careers, f)
+    # Full rebuild of the app's engine on this catalog, outside the timings
+    engine_provider.reload('benchmark catalog')
+    engine_provider.wait_for_reload()
+    init_database()
+    
+    # One logged-in client per user, so every timed request is a cache miss
+    traced = profiles[:min(MEMORY_SAMPLE, len(profiles))] if args.memory else []
+    password_hash = generate_password_hash('benchmark')
+    clients = []
+    with app.app_context():
+        for i, profile in enumerate(profiles + traced):
+            user = User(name=f'Benchmark {i}', email=f'bench-{size}-{i}@example.com',
+                        password_hash=password_hash, **profile)
+            db.session.add(user)
+            db.session.flush()
+            clients.append((app.test_client(), user.id, user.email))
+        db.session.commit()
+    for client, _, email in clients:
+        client.post('/login', data={'email': email, 'password': 'benchmark'})
+    timed, traced = clients[:len(profiles)], clients[len(profiles):]
+    
+    statuses = Counter()
+    
+    def get_recommendations(entry):
+        response = entry[0].get('/get-recommendations')
+        statuses[('/get-recommendations', response.status_code)] += 1
+    
+    def career_details(entry):
+        response = entry[0].get(f'/career/{entry[3]}')
+        statuses[('/career/<id>', response.status_code)] += 1
+    
+    results = [measure('route /get-recommendations', size, get_recommendations, timed, memory=False)]
+    if traced:
+        results[-1]['peak_memory_mb'] = peak_memory_mb(get_recommendations, traced)
+    
+    # Each user views the detail page of their top recommendation
+    with app.app_context():
+        top = {}
+        for recommendation in Recommendation.query.order_by(Recommendation.score.desc()).all():
+            top.setdefault(recommendation.user_id, recommendation.career_id)
+    viewers = [(client, user_id, email, top[user_id]) for client, user_id, email in clients if user_id in top]
+    results.append(measure('route /career/<id>', size, career_details, viewers, memory=args.memory))
+    
+    for result in results:
+        route = result['benchmark'].split(' ', 1)[1]
+        result['status_codes'] = {str(code): count for (path, code), count in statuses.items() if path == route}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_result(result):
+    """One printable line per result"""
+    label = f"{result['benchmark']:<28} {result['catalog_size']:>7}"
+    if 'error' in result:
+        return f"{label}  skipped: {result['error']}"
+    memory = f"  peak {result['peak_memory_mb']:.1f} MiB" if 'peak_memory_mb' in result else ''
+    if 'seconds' in result:
+        return f"{label}  {result['seconds']:.2f}s{memory}"
+    return (f"{label}  p50 {result['p50_ms']:.3f}ms  p95 {result['p95_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+            f"{result['throughput_per_s']:.0f}/s{memory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--keyword-pairs', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Skip the traced memory runs')
+    parser.add_argument('--no-routes', dest='routes', action='store_false', help='Skip the Flask route benchmarks')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='career-benchmark-')
+    # The app reads its configuration at import, so it is pointed at a
+    # throwaway database and catalog before anything imports it
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ['CAREER_CATALOG_PATH'] = os.path.join(workdir, 'careers.json')
+    os.environ['ENGINE_ARTIFACTS_DIR'] = ''
+    os.environ['CATALOG_RELOAD_INTERVAL'] = '0'
+    logging.disable(logging.WARNING)
+    
+    profiles = synthetic_profiles(args.profiles, seed=args.seed)
+    results = []
+    for size in args.sizes:
+        careers = synthetic_catalog(size, seed=args.seed)
+        results.extend(engine_benchmarks(size, careers, profiles, args))
+        if args.routes:
+            results.extend(route_benchmarks(size, careers, profiles, args))
+        for result in results:
+            if result['catalog_size'] == size:
+                print(format_result(result))
+    
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'profiles': args.profiles,
+            'seed': args.seed,
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Timing and memory helpers shared by the benchmarks"""
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def time_calls(function, inputs, batch=1, setup=None):
+    """Call function on every input; returns the per-call latencies in seconds and the results
+    
+    With batch > 1, calls are timed in groups of that size and each group
+    contributes its mean latency, for functions too fast to time one by one.
+    setup, if given, is called before every call, outside the timings.
+    """
+    latencies = []
+    results = []
+    for start_index in range(0, len(inputs), batch):
+        group = inputs[start_index:start_index + batch]
+        elapsed = 0
+        if setup is None:
+            start = time.perf_counter()
+            for value in group:
+                results.append(function(value))
+            elapsed = time.perf_counter() - start
+        else:
+            for value in group:
+                setup()
+                start = time.perf_counter()
+                results.append(function(value))
+                elapsed += time.perf_counter() - start
+        latencies.append(elapsed / len(group))
+    return latencies, results
+
+
+def peak_memory_mb(function, inputs, setup=None):
+    """Peak Python and NumPy memory allocated while calling function on inputs, in MiB
+    
+    Runs separately from the timed calls, as tracing slows every allocation.
+    setup, if given, is called before every call.
+    """
+    tracemalloc.start()
+    try:
+        for value in inputs:
+            if setup is not None:
+                setup()
+            function(value)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2 ** 20, 2)
+
+
+def latency_summary(latencies):
+    """p50/p95/p99 latency in milliseconds and throughput in calls per second"""
+    latencies = np.asarray(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        'calls': len(latencies),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'throughput_per_s': round(len(latencies) / float(latencies.sum()), 1) if latencies.sum() else None
+    }
@@ -0,0 +1,133 @@
+"""Latency, memory and ranking agreement of the dense LSA semantic index against the sparse one
+
+For each catalog size the engine is fitted once in the exact 'sparse'
+semantic mode; the LSA index is then built for every mode and number of
+components on the same catalog. Reported per configuration:
+
+- index_mb: the careers' side of semantic scoring (sparse index, or the
+  LSA projection, vectors and scales)
+- semantic p50/p95 for one profile, and the per-profile time when a batch
+  of profiles is scored with one matrix product
+- p50/p95 of the whole get_recommendations
+- recall@k of the final recommendations and semantic_recall@100 of the
+  semantic signal alone, both against the sparse path
+
+    python -m benchmarks.semantic_index --sizes 10000 100000 --components 64 128 256
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from benchmarks.candidate_recall import recall_at_k
+from benchmarks.hot_path import git_commit
+from benchmarks.measure import latency_summary, time_calls
+from benchmarks.synthetic import synthetic_catalog, synthetic_engine, synthetic_profiles
+
+SEMANTIC_TOP = 100
+
+
+def index_mb(engine):
+    if engine.semantic_mode == 'sparse':
+        index = engine.semantic_index
+        arrays = [index.data, index.indices, index.indptr]
+    else:
+        arrays = [array for array in (engine.lsa_projection, engine.lsa_vectors, engine.lsa_scales)
+                  if array is not None]
+    return round(sum(array.nbytes for array in arrays) / 2 ** 20, 2)
+
+
+def semantic_top(scores):
+    return set(np.argsort(-scores, kind='stable')[:SEMANTIC_TOP])
+
+
+def measure(engine, profiles, k, batch_size, reference=None):
+    """Figures of the engine's current semantic mode; reference is the sparse mode's result"""
+    latencies, semantic = time_calls(lambda profile: engine._score_semantic(profile), profiles)
+    semantic_summary = latency_summary(latencies)
+    batch_seconds = []
+    for start_index in range(0, len(profiles), batch_size):
+        batch = profiles[start_index:start_index + batch_size]
+        start = time.perf_counter()
+        engine._score_semantic_batch(batch)
+        batch_seconds.append((time.perf_counter() - start) / len(batch))
+    latencies, recommendations = time_calls(
+        lambda profile: engine.get_recommendations(profile, num_recommendations=k), profiles)
+    ranking_summary = latency_summary(latencies)
+    
+    result = {
+        'index_mb': index_mb(engine),
+        'semantic_p50_ms': semantic_summary['p50_ms'],
+        'semantic_p95_ms': semantic_summary['p95_ms'],
+        'semantic_batch_ms': round(float(np.mean(batch_seconds)) * 1000, 4),
+        'p50_ms': ranking_summary['p50_ms'],
+        'p95_ms': ranking_summary['p95_ms']
+    }
+    if reference is None:
+        result.update(recall_at_k=1.0, semantic_recall_at_100=1.0)
+    else:
+        result['recall_at_k'] = round(float(np.mean(
+            [recall_at_k(exact, approximate, k)
+             for exact, approximate in zip(reference['recommendations'], recommendations)])), 4)
+        result['semantic_recall_at_100'] = round(float(np.mean(
+            [len(semantic_top(exact) & semantic_top(approximate)) / SEMANTIC_TOP
+             for exact, approximate in zip(reference['semantic'], semantic)])), 4)
+    return result, {'recommendations': recommendations, 'semantic': semantic}
+
+
+def run(sizes, modes, components, num_profiles, k, batch_size, seed):
+    results = []
+    # Profiles without skills or interests get random fallback recommendations
+    profiles = [profile for profile in synthetic_profiles(num_profiles, seed=seed)
+                if profile['skills'] or profile['interests']]
+    for size in sizes:
+        engine = synthetic_engine(synthetic_catalog(size, seed=seed))
+        result, reference = measure(engine, profiles, k, batch_size)
+        results.append(dict(benchmark='semantic_sparse', catalog_size=size, semantic_mode='sparse',
+                            components=None, build_seconds=None, **result))
+        
+        for n_components in components:
+            for mode in modes:
+                engine.semantic_mode = mode
+                engine.lsa_components = n_components
+                start = time.perf_counter()
+                engine._build_semantic_index()
+                build_seconds = round(time.perf_counter() - start, 3)
+                result, _ = measure(engine, profiles, k, batch_size, reference)
+                results.append(dict(benchmark=f'semantic_{mode}_{n_components}', catalog_size=size,
+                                    semantic_mode=mode, components=n_components, build_seconds=build_seconds,
+                                    **result))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--modes', nargs='+', default=['lsa', 'lsa_int8'], choices=['lsa', 'lsa_int8'])
+    parser.add_argument('--components', type=int, nargs='+', default=[64, 128, 256])
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    
+    results = run(args.sizes, args.modes, args.components, args.profiles, args.k, args.batch_size, args.seed)
+    print(f"{'careers':>8} {'mode':>9} {'dims':>5} {'index MiB':>10} {'sem p50':>8} {'batch':>7} "
+          f"{'rank p50':>9} {'recall@' + str(args.k):>10} {'sem@100':>8}")
+    for row in results:
+        print(f"{row['catalog_size']:>8} {row['semantic_mode']:>9} {str(row['components'] or '-'):>5} "
+              f"{row['index_mb']:>10.1f} {row['semantic_p50_ms']:>8.2f} {row['semantic_batch_ms']:>7.2f} "
+              f"{row['p50_ms']:>9.2f} {row['recall_at_k']:>10.3f} {row['semantic_recall_at_100']:>8.3f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_commit(), 'k': args.k, 'profiles': args.profiles, 'seed': args.seed,
+                       'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Synthetic career catalogs and user profiles for the benchmarks
+
+Catalogs are modelled on static/data/careers.json: every synthetic career is
+a variant of a real one, with a seniority or specialisation in its name and a
+description and skill list drawn mostly from careers of the same industry.
+Profiles have the fields of models.User.recommendation_profile(). Both are
+deterministic for a given seed.
+"""
+import json
+import os
+import random
+import tempfile
+
+BASE_CATALOG_PATH = 'static/data/careers.json'
+
+SENIORITIES = ['Junior', 'Senior', 'Lead', 'Principal', 'Associate', 'Staff', 'Chief', 'Freelance']
+SPECIALISATIONS = ['Healthcare', 'Fintech', 'Retail', 'Logistics', 'Education', 'Energy', 'Gaming',
+                   'Government', 'Media', 'Automotive', 'Insurance', 'Travel', 'Telecom', 'Agriculture']
+DEGREES = ['BSc Computer Science', 'BA Economics', 'MBA', 'MSc Data Science', 'BFA Graphic Design',
+           'BEng Electrical Engineering', 'Diploma in Marketing', 'PhD Physics', 'High school diploma', '']
+ROLES = ['intern', 'analyst', 'developer', 'designer', 'consultant', 'manager', 'engineer', 'teacher',
+         'researcher', 'support specialist']
+
+
+def synthetic_engine(careers, **engine_options):
+    """A CareerRecommendationEngine built from the given catalog, as from its catalog file"""
+    from ml_engine import CareerRecommendationEngine
+    
+    with tempfile.TemporaryDirectory(prefix='synthetic-catalog-') as directory:
+        catalog_path = os.path.join(directory, 'careers.json')
+        with open(catalog_path, 'w') as f:
+            json.dump(careers, f)
+        return CareerRecommendationEngine(catalog_path=catalog_path, **engine_options)
+
+
+def load_base_catalog(path=BASE_CATALOG_PATH):
+    """The real catalog the synthetic one is modelled on"""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _split_skills(career):
+    return [skill.strip() for skill in career['required_skills'].split(',') if skill.strip()]
+
+
+def _description_words(career):
+    return [word.strip('.,()') for word in career['description'].split() if word.strip('.,()')]
+
+
+def synthetic_catalog(size, seed=0, base_catalog=None):
+    """A catalog of `size` careers shaped like careers.json"""
+    rng = random.Random(seed)
+    base = base_catalog or load_base_catalog()
+    skills_by_industry = {}
+    words_by_industry = {}
+    for career in base:
+        skills_by_industry.setdefault(career['industry'], []).extend(_split_skills(career))
+        words_by_industry.setdefault(career['industry'], []).extend(_description_words(career))
+    all_skills = [skill for skills in skills_by_industry.values() for skill in skills]
+    all_words = [word for words in words_by_industry.values() for word in words]
+    
+    careers = []
+    for i in range(size):
+        template = rng.choice(base)
+        industry = template['industry']
+        # Mostly skills and wording of the same industry, with some from elsewhere
+        skills = rng.sample(_split_skills(template), k=min(3, len(_split_skills(template))))
+        skills += [rng.choice(skills_by_industry[industry] if rng.random() < 0.7 else all_skills)
+                   for _ in range(rng.randint(2, 6))]
+        words = [rng.choice(words_by_industry[industry] if rng.random() < 0.7 else all_words)
+                 for _ in range(rng.randint(10, 24))]
+        careers.append({
+            'id': 100000 + i,
+            'name': f"{rng.choice(SENIORITIES)} {rng.choice(SPECIALISATIONS)} {template['name']}",
+            'description': ' '.join(words).capitalize() + '.',
+            'required_skills': ', '.join(dict.fromkeys(skills)),
+            'industry': industry
+        })
+    return careers
+
+
+def synthetic_profiles(count, seed=0, base_catalog=None):
+    """`count` user profiles with the fields the engine reads from models.User"""
+    rng = random.Random(seed)
+    base = base_catalog or load_base_catalog()
+    all_skills = [skill for career in base for skill in _split_skills(career)]
+    
+    profiles = []
+    for _ in range(count):
+        # Each user leans towards one real career, plus unrelated skills
+        target = rng.choice(base)
+        target_skills = _split_skills(target)
+        skills = rng.sample(target_skills, k=rng.randint(1, len(target_skills)))
+        skills += rng.sample(all_skills, k=rng.randint(0, 4))
+        words = _description_words(target)
+        interests = rng.sample(words, k=min(len(words), rng.randint(0, 5))) + [target['industry']]
+        profiles.append({
+            'skills': ', '.join(skills) if rng.random() < 0.95 else '',
+            'interests': ' '.join(interests) if rng.random() < 0.8 else '',
+            'education': rng.choice(DEGREES),
+            'experience': f"{rng.randint(1, 15)} years as {rng.choice(ROLES)}" if rng.random() < 0.7 else ''
+        })
+    return profiles
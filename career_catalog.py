@@ -0,0 +1,565 @@
+"""Compact, column-oriented storage for the career catalog
+
+A catalog of plain dicts costs a dict and five string objects per career.
+CareerCatalog keeps the same data as parallel NumPy arrays instead: ids,
+name and industry codes into interned string tables, and the long text
+fields as one UTF-8 buffer each. Careers are only turned back into objects
+(CareerRecord) when indexed, e.g. for the final top-k recommendations.
+"""
+import json
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+
+# Fields of a career, in the order of the catalog's JSON objects
+FIELDS = ('id', 'name', 'description', 'required_skills', 'industry')
+
+
+def iter_json_records(f, block_size=1 << 16):
+    """Yield the objects of a JSON array, or of a JSON Lines file, reading block_size characters at a time
+    
+    Only the current object and one block are held in memory, unlike
+    json.load on the whole file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    in_array = None
+    eof = False
+    while True:
+        # Skip whitespace and the array's separators
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if in_array is None and position < len(buffer):
+            in_array = buffer[position] == '['
+            position += in_array
+            continue
+        if position < len(buffer) and buffer[position] == ']' and in_array:
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if eof:
+                if buffer[position:].strip():
+                    raise
+                return
+            # The next object is split across blocks; read on
+            block = f.read(block_size)
+            eof = not block
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+        if end == len(buffer) and not eof:
+            # A number at the end of the buffer may continue in the next block
+            block = f.read(block_size)
+            eof = not block
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+        yield record
+        position = end
+
+
+class CareerRecord:
+    """One career materialised from a CareerCatalog
+    
+    Reads like the catalog's JSON objects (record['name'], record.get(...),
+    dict(record)) and compares equal to the dict with the same fields.
+    """
+    __slots__ = FIELDS
+    
+    def __init__(self, id, name, description, required_skills, industry):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.required_skills = required_skills
+        self.industry = industry
+    
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+    
+    def get(self, field, default=None):
+        return getattr(self, field) if field in FIELDS else default
+    
+    def keys(self):
+        return FIELDS
+    
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+    
+    def __eq__(self, other):
+        if isinstance(other, CareerRecord):
+            return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+    
+    def __repr__(self):
+        return f"CareerRecord({self.to_dict()!r})"
+
+
+class StringTable:
+    """Interned strings: each distinct value is stored once and referred to by its code"""
+    
+    def __init__(self, values=()):
+        self.values = list(values)
+        self._codes = {value: code for code, value in enumerate(self.values)}
+    
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+    
+    def __len__(self):
+        return len(self.values)
+
+
+class TextColumn:
+    """Strings stored as one UTF-8 buffer; string i is buffer[offsets[i]:offsets[i + 1]]"""
+    
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+    
+    @classmethod
+    def from_strings(cls, strings):
+        buffer = bytearray()
+        lengths = array('q')
+        for string in strings:
+            encoded = string.encode('utf-8')
+            buffer += encoded
+            lengths.append(len(encoded))
+        return cls.from_bytes(buffer, lengths)
+    
+    @classmethod
+    def from_bytes(cls, buffer, lengths):
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.frombuffer(bytes(buffer), dtype=np.uint8), offsets)
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, idx):
+        return self.buffer[self.offsets[idx]:self.offsets[idx + 1]].tobytes().decode('utf-8')
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def take(self, rows):
+        """The strings at rows, as a new column"""
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Byte positions of every selected string, in order
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return TextColumn(self.buffer[positions], offsets)
+    
+    def concatenate(self, other):
+        return TextColumn(np.concatenate([self.buffer, other.buffer]),
+                          np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]]))
+    
+    def lengths(self):
+        """Length of each string in characters"""
+        # Every UTF-8 byte except continuation bytes (0b10xxxxxx) starts a character
+        starts = np.zeros(len(self.buffer) + 1, dtype=np.int64)
+        np.cumsum((np.asarray(self.buffer) & 0xC0) != 0x80, out=starts[1:])
+        return starts[self.offsets[1:]] - starts[self.offsets[:-1]]
+
+
+class SortedStringTable(Mapping):
+    """Strings numbered 0..n-1 (a vocabulary), looked up by binary search instead of through a dict
+    
+    A read-only mapping of string -> number held in arrays that can be
+    memory-mapped and shared between processes: the strings in number order
+    (a TextColumn), the numbers ordered by the strings' UTF-8 bytes, and the
+    first PREFIX_BYTES bytes of the strings in that order, which
+    np.searchsorted searches. Only strings sharing those bytes with the one
+    looked up are compared in full. Strings added by extended() are kept in
+    a small overlay, like Postings.extra.
+    """
+    
+    PREFIX_BYTES = 16
+    # containing() checks up to this many strings one by one, more in one search
+    SCAN_STRINGS = 64
+    # Arrays of the table, as returned by arrays()
+    ARRAY_NAMES = ('strings.buffer', 'strings.offsets', 'order', 'prefixes')
+    
+    def __init__(self, strings, order, prefixes, extra=()):
+        self.strings = strings
+        self.order = order
+        self.prefixes = prefixes
+        self.extra = list(extra)
+        self._extra_numbers = {string: len(strings) + i for i, string in enumerate(self.extra)}
+        # Plain views of memory-mapped arrays: indexing np.memmap goes through Python code
+        self._text = TextColumn(np.asarray(strings.buffer), np.asarray(strings.offsets))
+        self._buffer = memoryview(self._text.buffer)
+        self._offsets = self._text.offsets
+        self._order = np.asarray(order)
+        self._prefixes = np.asarray(prefixes)
+    
+    @classmethod
+    def from_strings(cls, strings):
+        """Number distinct strings in the order given"""
+        return cls.from_column(TextColumn.from_strings(strings))
+    
+    @classmethod
+    def from_column(cls, column):
+        """Number the distinct strings of a TextColumn by position, sharing the column's arrays"""
+        buffer = memoryview(np.asarray(column.buffer))
+        offsets = np.asarray(column.offsets).tolist()
+        encoded = [buffer[start:end].tobytes() for start, end in zip(offsets[:-1], offsets[1:])]
+        order = sorted(range(len(encoded)), key=encoded.__getitem__)
+        prefixes = np.array([encoded[number] for number in order], dtype=f'S{cls.PREFIX_BYTES}')
+        return cls(column, np.array(order, dtype=np.int64), prefixes)
+    
+    @classmethod
+    def from_mapping(cls, mapping):
+        """Table equal to a dict of string -> number whose numbers are 0..len(mapping)-1"""
+        if isinstance(mapping, SortedStringTable):
+            return mapping.compacted()
+        return cls.from_strings(sorted(mapping, key=mapping.get))
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a table from arrays() without copying them"""
+        return cls(TextColumn(arrays['strings.buffer'], arrays['strings.offsets']), arrays['order'],
+                   arrays['prefixes'])
+    
+    def arrays(self):
+        """Every array of the table by name (see ARRAY_NAMES), overlay included"""
+        table = self.compacted()
+        return {'strings.buffer': table.strings.buffer, 'strings.offsets': table.strings.offsets,
+                'order': table.order, 'prefixes': table.prefixes}
+    
+    def compacted(self):
+        """Equal table with the overlay folded into the arrays, e.g. for persisting"""
+        if not self.extra:
+            return self
+        return SortedStringTable.from_strings(self)
+    
+    def extended(self, strings):
+        """Copy of this table numbering new strings after its own; the arrays are shared, not copied"""
+        new_strings = dict.fromkeys(string for string in strings if string not in self)
+        return SortedStringTable(self.strings, self.order, self.prefixes, self.extra + list(new_strings))
+    
+    def __len__(self):
+        return len(self.strings) + len(self.extra)
+    
+    def __iter__(self):
+        yield from self.strings
+        yield from self.extra
+    
+    def __getitem__(self, string):
+        number = self.get(string)
+        if number is None:
+            raise KeyError(string)
+        return number
+    
+    def __contains__(self, string):
+        return self.get(string) is not None
+    
+    def get(self, string, default=None):
+        encoded = string.encode('utf-8')
+        number = self._find(encoded, int(np.searchsorted(self._prefixes, encoded[:self.PREFIX_BYTES])))
+        if number is None:
+            return self._extra_numbers.get(string, default)
+        return number
+    
+    def items(self):
+        return zip(self, range(len(self)))
+    
+    def values(self):
+        return range(len(self))
+    
+    def numbers(self, strings):
+        """Numbers of many strings at once, as an array with -1 for strings not in the table"""
+        encoded = [string.encode('utf-8') for string in strings]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        prefixes = np.array(encoded, dtype=self._prefixes.dtype)
+        positions = np.minimum(np.searchsorted(self._prefixes, prefixes), max(len(self._prefixes) - 1, 0))
+        numbers = np.full(len(encoded), -1, dtype=np.int64)
+        if len(self._prefixes):
+            found = self._prefixes[positions] == prefixes
+            candidates = self._order[positions]
+            # A string no longer than its prefix is found if the first string with that prefix has its length
+            exact = (found & (lengths <= self.PREFIX_BYTES)
+                     & (self._offsets[candidates + 1] - self._offsets[candidates] == lengths))
+            numbers[exact] = candidates[exact]
+            for i in np.flatnonzero(found & ~exact).tolist():
+                number = self._find(encoded[i], int(positions[i]))
+                numbers[i] = -1 if number is None else number
+        if self.extra:
+            for i in np.flatnonzero(numbers < 0).tolist():
+                numbers[i] = self._extra_numbers.get(strings[i], -1)
+        return numbers
+    
+    def string(self, number):
+        """The string numbered number"""
+        if number < len(self.strings):
+            return self.strings[number]
+        return self.extra[number - len(self.strings)]
+    
+    def containing(self, substring, numbers):
+        """Those of numbers whose string contains substring"""
+        # Substrings of UTF-8 text are found by searching its bytes
+        encoded = substring.encode('utf-8')
+        if len(numbers) <= self.SCAN_STRINGS:
+            return [number for number in numbers if encoded in self._string_bytes(number)]
+        
+        # Many strings are searched at once, keeping the hits within one string
+        numbers = np.asarray(numbers, dtype=np.int64)
+        own = numbers[numbers < len(self.strings)]
+        column = self._text.take(own)
+        text = column.buffer.tobytes()
+        hits = []
+        position = text.find(encoded)
+        while position >= 0:
+            hits.append(position)
+            position = text.find(encoded, position + 1)
+        hits = np.array(hits, dtype=np.int64)
+        rows = np.searchsorted(column.offsets, hits, side='right') - 1
+        rows = rows[hits + len(encoded) <= column.offsets[rows + 1]]
+        found = set(own[rows].tolist())
+        found.update(number for number in numbers[numbers >= len(self.strings)].tolist()
+                     if encoded in self._string_bytes(number))
+        return list(found)
+    
+    def lengths(self):
+        """Length of each string in characters, by number"""
+        return np.concatenate([self.strings.lengths(), [len(string) for string in self.extra]]).astype(np.int64)
+    
+    def _string_bytes(self, number):
+        """UTF-8 bytes of the string numbered number"""
+        if number < len(self.strings):
+            return self._buffer[self._offsets[number]:self._offsets[number + 1]].tobytes()
+        return self.extra[number - len(self.strings)].encode('utf-8')
+    
+    def _find(self, encoded, position):
+        """Number of the string with UTF-8 bytes encoded, searching the sorted strings from position"""
+        prefix = encoded[:self.PREFIX_BYTES]
+        # Strings longer than PREFIX_BYTES may share their prefix with a few others
+        while position < len(self._prefixes) and self._prefixes[position] == prefix:
+            number = int(self._order[position])
+            if self._buffer[self._offsets[number]:self._offsets[number + 1]] == encoded:
+                return number
+            position += 1
+        return None
+
+
+class CareerCatalog:
+    """The career catalog as parallel arrays
+    
+    ids and the name and industry codes are NumPy arrays indexed by catalog
+    position, so scoring code can work on positions alone. catalog[i]
+    materialises one CareerRecord; iterating yields every career in order.
+    Catalogs are never modified: select() returns a new one.
+    
+    The string tables (names, industries) are tuples, or TextColumns for
+    catalogs rebuilt by from_arrays(), whose arrays may be memory-mapped.
+    """
+    
+    # Arrays of the catalog, as returned by arrays()
+    ARRAY_NAMES = ('ids', 'name_codes', 'industry_codes', 'sorted_ids', 'first_positions',
+                   'names.buffer', 'names.offsets', 'industries.buffer', 'industries.offsets',
+                   'descriptions.buffer', 'descriptions.offsets',
+                   'required_skills.buffer', 'required_skills.offsets',
+                   'names.order', 'names.prefixes', 'name_members', 'name_offsets')
+    
+    def __init__(self, ids, name_codes, names, industry_codes, industries, descriptions, required_skills,
+                 id_index=None, name_index=None):
+        self.ids = _readonly(ids)
+        self.name_codes = _readonly(name_codes)
+        self.names = names
+        self.industry_codes = _readonly(industry_codes)
+        self.industries = industries
+        self.descriptions = descriptions
+        self.required_skills = required_skills
+        # Sorted unique ids and the position of the first career with each, for position()
+        if id_index is None:
+            id_index = np.unique(self.ids, return_index=True)
+        self._sorted_ids, self._first_positions = (_readonly(array) for array in id_index)
+        # Names as a SortedStringTable, and the positions of each name's careers, for ids_named();
+        # built on first use unless given
+        self._name_index = name_index
+    
+    @classmethod
+    def from_records(cls, records):
+        """Build a catalog from an iterable of career dicts, e.g. streamed by iter_json_records"""
+        if isinstance(records, CareerCatalog):
+            return records
+        ids = array('q')
+        name_codes = array('l')
+        industry_codes = array('l')
+        names = StringTable()
+        industries = StringTable()
+        text = {field: (bytearray(), array('q')) for field in ('description', 'required_skills')}
+        for record in records:
+            ids.append(record['id'])
+            name_codes.append(names.code(record['name']))
+            industry_codes.append(industries.code(record['industry']))
+            for field, (buffer, lengths) in text.items():
+                encoded = record[field].encode('utf-8')
+                buffer += encoded
+                lengths.append(len(encoded))
+        return cls(np.array(ids, dtype=np.int64), np.array(name_codes, dtype=np.int32), tuple(names.values),
+                   np.array(industry_codes, dtype=np.int32), tuple(industries.values),
+                   TextColumn.from_bytes(*text['description']), TextColumn.from_bytes(*text['required_skills']))
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a catalog from arrays() without copying them"""
+        def column(name):
+            return TextColumn(arrays[f'{name}.buffer'], arrays[f'{name}.offsets'])
+        
+        names = column('names')
+        name_table = SortedStringTable(names, arrays['names.order'], arrays['names.prefixes'])
+        return cls(arrays['ids'], arrays['name_codes'], names, arrays['industry_codes'],
+                   column('industries'), column('descriptions'), column('required_skills'),
+                   id_index=(arrays['sorted_ids'], arrays['first_positions']),
+                   name_index=(name_table, arrays['name_members'], arrays['name_offsets']))
+    
+    def arrays(self):
+        """Every array of the catalog by name (see ARRAY_NAMES), string tables included"""
+        arrays = {'ids': self.ids, 'name_codes': self.name_codes, 'industry_codes': self.industry_codes,
+                  'sorted_ids': self._sorted_ids, 'first_positions': self._first_positions}
+        for name in ('names', 'industries', 'descriptions', 'required_skills'):
+            column = getattr(self, name)
+            if not isinstance(column, TextColumn):
+                column = TextColumn.from_strings(column)
+            arrays[f'{name}.buffer'] = column.buffer
+            arrays[f'{name}.offsets'] = column.offsets
+        name_table, arrays['name_members'], arrays['name_offsets'] = self._name_lookup()
+        arrays['names.order'] = name_table.order
+        arrays['names.prefixes'] = name_table.prefixes
+        return arrays
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __getitem__(self, idx):
+        return CareerRecord(int(self.ids[idx]), self.names[self.name_codes[idx]], self.descriptions[idx],
+                            self.required_skills[idx], self.industries[self.industry_codes[idx]])
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    def name(self, idx):
+        return self.names[self.name_codes[idx]]
+    
+    def position(self, career_id):
+        """Position of the first career with this id, or None"""
+        i = np.searchsorted(self._sorted_ids, career_id)
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == career_id:
+            return int(self._first_positions[i])
+        return None
+    
+    def ids_named(self, name):
+        """Ids of the careers with this name, in catalog order (empty if there are none)"""
+        name_table, members, offsets = self._name_lookup()
+        code = name_table.get(name)
+        if code is None:
+            return ()
+        return tuple(self.ids[members[offsets[code]:offsets[code + 1]]].tolist())
+    
+    def _name_lookup(self):
+        """The names as a SortedStringTable numbering them by code, and the positions of the
+        careers with each name code, grouped CSR-style by name_offsets"""
+        if self._name_index is None:
+            names = self.names if isinstance(self.names, TextColumn) else TextColumn.from_strings(self.names)
+            # A stable sort keeps each name's careers in catalog order
+            members = np.argsort(self.name_codes, kind='stable')
+            offsets = np.zeros(len(names) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.name_codes, minlength=len(names)), out=offsets[1:])
+            self._name_index = (SortedStringTable.from_column(names), _readonly(members), _readonly(offsets))
+        return self._name_index
+    
+    def positions(self, career_ids):
+        """position() of every id in an array at once, -1 for ids not in the catalog"""
+        career_ids = np.asarray(career_ids, dtype=np.int64)
+        if not len(self._sorted_ids):
+            return np.full(len(career_ids), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self._sorted_ids, career_ids), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[i] == career_ids, self._first_positions[i], -1)
+    
+    def equal_rows(self, rows, other, other_rows):
+        """Whether the career at each of rows equals the one at the same place in other_rows of other
+        
+        Compared column by column on the arrays, without materialising any
+        CareerRecord; returns a boolean array."""
+        rows = np.asarray(rows, dtype=np.int64)
+        other_rows = np.asarray(other_rows, dtype=np.int64)
+        equal = self.ids[rows] == other.ids[other_rows]
+        for codes, table, other_codes, other_table in (
+                (self.name_codes, self.names, other.name_codes, other.names),
+                (self.industry_codes, self.industries, other.industry_codes, other.industries)):
+            # Codes of other's strings in this catalog's table, -1 if absent
+            own_codes = {value: code for code, value in enumerate(table)}
+            translated = np.array([own_codes.get(value, -1) for value in other_table], dtype=np.int64)
+            equal &= codes[rows] == translated[other_codes[other_rows]]
+        for name in ('descriptions', 'required_skills'):
+            equal &= _equal_strings(getattr(self, name), rows, getattr(other, name), other_rows)
+        return equal
+    
+    def select(self, rows, extra_records=()):
+        """A new catalog of the careers at rows, counting extra_records as positions len(self) onwards"""
+        rows = np.asarray(rows, dtype=np.int64)
+        extra = CareerCatalog.from_records(extra_records)
+        catalog = self
+        if len(extra):
+            names = StringTable(self.names)
+            industries = StringTable(self.industries)
+            name_codes = np.array([names.code(name) for name in extra.names], dtype=np.int32)[extra.name_codes]
+            industry_codes = np.array([industries.code(industry) for industry in extra.industries],
+                                      dtype=np.int32)[extra.industry_codes]
+            catalog = CareerCatalog(
+                np.concatenate([self.ids, extra.ids]),
+                np.concatenate([self.name_codes, name_codes]), tuple(names.values),
+                np.concatenate([self.industry_codes, industry_codes]), tuple(industries.values),
+                self.descriptions.concatenate(extra.descriptions),
+                self.required_skills.concatenate(extra.required_skills)
+            )
+        return CareerCatalog(catalog.ids[rows], catalog.name_codes[rows], catalog.names,
+                             catalog.industry_codes[rows], catalog.industries,
+                             catalog.descriptions.take(rows), catalog.required_skills.take(rows))
+    
+    def to_dicts(self):
+        return [record.to_dict() for record in self]
+    
+    def __eq__(self, other):
+        """Equal to a catalog or a list of career dicts with the same careers in the same order"""
+        if isinstance(other, CareerCatalog):
+            rows = np.arange(len(self))
+            return len(self) == len(other) and bool(self.equal_rows(rows, other, rows).all())
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+        return NotImplemented
+
+
+def _equal_strings(column, rows, other, other_rows):
+    """Whether the string at each of rows of a TextColumn equals the one at other_rows of another"""
+    starts, ends = column.offsets[rows], column.offsets[rows + 1]
+    other_starts, other_ends = other.offsets[other_rows], other.offsets[other_rows + 1]
+    equal = ends - starts == other_ends - other_starts
+    # Strings of the same length are compared in place, without copying the buffers
+    buffer, other_buffer = memoryview(column.buffer), memoryview(other.buffer)
+    same_length = np.flatnonzero(equal)
+    for i, start, end, other_start, other_end in zip(same_length.tolist(), starts[same_length].tolist(),
+                                                     ends[same_length].tolist(),
+                                                     other_starts[same_length].tolist(),
+                                                     other_ends[same_length].tolist()):
+        equal[i] = buffer[start:end] == other_buffer[other_start:other_end]
+    return equal
+
+
+def _readonly(array):
+    array.setflags(write=False)
+    return array
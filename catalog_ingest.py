@@ -0,0 +1,264 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from sqlalchemy import insert, select, update
+
+from app import db
+from career_catalog import iter_json_records
+from models import Career
+from market_data import trend_repository
+
+# Column limits of the careers table
+NAME_LENGTH = 100
+INDUSTRY_LENGTH = 100
+
+
+def iter_job_rows(path, file_format=None):
+    """Stream the raw rows of a job export (.csv, .json array or .jsonl)"""
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        elif file_format in ('json', 'jsonl', 'ndjson'):
+            yield from iter_json_records(f)
+        else:
+            raise ValueError(f"Unsupported job export format: {file_format}")
+
+
+def career_from_job(row):
+    """Map a job export row onto the career schema, or None if it cannot be used"""
+    name = ' '.join(str(row.get('title') or row.get('name') or '').split())
+    try:
+        career_id = int(row.get('id'))
+    except (TypeError, ValueError):
+        return None
+    if not name:
+        return None
+    return {
+        'id': career_id,
+        'name': name[:NAME_LENGTH],
+        'description': ' '.join(str(row.get('description') or '').split()),
+        'required_skills': ' '.join(str(row.get('required_skills') or row.get('skills') or '').split()),
+        'industry': ' '.join(str(row.get('category') or row.get('industry') or 'Other').split())[:INDUSTRY_LENGTH]
+    }
+
+
+class IngestStats:
+    """Counts and throughput of one ingestion run"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.skipped = 0
+    
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.start
+        return self.rows / elapsed if elapsed else 0.0
+    
+    def summary(self):
+        return (f"{self.rows} rows read, {self.inserted} careers inserted, {self.updated} updated, "
+                f"{self.duplicates} duplicates and {self.skipped} unusable rows skipped "
+                f"({self.rows_per_second():.0f} rows/s)")
+
+
+def upsert_careers(careers):
+    """Insert or update a chunk of careers with a constant number of round trips; the caller commits
+    
+    Returns the number inserted and updated. New careers get their market
+    trend rows in the same transaction, as in recommendation_store.
+    """
+    ids = [career['id'] for career in careers]
+    existing_ids = set(db.session.scalars(select(Career.id).where(Career.id.in_(ids))))
+    new_careers = [career for career in careers if career['id'] not in existing_ids]
+    changed_careers = [career for career in careers if career['id'] in existing_ids]
+    if new_careers:
+        db.session.execute(insert(Career), new_careers)
+        trend_repository.insert_trends([career['id'] for career in new_careers])
+    if changed_careers:
+        # Bulk UPDATE by primary key, one executemany for the chunk
+        db.session.execute(update(Career), changed_careers)
+    return len(new_careers), len(changed_careers)
+
+
+class DedupIndex:
+    """Careers seen during one ingestion run, in a temporary on-disk SQLite database
+    
+    Holds the target catalog's ids and (name, industry) keys, the ids and
+    keys accepted so far, and the accepted rows that override a catalog
+    career. Python sets and dicts of these would grow with the number of
+    distinct careers; SQLite keeps only its page cache in memory and spills
+    the rest to a temporary file, deleted when the index is closed.
+    """
+    
+    def __init__(self):
+        # An empty name opens a private temporary on-disk database
+        self._db = sqlite3.connect('')
+        self._db.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE catalog_ids (id INTEGER PRIMARY KEY);
+            CREATE TABLE catalog_keys (key BLOB PRIMARY KEY, id INTEGER NOT NULL);
+            CREATE TABLE seen_ids (id INTEGER PRIMARY KEY);
+            CREATE TABLE seen_keys (key BLOB PRIMARY KEY);
+            CREATE TABLE overrides (id INTEGER PRIMARY KEY, career TEXT NOT NULL);
+        """)
+    
+    def add_catalog(self, careers):
+        """Index the ids and keys of the target catalog's careers; the last career wins for a key"""
+        for chunk in _chunks(careers, 10000):
+            self._db.executemany('INSERT OR IGNORE INTO catalog_ids (id) VALUES (?)',
+                                 [(career['id'],) for career in chunk])
+            self._db.executemany('INSERT OR REPLACE INTO catalog_keys (key, id) VALUES (?, ?)',
+                                 [(_career_key(career), career['id']) for career in chunk])
+    
+    def accept(self, career, key):
+        """Record a row's career unless its id or key was seen, or a catalog career has its key under another id"""
+        if (self._exists('SELECT 1 FROM seen_ids WHERE id = ?', career['id']) or
+                self._exists('SELECT 1 FROM seen_keys WHERE key = ?', key)):
+            return False
+        catalog_id = self._db.execute('SELECT id FROM catalog_keys WHERE key = ?', (key,)).fetchone()
+        if catalog_id is not None and catalog_id[0] != career['id']:
+            return False
+        self._db.execute('INSERT INTO seen_ids (id) VALUES (?)', (career['id'],))
+        self._db.execute('INSERT INTO seen_keys (key) VALUES (?)', (key,))
+        return True
+    
+    def in_catalog(self, career_id):
+        return self._exists('SELECT 1 FROM catalog_ids WHERE id = ?', career_id)
+    
+    def set_override(self, career):
+        self._db.execute('INSERT OR REPLACE INTO overrides (id, career) VALUES (?, ?)',
+                         (career['id'], json.dumps(career)))
+    
+    def override(self, career_id):
+        """JSON of the accepted row replacing a catalog career, or None"""
+        row = self._db.execute('SELECT career FROM overrides WHERE id = ?', (career_id,)).fetchone()
+        return row[0] if row else None
+    
+    def _exists(self, query, value):
+        return self._db.execute(query, (value,)).fetchone() is not None
+    
+    def close(self):
+        self._db.close()
+
+
+def ingest_jobs(path, catalog_path, chunk_size=5000, file_format=None, progress=None):
+    """Stream a job export into the careers table and the catalog file
+    
+    Rows are mapped with career_from_job and deduplicated: the first row
+    wins for each id and for each (name, industry) pair. Every chunk of
+    chunk_size careers is upserted and committed on its own. The catalog
+    file is rewritten atomically with its careers updated in place and the
+    new ones appended, which makes running workers reload it.
+    
+    Memory stays constant in the size of both the export and the catalog:
+    both are streamed, deduplication state lives in a DedupIndex on disk,
+    and new careers are spooled to a temporary file. Only one chunk of
+    careers, one record and SQLite's page cache are held at a time.
+    
+    progress, if given, is called with the IngestStats after every chunk.
+    """
+    stats = IngestStats()
+    index = DedupIndex()
+    # New careers are spooled to disk so the catalog can be written with
+    # them last, after the existing (possibly updated) ones
+    catalog_dir = os.path.dirname(os.path.abspath(catalog_path))
+    try:
+        with open(catalog_path, 'r') as f:
+            index.add_catalog(iter_json_records(f))
+        
+        with tempfile.TemporaryFile('w+', dir=catalog_dir) as spool:
+            chunk = []
+            
+            def flush():
+                try:
+                    inserted, updated = upsert_careers(chunk)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                stats.inserted += inserted
+                stats.updated += updated
+                chunk.clear()
+                if progress:
+                    progress(stats)
+            
+            for row in iter_job_rows(path, file_format):
+                stats.rows += 1
+                career = career_from_job(row)
+                if career is None:
+                    stats.skipped += 1
+                    continue
+                if not index.accept(career, _career_key(career)):
+                    stats.duplicates += 1
+                    continue
+                
+                if index.in_catalog(career['id']):
+                    index.set_override(career)
+                else:
+                    spool.write(json.dumps(career) + '\n')
+                chunk.append(career)
+                if len(chunk) >= chunk_size:
+                    flush()
+            if chunk:
+                flush()
+            
+            spool.seek(0)
+            num_careers = _write_catalog(catalog_path, index, spool)
+    finally:
+        index.close()
+    logging.info(f"Ingested {path}: {stats.summary()}; catalog now has {num_careers} careers")
+    return stats
+
+
+def _career_key(career):
+    """Deduplication key of a career's lower-cased (name, industry)
+    
+    A 128-bit BLAKE2b digest: fixed-size on disk, the same in every process
+    (unlike hash()), and collisions between different pairs are negligible.
+    """
+    payload = json.dumps([career['name'].lower(), career['industry'].lower()])
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_catalog(catalog_path, index, spool):
+    """Atomically replace the catalog file with the updated and new careers, streaming the current one"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(catalog_path)), suffix='.json')
+    num_careers = 0
+    try:
+        with os.fdopen(fd, 'w') as f, open(catalog_path, 'r') as catalog:
+            f.write('[\n')
+            for career in iter_json_records(catalog):
+                f.write((',\n' if num_careers else '') + (index.override(career['id']) or json.dumps(career)))
+                num_careers += 1
+            for line in spool:
+                f.write((',\n' if num_careers else '') + line.rstrip('\n'))
+                num_careers += 1
+            f.write('\n]\n')
+        shutil.copymode(catalog_path, temp_path)
+        os.replace(temp_path, catalog_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return num_careers
@@ -0,0 +1,118 @@
+import json
+import logging
+import time
+
+import click
+from sqlalchemy import select
+
+from app import app, db, init_database
+from engine_loader import get_engine
+from market_data import trend_repository
+from models import User
+from recommendation_store import replace_recommendations
+from startup_timing import report, timed
+
+
+@app.cli.command('init-db')
+def init_db():
+    """Create missing tables and seed market trends; run once before serving"""
+    with timed('create tables'):
+        init_database()
+    with timed('seed market trends'):
+        trend_repository.seed_database()
+    click.echo("Database ready")
+
+
+@app.cli.command('startup-report')
+@click.option('--output', default=None, help='Also write the JSON report to this file.')
+def startup_report(output):
+    """Warm up the engine and print import and warm-up timings as JSON"""
+    get_engine()
+    payload = json.dumps(report(), indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(payload + '\n')
+    click.echo(payload)
+
+
+@app.cli.command('rerank-users')
+@click.option('--chunk-size', default=64, show_default=True,
+              help='Users scored together in one batch and written in one transaction.')
+@click.option('--num-recommendations', default=5, show_default=True,
+              help='Recommendations stored per user.')
+def rerank_users(chunk_size, num_recommendations):
+    """Re-rank every user with a complete profile and store the results"""
+    ml_engine = get_engine()
+    
+    start = time.perf_counter()
+    last_id = 0
+    total_users = 0
+    while True:
+        # Keyset pagination keeps each chunk query cheap on large tables
+        users = db.session.scalars(
+            select(User).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).all()
+        if not users:
+            break
+        last_id = users[-1].id
+        
+        eligible = [user for user in users if user.has_recommendation_profile()]
+        if eligible:
+            rankings = ml_engine.get_recommendations_batch(
+                [user.recommendation_profile() for user in eligible], num_recommendations)
+            try:
+                replace_recommendations({user.id: recs for user, recs in zip(eligible, rankings)})
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Error storing recommendations for users up to {last_id}: {str(e)}")
+                raise click.ClickException(str(e))
+            total_users += len(eligible)
+        
+        # Drop the chunk's ORM objects before loading the next one
+        db.session.expunge_all()
+        click.echo(f"Re-ranked {total_users} users (last id {last_id})")
+    
+    elapsed = time.perf_counter() - start
+    click.echo(f"Done: {total_users} users in {elapsed:.1f}s")
+
+
+@app.cli.command('build-artifacts')
+@click.option('--output', default=None,
+              help='Bundle root directory (defaults to ENGINE_ARTIFACTS_DIR, then ./artifacts).')
+def build_engine_artifacts(output):
+    """Fit the recommendation engine and write a versioned artifact bundle"""
+    _build_artifacts(app.config["CAREER_CATALOG_PATH"], output)
+
+
+@app.cli.command('ingest-jobs')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'json', 'jsonl']), default=None,
+              help='Export format (defaults to the file extension).')
+@click.option('--chunk-size', default=5000, show_default=True,
+              help='Careers upserted and committed together.')
+@click.option('--catalog', default=None, help='Catalog file to merge into (defaults to CAREER_CATALOG_PATH).')
+@click.option('--artifacts/--no-artifacts', default=True, show_default=True,
+              help='Rebuild the engine artifact bundle from the merged catalog.')
+@click.option('--output', default=None,
+              help='Bundle root directory (defaults to ENGINE_ARTIFACTS_DIR, then ./artifacts).')
+def ingest_jobs(path, file_format, chunk_size, catalog, artifacts, output):
+    """Stream a job export (CSV, JSON or JSON Lines) into the careers table and catalog"""
+    from catalog_ingest import ingest_jobs as ingest
+    
+    catalog = catalog or app.config["CAREER_CATALOG_PATH"]
+    stats = ingest(path, catalog, chunk_size, file_format, progress=lambda stats: click.echo(stats.summary()))
+    click.echo(f"Done: {stats.summary()}")
+    if artifacts:
+        _build_artifacts(catalog, output)
+
+
+def _build_artifacts(catalog_path, output):
+    from engine_artifacts import build_artifacts
+    from ml_engine import CareerRecommendationEngine
+    
+    start = time.perf_counter()
+    engine = CareerRecommendationEngine(catalog_path=catalog_path, semantic_mode=app.config["ENGINE_SEMANTIC_MODE"],
+                                        lsa_components=app.config["ENGINE_LSA_COMPONENTS"])
+    bundle = build_artifacts(engine, output or app.config["ENGINE_ARTIFACTS_DIR"] or 'artifacts')
+    click.echo(f"Wrote {bundle} ({len(engine.careers_data)} careers) in {time.perf_counter() - start:.1f}s")
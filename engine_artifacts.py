@@ -0,0 +1,280 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import sklearn
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from career_catalog import CareerCatalog, SortedStringTable
+from keyword_matching import KeywordMatchIndex, Postings
+
+# Bump whenever the bundle layout changes; older bundles are then rebuilt
+FORMAT_VERSION = 7
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.publish.lock'
+KEYWORD_MATRICES = {
+    'career_skill_matrix': 'skill_matrix',
+    'career_interest_matrix': 'interest_matrix',
+    'career_keyword_matrix': 'keyword_matrix'
+}
+LSA_ARRAYS = ('lsa_projection', 'lsa_vectors', 'lsa_scales')
+
+
+def catalog_digest(careers_data):
+    """Content hash of a career catalog (a CareerCatalog or a list of dicts), used to name its bundle
+    
+    Hashed career by career, but equal to the hash of the whole catalog as
+    compact JSON with sorted keys."""
+    digest = hashlib.sha256(b'[')
+    for i, career in enumerate(careers_data):
+        payload = json.dumps(dict(career), sort_keys=True, separators=(',', ':'))
+        digest.update(((',' if i else '') + payload).encode('utf-8'))
+    digest.update(b']')
+    return digest.hexdigest()
+
+
+def catalog_file_digest(path):
+    """Hash of a catalog file's raw bytes, or None if there is no such file
+    
+    Recorded in the manifest, so loading checks a bundle against the catalog
+    by reading the file once instead of parsing and hashing every career."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _write_json(path, value):
+    with open(path, 'w') as f:
+        json.dump(value, f)
+
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_csr(directory, name, matrix, matrix_format='csr'):
+    """Save a CSR (or CSC) matrix as three .npy arrays; returns its shape"""
+    matrix = matrix.asformat(matrix_format)
+    np.save(os.path.join(directory, f'{name}.data.npy'), matrix.data)
+    np.save(os.path.join(directory, f'{name}.indices.npy'), matrix.indices)
+    np.save(os.path.join(directory, f'{name}.indptr.npy'), matrix.indptr)
+    return list(matrix.shape)
+
+
+def _load_csr(directory, name, shape, matrix_type=sparse.csr_matrix):
+    """Load a CSR (or CSC) matrix whose arrays stay memory-mapped (read-only, shared between processes)"""
+    arrays = [np.load(os.path.join(directory, f'{name}.{part}.npy'), mmap_mode='r')
+              for part in ('data', 'indices', 'indptr')]
+    return matrix_type(tuple(arrays), shape=tuple(shape), copy=False)
+
+
+def _save_table(directory, name, table):
+    """Save a SortedStringTable (or a dict of string -> 0..n-1) as .npy arrays"""
+    for array_name, array in SortedStringTable.from_mapping(table).arrays().items():
+        np.save(os.path.join(directory, f'{name}.{array_name}.npy'), array)
+
+
+def _load_table(directory, name):
+    """Load a SortedStringTable whose arrays stay memory-mapped, like a catalog's"""
+    return SortedStringTable.from_arrays({
+        array_name: np.load(os.path.join(directory, f'{name}.{array_name}.npy'), mmap_mode='r')
+        for array_name in SortedStringTable.ARRAY_NAMES
+    })
+
+
+def build_artifacts(engine, root):
+    """Write the engine's fitted state to a new versioned bundle under root
+    
+    The bundle is written to a temporary directory and renamed into place,
+    then the CURRENT pointer is swapped atomically, so workers never see a
+    half-written bundle. Returns the bundle directory.
+    """
+    os.makedirs(root, exist_ok=True)
+    digest = catalog_digest(engine.careers_data)
+    name = f'v{FORMAT_VERSION}-{digest[:16]}'
+    bundle = os.path.join(root, name)
+    staging = os.path.join(root, f'.{name}.{os.getpid()}.tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'catalog_digest': digest,
+        # The file the engine was built from (None for the fallback catalog)
+        'catalog_file_digest': engine.catalog_file_digest,
+        'created_at': datetime.utcnow().isoformat(),
+        'sklearn_version': sklearn.__version__,
+        'num_careers': len(engine.careers_data),
+        'semantic_mode': engine.semantic_mode,
+        'matrices': {}
+    }
+    
+    # The catalog's arrays and string tables, mapped by loading engines
+    for array_name, array in engine.careers_data.arrays().items():
+        np.save(os.path.join(staging, f'catalog.{array_name}.npy'), array)
+    
+    # Fitted TF-IDF state: vocabulary as a string table, plus IDF weights
+    _save_table(staging, 'tfidf_vocabulary', engine.vectorizer.vocabulary_)
+    np.save(os.path.join(staging, 'tfidf_idf.npy'), engine.vectorizer.idf_)
+    manifest['matrices']['career_features'] = _save_csr(staging, 'career_features', engine.career_features)
+    if engine.semantic_mode == 'sparse':
+        manifest['matrices']['semantic_index'] = _save_csr(staging, 'semantic_index', engine.semantic_index)
+    else:
+        # Dense LSA projection and career vectors (plus int8 scales), mapped as is
+        manifest['lsa_components'] = engine.lsa_components
+        for array_name in LSA_ARRAYS:
+            if getattr(engine, array_name) is not None:
+                np.save(os.path.join(staging, f'{array_name}.npy'), getattr(engine, array_name))
+    # Raw term counts let a loaded engine apply incremental catalog updates
+    manifest['matrices']['term_counts'] = _save_csr(staging, 'term_counts', engine.term_counts)
+    
+    # Keyword vocabulary (a string table), indicator matrices and match index
+    _save_table(staging, 'keyword_vocabulary', engine.keyword_vocabulary)
+    for attribute, file_name in KEYWORD_MATRICES.items():
+        manifest['matrices'][file_name] = _save_csr(staging, file_name, getattr(engine, attribute))
+    if engine.candidate_postings is not None:
+        # Column-major copies for the candidate stage, so loading engines need not build their own
+        manifest['candidate_postings'] = {
+            posting_name: _save_csr(staging, f'candidates_{posting_name}', matrix, 'csc')
+            for posting_name, matrix in engine.candidate_postings.items()
+        }
+    for posting_name, postings in engine.keyword_index.postings().items():
+        postings = postings.compacted()
+        _save_table(staging, f'{posting_name}.keys', postings.keys)
+        np.save(os.path.join(staging, f'{posting_name}.indptr.npy'), postings.indptr)
+        np.save(os.path.join(staging, f'{posting_name}.ids.npy'), postings.ids)
+    
+    _write_json(os.path.join(staging, 'manifest.json'), manifest)
+    
+    # Publish the bundle, replacing an older build of the same catalog
+    if os.path.isdir(bundle):
+        shutil.rmtree(bundle)
+    os.replace(staging, bundle)
+    pointer = os.path.join(root, f'.{CURRENT_FILE}.{os.getpid()}.tmp')
+    with open(pointer, 'w') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+    
+    logging.info(f"Built engine artifacts {name} for {len(engine.careers_data)} careers")
+    return bundle
+
+
+@contextmanager
+def publish_lock(root):
+    """Exclusive lock, across processes, on publishing bundles under root"""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def prune_bundles(root):
+    """Delete every bundle under root except the current one
+    
+    Processes that already mapped a deleted bundle keep using it: its memory
+    is only released once the last of them lets go of it.
+    """
+    current = os.path.basename(current_bundle(root))
+    for name in os.listdir(root):
+        if name.startswith('v') and name != current and os.path.isdir(os.path.join(root, name)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def current_bundle(root):
+    """Directory of the bundle CURRENT points at"""
+    with open(os.path.join(root, CURRENT_FILE), 'r') as f:
+        return os.path.join(root, f.read().strip())
+
+
+def current_catalog_file_digest(root):
+    """catalog_file_digest recorded by the current bundle under root, or None if there is no readable bundle"""
+    try:
+        return _read_json(os.path.join(current_bundle(root), 'manifest.json')).get('catalog_file_digest')
+    except (OSError, ValueError):
+        return None
+
+
+def load_artifacts(engine, root, expected_file_digest):
+    """Populate an engine from the current bundle under root
+    
+    Raises FileNotFoundError if there is no bundle and ValueError if it was
+    written in an incompatible format, for another semantic mode or for a
+    catalog file other than the one with expected_file_digest (see
+    catalog_file_digest).
+    """
+    start = time.perf_counter()
+    bundle = current_bundle(root)
+    manifest = _read_json(os.path.join(bundle, 'manifest.json'))
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported engine artifact format: {manifest.get('format_version')}")
+    if manifest.get('catalog_file_digest') != expected_file_digest:
+        raise ValueError(f"Engine artifacts {os.path.basename(bundle)} are stale for the current catalog")
+    # Bundles from before the LSA modes existed are sparse ones
+    semantic = (manifest.get('semantic_mode', 'sparse'), manifest.get('lsa_components'))
+    expected_semantic = (engine.semantic_mode, None if engine.semantic_mode == 'sparse' else engine.lsa_components)
+    if semantic != expected_semantic:
+        raise ValueError(f"Engine artifacts {os.path.basename(bundle)} were built for semantic mode {semantic[0]}"
+                         + (f" with {semantic[1]} components" if semantic[1] else ''))
+    if manifest.get('sklearn_version') != sklearn.__version__:
+        logging.warning(f"Engine artifacts were built with scikit-learn {manifest.get('sklearn_version')}, "
+                        f"running {sklearn.__version__}")
+    matrices = manifest['matrices']
+    
+    engine.careers_data = CareerCatalog.from_arrays({
+        array_name: np.load(os.path.join(bundle, f'catalog.{array_name}.npy'), mmap_mode='r')
+        for array_name in CareerCatalog.ARRAY_NAMES
+    })
+    
+    # Rebuild the fitted vectorizer without refitting it; its vocabulary stays mapped
+    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_features=5000)
+    vectorizer.vocabulary_ = _load_table(bundle, 'tfidf_vocabulary')
+    vectorizer.idf_ = np.load(os.path.join(bundle, 'tfidf_idf.npy'))
+    engine.vectorizer = vectorizer
+    engine.career_features = _load_csr(bundle, 'career_features', matrices['career_features'])
+    engine.semantic_index = None
+    if 'semantic_index' in matrices:
+        engine.semantic_index = _load_csr(bundle, 'semantic_index', matrices['semantic_index'])
+    for array_name in LSA_ARRAYS:
+        path = os.path.join(bundle, f'{array_name}.npy')
+        setattr(engine, array_name, np.load(path, mmap_mode='r') if os.path.exists(path) else None)
+    engine.term_counts = _load_csr(bundle, 'term_counts', matrices['term_counts'])
+    
+    engine.keyword_vocabulary = _load_table(bundle, 'keyword_vocabulary')
+    for attribute, file_name in KEYWORD_MATRICES.items():
+        setattr(engine, attribute, _load_csr(bundle, file_name, matrices[file_name]))
+    postings = {
+        posting_name: Postings(
+            _load_table(bundle, f'{posting_name}.keys'),
+            np.load(os.path.join(bundle, f'{posting_name}.indptr.npy'), mmap_mode='r'),
+            np.load(os.path.join(bundle, f'{posting_name}.ids.npy'), mmap_mode='r')
+        )
+        for posting_name in KeywordMatchIndex.POSTING_NAMES
+    }
+    engine.keyword_index = KeywordMatchIndex(engine.keyword_vocabulary, engine.tech_skills, postings)
+    engine.candidate_postings = None
+    if engine.candidate_pool and 'candidate_postings' in manifest:
+        engine.candidate_postings = {
+            posting_name: _load_csr(bundle, f'candidates_{posting_name}', shape, sparse.csc_matrix)
+            for posting_name, shape in manifest['candidate_postings'].items()
+        }
+    
+    logging.info(f"Loaded engine artifacts {os.path.basename(bundle)} in {time.perf_counter() - start:.2f}s")
+    return manifest
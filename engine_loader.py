@@ -0,0 +1,265 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from app import app
+from startup_timing import timed
+
+
+class EngineProvider:
+    """Holds the current recommendation engine and swaps in rebuilt ones
+    
+    Each engine is a snapshot of one catalog version that is never modified
+    after it is built. The first snapshot is built on first use (or by a
+    gunicorn hook, see gunicorn.conf.py). Reloads build the next snapshot in
+    a background thread and publish it with a single reference assignment,
+    so requests that already hold the old engine finish with it.
+    
+    A reload starts when the catalog file (or the artifact bundle's CURRENT
+    pointer) changes, which is checked at most every reload_interval seconds,
+    or when an admin asks for one. When only the catalog file changed, the
+    edits are applied incrementally to a copy of the current engine unless
+    that would push its drift past the engine's DRIFT_THRESHOLD.
+    
+    With ENGINE_SHARED_DIR set, engines are only ever loaded from the shared
+    bundle (see _build_shared), and catalog edits are republished there
+    rather than applied incrementally, which would give each worker private
+    copies of the changed arrays.
+    """
+    
+    def __init__(self, reload_interval=30):
+        self.reload_interval = reload_interval
+        self._engine = None
+        self._lock = threading.Lock()
+        self._reload_thread = None
+        self._last_check = None
+        # mtimes of the watched files when the current snapshot was started
+        self._mtimes = None
+        self.loaded_at = None
+        self.last_error = None
+    
+    def get(self):
+        """Return the current engine, building the first one on first use"""
+        if self._engine is None:
+            with self._lock:
+                # Another thread may have finished the build while we waited
+                if self._engine is None:
+                    self._mtimes = self._watched_mtimes()
+                    with timed('import ml_engine'):
+                        import ml_engine  # noqa: F401
+                    with timed('build engine'):
+                        self._publish(self._build())
+                    logging.info(f"Recommendation engine ready with {len(self._engine.careers_data)} careers "
+                                 f"(catalog version {self._engine.catalog_version})")
+        return self._engine
+    
+    def is_loaded(self):
+        """Whether this process has already built an engine"""
+        return self._engine is not None
+    
+    def watched_paths(self):
+        """Files whose changes make the engine reload"""
+        paths = [app.config["CAREER_CATALOG_PATH"]]
+        if self.artifacts_dir():
+            from engine_artifacts import CURRENT_FILE
+            paths.append(os.path.join(self.artifacts_dir(), CURRENT_FILE))
+        return paths
+    
+    @staticmethod
+    def artifacts_dir():
+        """Directory engines are loaded from: the shared one if set, else ENGINE_ARTIFACTS_DIR"""
+        return app.config["ENGINE_SHARED_DIR"] or app.config["ENGINE_ARTIFACTS_DIR"]
+    
+    def check_for_changes(self):
+        """Start a background reload if a watched file changed; cheap enough to call per request"""
+        if self._engine is None or self.reload_interval <= 0:
+            return False
+        
+        now = time.monotonic()
+        if self._last_check is not None and now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+        
+        mtimes = self._watched_mtimes()
+        if mtimes == self._mtimes:
+            return False
+        # A new artifact bundle is loaded in full; catalog edits alone are
+        # applied incrementally when possible
+        incremental = mtimes[1:] == self._mtimes[1:]
+        return self.reload('catalog files changed', incremental)
+    
+    def reload(self, reason='admin request', incremental=False):
+        """Build a new engine in a background thread; False if one is already being built"""
+        with self._lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            # Recorded up front so the files are not re-checked against a
+            # stale snapshot while this reload is still running
+            self._mtimes = self._watched_mtimes()
+            self._reload_thread = threading.Thread(
+                target=self._reload, args=(reason, incremental), name='engine-reload', daemon=True
+            )
+            self._reload_thread.start()
+        return True
+    
+    def wait_for_reload(self, timeout=None):
+        """Block until the running reload (if any) has finished"""
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def status(self):
+        """Catalog version and reload state of this worker"""
+        engine = self._engine
+        return {
+            'loaded': engine is not None,
+            'catalog_version': engine.catalog_version if engine else None,
+            'num_careers': len(engine.careers_data) if engine else 0,
+            'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+            'reloading': self._reload_thread is not None and self._reload_thread.is_alive(),
+            'last_error': self.last_error,
+            'watched_paths': self.watched_paths(),
+            'shared': bool(app.config["ENGINE_SHARED_DIR"])
+        }
+    
+    def _reload(self, reason, incremental):
+        """Body of the background reload thread"""
+        previous = self._engine
+        start = time.perf_counter()
+        try:
+            engine = None
+            if incremental and previous is not None and not app.config["ENGINE_SHARED_DIR"]:
+                engine = self._updated_copy(previous)
+            if engine is None:
+                engine = self._build()
+        except Exception as e:
+            # Keep serving the previous snapshot if the new catalog cannot be built
+            self.last_error = str(e)
+            logging.error(f"Engine reload ({reason}) failed, keeping catalog version "
+                          f"{previous.catalog_version if previous else None}: {str(e)}")
+            return
+        
+        self._publish(engine)
+        logging.info(f"Engine reloaded ({reason}): catalog version "
+                     f"{previous.catalog_version if previous else None} -> {engine.catalog_version} "
+                     f"with {len(engine.careers_data)} careers in {time.perf_counter() - start:.2f}s")
+    
+    def engine_options(self):
+        """Keyword arguments every engine of this app is built with"""
+        return {
+            'artifacts_dir': self.artifacts_dir(),
+            'catalog_path': app.config["CAREER_CATALOG_PATH"],
+            'candidate_pool': app.config["ENGINE_CANDIDATE_POOL"] or None,
+            'semantic_mode': app.config["ENGINE_SEMANTIC_MODE"],
+            'lsa_components': app.config["ENGINE_LSA_COMPONENTS"]
+        }
+    
+    def _build(self):
+        from ml_engine import CareerRecommendationEngine
+        
+        if app.config["ENGINE_SHARED_DIR"]:
+            engine = self._build_shared(app.config["ENGINE_SHARED_DIR"])
+            # This process mapped the bundle CURRENT now points at (perhaps
+            # publishing it), so that change needs no reload of its own
+            self._mtimes = self._mtimes[:1] + self._watched_mtimes()[1:]
+            return engine
+        return CareerRecommendationEngine(**self.engine_options())
+    
+    def _build_shared(self, directory):
+        """Map the shared bundle for the current catalog, publishing it first if no process has yet
+        
+        Publishing happens under a lock on the directory, so when several
+        workers start (or see a catalog edit) at once, one fits the engine
+        and the others wait for it and map its bundle. Bundles of earlier
+        catalogs are deleted once the new one is published.
+        """
+        from engine_artifacts import build_artifacts, publish_lock, prune_bundles
+        from ml_engine import CareerRecommendationEngine
+        
+        options = self.engine_options()
+        try:
+            return CareerRecommendationEngine(artifacts_only=True, **options)
+        except (OSError, ValueError, KeyError):
+            pass
+        with publish_lock(directory):
+            try:
+                # Published by another worker while we waited for the lock
+                return CareerRecommendationEngine(artifacts_only=True, **options)
+            except (OSError, ValueError, KeyError) as e:
+                logging.info(f"Publishing the engine to {directory} ({str(e)})")
+            build_artifacts(CareerRecommendationEngine(**dict(options, artifacts_dir=None)), directory)
+            prune_bundles(directory)
+            return CareerRecommendationEngine(artifacts_only=True, **options)
+    
+    def _updated_copy(self, previous):
+        """Apply the catalog file's edits to a copy of the engine; None if a full rebuild is due"""
+        from career_catalog import CareerCatalog, iter_json_records
+        from engine_artifacts import catalog_file_digest
+        
+        file_digest = catalog_file_digest(app.config["CAREER_CATALOG_PATH"])
+        # Streamed into the compact catalog, never held as a list of dicts
+        with open(app.config["CAREER_CATALOG_PATH"], 'r') as f:
+            careers = CareerCatalog.from_records(iter_json_records(f))
+        added, updated, removed_ids = catalog_changes(previous.careers_data, careers)
+        num_changes = len(added) + len(updated) + len(removed_ids)
+        # update_catalog would refit the copy itself; a full build may
+        # instead just map a published bundle
+        if previous.needs_rebuild(num_changes):
+            logging.info(f"{num_changes} catalog changes exceed the drift threshold, rebuilding the engine")
+            return None
+        
+        try:
+            engine = previous.update_catalog(added, updated, removed_ids)
+        except (KeyError, ValueError) as e:
+            # e.g. duplicate career ids, which only a full build handles
+            logging.info(f"Catalog changes cannot be applied incrementally, rebuilding the engine: {str(e)}")
+            return None
+        # The incremental catalog must match the file, e.g. not if it reordered careers
+        if engine.careers_data != careers:
+            logging.info("Catalog changes cannot be applied incrementally, rebuilding the engine")
+            return None
+        engine.catalog_file_digest = file_digest
+        logging.info(f"Applied {len(added)} added, {len(updated)} updated and {len(removed_ids)} removed "
+                     f"careers incrementally (drift {engine.catalog_drift():.1%})")
+        return engine
+    
+    def _publish(self, engine):
+        self.loaded_at = datetime.utcnow()
+        self.last_error = None
+        self._engine = engine
+    
+    def _watched_mtimes(self):
+        mtimes = []
+        for path in self.watched_paths():
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+
+def catalog_changes(old_catalog, new_catalog):
+    """Careers added, updated and removed (by id) between two versions of the catalog, both CareerCatalogs
+    
+    Compared on the catalogs' arrays, so only the changed careers are ever
+    materialised as records."""
+    import numpy as np
+    
+    positions = old_catalog.positions(new_catalog.ids)
+    existing = np.flatnonzero(positions >= 0)
+    changed = existing[~old_catalog.equal_rows(positions[existing], new_catalog, existing)]
+    added = [new_catalog[idx] for idx in np.flatnonzero(positions < 0)]
+    updated = [new_catalog[idx] for idx in changed]
+    removed_ids = [int(career_id) for career_id in np.setdiff1d(old_catalog.ids, new_catalog.ids)]
+    return added, updated, removed_ids
+
+
+# Module-level provider shared by every request in this worker
+engine_provider = EngineProvider(reload_interval=app.config["CATALOG_RELOAD_INTERVAL"])
+
+
+def get_engine():
+    """Return the process-wide recommendation engine, building it on first use"""
+    return engine_provider.get()
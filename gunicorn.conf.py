@@ -0,0 +1,36 @@
+import os
+
+# Gunicorn picks this file up automatically from the working directory.
+#
+# ENGINE_WARMUP controls when each process builds the recommendation engine:
+#   post_fork - every worker builds it right after loading the app (default)
+#   preload   - the master loads the app and builds it once before forking,
+#               so workers share the engine's pages copy-on-write
+#   lazy      - the first request that needs it builds it
+# Pages shared copy-on-write stop being shared once a worker reloads the
+# catalog; ENGINE_SHARED_DIR keeps a single memory-mapped copy per host
+# across reloads instead (see EngineProvider._build_shared).
+engine_warmup = os.environ.get("ENGINE_WARMUP", "post_fork")
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+preload_app = engine_warmup == "preload"
+
+
+def when_ready(server):
+    """Build the engine in the master before any worker is forked"""
+    if engine_warmup == "preload":
+        _warm_up()
+
+
+def post_worker_init(worker):
+    """Build the engine in each worker once it has imported the app"""
+    if engine_warmup == "post_fork":
+        _warm_up()
+
+
+def _warm_up():
+    from engine_loader import get_engine
+    from startup_timing import log_report
+
+    get_engine()
+    log_report()
@@ -0,0 +1,197 @@
+import copy
+
+import numpy as np
+
+from career_catalog import SortedStringTable
+
+
+class Postings:
+    """Read-only posting lists: a key table plus CSR-style offset and id arrays
+    
+    The keys are a SortedStringTable numbering them by position. All the
+    arrays can be saved with np.save and loaded memory-mapped, so a persisted
+    index needs no per-posting Python objects. Ids added after the arrays
+    were built (see with_additions) are kept in a small dict overlay.
+    """
+    
+    def __init__(self, keys, indptr, ids):
+        if not isinstance(keys, SortedStringTable):
+            keys = SortedStringTable.from_strings(keys)
+        self.keys = keys
+        # Plain views of memory-mapped arrays: indexing np.memmap goes through Python code
+        self.indptr = np.asarray(indptr)
+        self.ids = np.asarray(ids)
+        self.extra = {}
+    
+    @classmethod
+    def from_lists(cls, postings):
+        """Compact a dict of key -> list of ids"""
+        keys = list(postings)
+        indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(postings[key]) for key in keys], out=indptr[1:])
+        ids = np.fromiter((idx for key in keys for idx in postings[key]), dtype=np.int64, count=indptr[-1])
+        return cls(keys, indptr, ids)
+    
+    def get(self, key):
+        """Ids posted under a key (empty if there are none)"""
+        position = self.keys.get(key)
+        ids = [] if position is None else self.ids[self.indptr[position]:self.indptr[position + 1]].tolist()
+        if self.extra:
+            ids.extend(self.extra.get(key, ()))
+        return ids
+    
+    def get_each(self, keys):
+        """get() of several keys, looked up together"""
+        lists = []
+        for key, position in zip(keys, self.keys.numbers(keys).tolist()):
+            ids = [] if position < 0 else self.ids[self.indptr[position]:self.indptr[position + 1]].tolist()
+            if self.extra:
+                ids.extend(self.extra.get(key, ()))
+            lists.append(ids)
+        return lists
+    
+    def with_additions(self, additions):
+        """Copy of these postings with more ids under some keys; the arrays are shared, not copied"""
+        postings = copy.copy(self)
+        postings.extra = {key: list(ids) for key, ids in self.extra.items()}
+        for key, ids in additions.items():
+            postings.extra.setdefault(key, []).extend(ids)
+        return postings
+    
+    def compacted(self):
+        """Equivalent postings with the overlay folded into the arrays, e.g. for persisting"""
+        if not self.extra:
+            return self
+        return Postings.from_lists({key: self.get(key) for key in dict.fromkeys(list(self.keys) + list(self.extra))})
+
+
+class KeywordMatchIndex:
+    """Inverted index over the career keyword vocabulary
+    
+    Answers CareerRecommendationEngine._keyword_match for every vocabulary
+    keyword in one lookup instead of one call per (user, career) keyword pair.
+    A user keyword matches a vocabulary keyword when:
+    
+    1. they are equal, or one is a substring of the other, or
+    2. both are at least 4 characters long and the first 4 characters of one
+       appear in the other - unless both are tech skills, which only match
+       exactly.
+    """
+    
+    PREFIX_LENGTH = 4
+    POSTING_NAMES = ('trigrams', 'fourgrams', 'prefixes')
+    
+    def __init__(self, vocabulary, tech_skills, postings=None):
+        # vocabulary maps keyword -> index, indices are 0..len(vocabulary)-1
+        if not isinstance(vocabulary, SortedStringTable):
+            vocabulary = SortedStringTable.from_mapping(vocabulary)
+        self.vocabulary = vocabulary
+        self.tech_skills = tech_skills
+        # Vocabulary keywords are lowercase (TextNormalizer.keywords)
+        self.tech_ids = {vocabulary[skill] for skill in tech_skills if skill in vocabulary}
+        lengths = vocabulary.lengths()
+        self.min_length = int(lengths.min()) if len(lengths) else 0
+        
+        # trigrams/fourgrams: n-gram -> ids of keywords containing it
+        # prefixes: first 4 characters -> ids of keywords starting with them
+        if postings is None:
+            postings = self._build_postings(vocabulary)
+        self.trigrams = postings['trigrams']
+        self.fourgrams = postings['fourgrams']
+        self.prefixes = postings['prefixes']
+    
+    @classmethod
+    def _build_postings(cls, vocabulary):
+        """Build the n-gram and prefix posting lists for a vocabulary"""
+        return {name: Postings.from_lists(lists) for name, lists in cls._posting_lists(vocabulary).items()}
+    
+    @classmethod
+    def _posting_lists(cls, vocabulary):
+        """N-gram and prefix posting lists for some keywords, as dicts of key -> ids"""
+        trigrams = {}
+        fourgrams = {}
+        prefixes = {}
+        for keyword, idx in vocabulary.items():
+            for gram in cls._grams(keyword, 3):
+                trigrams.setdefault(gram, []).append(idx)
+            for gram in cls._grams(keyword, cls.PREFIX_LENGTH):
+                fourgrams.setdefault(gram, []).append(idx)
+            if len(keyword) >= cls.PREFIX_LENGTH:
+                prefixes.setdefault(keyword[:cls.PREFIX_LENGTH], []).append(idx)
+        return {'trigrams': trigrams, 'fourgrams': fourgrams, 'prefixes': prefixes}
+    
+    def extended(self, vocabulary, new_keywords):
+        """Index over a vocabulary that adds new_keywords to this index's vocabulary
+        
+        Only the new keywords are indexed; their postings are layered over the
+        existing arrays, which stay shared with this index.
+        """
+        additions = self._posting_lists({keyword: vocabulary[keyword] for keyword in new_keywords})
+        postings = {name: getattr(self, name).with_additions(additions[name]) for name in self.POSTING_NAMES}
+        return KeywordMatchIndex(vocabulary, self.tech_skills, postings)
+    
+    def postings(self):
+        """The posting lists by name, e.g. for persisting the index"""
+        return {name: getattr(self, name) for name in self.POSTING_NAMES}
+    
+    @staticmethod
+    def _grams(text, size):
+        """Distinct character n-grams of a string"""
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+    
+    def matches(self, keyword):
+        """Return the vocabulary indices of every keyword matched by a user keyword"""
+        return self.matches_all([keyword])[0]
+    
+    def matches_all(self, keywords):
+        """matches() of several user keywords, looking up all their substrings and n-grams together"""
+        matched = [set() for _ in keywords]
+        
+        # Vocabulary keywords that are substrings of a user keyword (includes equality)
+        owners = []
+        substrings = []
+        for owner, keyword in enumerate(keywords):
+            for start in range(len(keyword)):
+                for end in range(start + max(self.min_length, 1), len(keyword) + 1):
+                    owners.append(owner)
+                    substrings.append(keyword[start:end])
+        for owner, idx in zip(owners, self.vocabulary.numbers(substrings).tolist()):
+            if idx >= 0:
+                matched[owner].add(idx)
+        
+        # Posting lists of every keyword: its trigram if it has 3 characters;
+        # otherwise its 4-character prefix and all its 4-grams
+        long_keywords = [keyword for keyword in keywords if len(keyword) >= self.PREFIX_LENGTH]
+        grams = [self._grams(keyword, self.PREFIX_LENGTH) for keyword in long_keywords]
+        trigram_ids = iter(self.trigrams.get_each([keyword for keyword in keywords if len(keyword) == 3]))
+        fourgram_ids = iter(self.fourgrams.get_each([keyword[:self.PREFIX_LENGTH] for keyword in long_keywords]))
+        prefix_ids = iter(self.prefixes.get_each([gram for keyword_grams in grams for gram in keyword_grams]))
+        grams = iter(grams)
+        
+        for keyword, keyword_matches in zip(keywords, matched):
+            if len(keyword) < self.PREFIX_LENGTH:
+                # Vocabulary keywords containing the user keyword
+                if len(keyword) == 3:
+                    candidates = next(trigram_ids)
+                else:
+                    candidates = range(len(self.vocabulary))  # Too short for the n-gram index
+                keyword_matches.update(self.vocabulary.containing(keyword, candidates))
+                continue
+            
+            # Every keyword containing the user keyword also contains its 4-character
+            # prefix, so the same posting list serves both rules
+            candidates = next(fourgram_ids)
+            containing = self.vocabulary.containing(keyword, candidates)
+            keyword_matches.update(containing)
+            prefix_matches = set(candidates).difference(containing)
+            
+            # Vocabulary keywords whose 4-character prefix appears in the user keyword
+            for _ in next(grams):
+                prefix_matches.update(next(prefix_ids))
+            
+            # Tech skills only match other tech skills exactly
+            if keyword.lower() in self.tech_skills:
+                prefix_matches -= self.tech_ids
+            
+            keyword_matches |= prefix_matches
+        return [list(keyword_matches) for keyword_matches in matched]
@@ -1,5 +1,12 @@
-from app import app
-import routes  # noqa: F401
+from startup_timing import timed, log_report
+
+with timed('import app'):
+    from app import app, init_database
+with timed('import routes'):
+    import routes  # noqa: F401
+    import commands  # noqa: F401
 
 if __name__ == "__main__":
+    init_database()
+    log_report()
     app.run(host="0.0.0.0", port=5000, debug=True)
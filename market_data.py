@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import insert, select
+
+from app import db
+from models import Career, MarketTrend
+
+
+class MarketTrendRepository:
+    """In-memory index of market trend data keyed by career id
+    
+    The JSON file is parsed once and re-read only when its mtime changes,
+    which is checked at most every reload_interval seconds, so request
+    handlers never open the file themselves.
+    """
+    
+    # Used for every career when the trends file is missing
+    DEFAULT_TREND = {
+        'demand_level': 0.5,  # Medium demand
+        'salary_range_min': 40000,
+        'salary_range_max': 90000
+    }
+    
+    def __init__(self, path='static/data/market_trends.json', reload_interval=30):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._trends = {}
+        self._mtime = None
+        self._file_missing = False
+        self._last_check = None
+        self._lock = threading.Lock()
+    
+    def _refresh(self):
+        """Reload the trends file if it changed since it was last read"""
+        now = time.monotonic()
+        if self._last_check is not None and now - self._last_check < self.reload_interval:
+            return
+        
+        with self._lock:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                if not self._file_missing:
+                    logging.warning("Market trends data file not found")
+                self._file_missing = True
+                self._trends = {}
+                self._mtime = None
+                return
+            
+            if mtime == self._mtime:
+                return
+            
+            try:
+                with open(self.path, 'r') as f:
+                    trends_data = json.load(f)
+            except (OSError, ValueError) as e:
+                # Keep serving the previous index if the new file is unreadable
+                logging.error(f"Error loading market trends: {str(e)}")
+                return
+            
+            self._trends = {trend['career_id']: trend for trend in trends_data if 'career_id' in trend}
+            self._mtime = mtime
+            self._file_missing = False
+            logging.info(f"Loaded {len(self._trends)} market trends from {self.path}")
+    
+    def get(self, career_id):
+        """Return the raw trend data for a career, or None if there is none"""
+        self._refresh()
+        if self._file_missing:
+            return dict(self.DEFAULT_TREND, career_id=career_id)
+        return self._trends.get(career_id)
+    
+    def row_for(self, career_id):
+        """Column values for a MarketTrend row, or None if the career has no trend data"""
+        trend = self.get(career_id)
+        if trend is None:
+            return None
+        return {
+            'career_id': career_id,
+            'demand_level': trend.get('demand_level', 0.5),
+            'salary_range_min': trend.get('salary_range_min', 30000),
+            'salary_range_max': trend.get('salary_range_max', 80000)
+        }
+    
+    def build_trend(self, career_id):
+        """A transient (never persisted) MarketTrend for a career, or None"""
+        row = self.row_for(career_id)
+        return MarketTrend(**row) if row else None
+    
+    def insert_trends(self, career_ids):
+        """Bulk-insert trend rows for the given careers; the caller commits"""
+        rows = [row for row in (self.row_for(career_id) for career_id in career_ids) if row]
+        if rows:
+            db.session.execute(insert(MarketTrend), rows)
+        return len(rows)
+    
+    def seed_database(self):
+        """Insert trend rows for every stored career that does not have one yet"""
+        self._refresh()
+        if self._file_missing:
+            return 0
+        
+        career_ids = set(db.session.scalars(select(Career.id)))
+        seeded_ids = set(db.session.scalars(select(MarketTrend.career_id)))
+        missing_ids = sorted(career_id for career_id in self._trends
+                             if career_id in career_ids and career_id not in seeded_ids)
+        try:
+            count = self.insert_trends(missing_ids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Error seeding market trends: {str(e)}")
+            return 0
+        
+        if count:
+            logging.info(f"Seeded {count} market trends")
+        return count
+
+
+# Shared by the routes and the recommendation store
+trend_repository = MarketTrendRepository()
@@ -0,0 +1,156 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Returned by stage() while disabled, so an instrumented block costs one call
+_NOT_TIMED = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class MetricsRegistry:
+    """Per-process stage timings, counters and request latencies
+    
+    Disabled by default: stage() then hands back a shared no-op context
+    manager and count()/observe() return at once, so instrumented code pays
+    one attribute check per call. When enabled, every observation goes into
+    an in-memory histogram or counter, rendered in the Prometheus text
+    format by render(). Each gunicorn worker keeps its own registry.
+    """
+    
+    def __init__(self, namespace='career'):
+        self.namespace = namespace
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}    # (name, labels) -> value
+        self._help = {}        # name -> (type, help text)
+    
+    def describe(self, name, metric_type, help_text):
+        """Register the TYPE and HELP lines of a metric"""
+        self._help[name] = (metric_type, help_text)
+    
+    def stage(self, name):
+        """Context manager timing one stage of a recommendation request"""
+        return self.timer('engine_stage_seconds', (('stage', name),))
+    
+    def timer(self, name, labels=()):
+        """Context manager adding the duration of the enclosed block to a histogram"""
+        if not self.enabled:
+            return _NOT_TIMED
+        return self._timed(name, labels)
+    
+    def observe(self, name, value, labels=()):
+        """Add an observation to a histogram; labels is a tuple of (name, value) pairs"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = Histogram()
+            histogram.observe(value)
+    
+    def count(self, name, amount=1, labels=()):
+        """Increase a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+    
+    @contextmanager
+    def _timed(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+    
+    def render(self, samples=()):
+        """Every metric in the Prometheus text exposition format
+        
+        samples are extra (name, type, help text, value) metrics read at
+        scrape time, e.g. the recommendation cache statistics."""
+        with self._lock:
+            histograms = {key: (list(histogram.cumulative_counts()), histogram.sum, histogram.buckets)
+                          for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+        
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            self._header(lines, name, 'counter')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{self._name(name)}{_labels(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            self._header(lines, name, 'histogram')
+            for (metric, labels), (cumulative, total, buckets) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(list(buckets) + ['+Inf'], cumulative):
+                    lines.append(f"{self._name(name)}_bucket{_labels(labels + (('le', str(bound)),))} {count}")
+                lines.append(f"{self._name(name)}_sum{_labels(labels)} {total}")
+                lines.append(f"{self._name(name)}_count{_labels(labels)} {cumulative[-1]}")
+        for name, metric_type, help_text, value in samples:
+            lines.append(f"# HELP {self._name(name)} {help_text}")
+            lines.append(f"# TYPE {self._name(name)} {metric_type}")
+            lines.append(f"{self._name(name)} {value}")
+        return '\n'.join(lines) + '\n'
+    
+    def _name(self, name):
+        return f"{self.namespace}_{name}"
+    
+    def _header(self, lines, name, default_type):
+        metric_type, help_text = self._help.get(name, (default_type, name.replace('_', ' ')))
+        lines.append(f"# HELP {self._name(name)} {help_text}")
+        lines.append(f"# TYPE {self._name(name)} {metric_type}")
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+# Module-level registry shared by the engine and the routes of this worker
+metrics_registry = MetricsRegistry()
+metrics_registry.describe('engine_stage_seconds', 'histogram',
+                          'Time spent in each stage of a recommendation request (engine and route)')
+metrics_registry.describe('engine_recommendation_seconds', 'histogram',
+                          'Total time of CareerRecommendationEngine.get_recommendations')
+metrics_registry.describe('engine_careers_scored_total', 'counter', 'Careers fully scored by the engine')
+metrics_registry.describe('engine_signals_reused_total', 'counter',
+                          'Per-field score vectors reused after a profile edit left their field unchanged')
+metrics_registry.describe('engine_keyword_lookups_total', 'counter',
+                          'User keywords matched against the career keyword vocabulary')
+metrics_registry.describe('engine_keyword_matches_total', 'counter',
+                          'Pairs of user keyword and vocabulary keyword that matched')
+metrics_registry.describe('http_request_seconds', 'histogram', 'Latency of each route by method and status')
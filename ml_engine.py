@@ -1,36 +1,64 @@
 import numpy as np
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer, CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import json
+from sklearn.preprocessing import normalize
+import copy
+from array import array
+import itertools
 import os
 import logging
 import re
 from datetime import datetime
+from types import MappingProxyType
+
+from career_catalog import CareerCatalog, SortedStringTable, iter_json_records
+from engine_artifacts import catalog_file_digest, load_artifacts
+from keyword_matching import KeywordMatchIndex
+from metrics import metrics_registry
+from ranking import top_k_order, diversify
+from text_processing import TextNormalizer
 
 # Setup better logging
 logging.basicConfig(level=logging.DEBUG, 
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-# Download NLTK resources if not already present
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
+# Catalog versions are unique across every engine built in this process, so a
+# reloaded engine never reuses the version (and cache keys) of the one it replaces
+_catalog_versions = itertools.count(1)
 
 class CareerRecommendationEngine:
-    def __init__(self):
-        self.careers_data = self._load_careers_data()
-        self.vectorizer = TfidfVectorizer(stop_words='english')
-        self.career_features = None
-        self._preprocess_careers()
+    SCORING_MODES = ('matrix', 'loop')
+    # Exact cosines of the sparse TF-IDF vectors, or approximate ones of dense
+    # LSA vectors stored as float32 or int8 (see _build_semantic_index)
+    SEMANTIC_MODES = ('sparse', 'lsa', 'lsa_int8')
+    # Rows of the int8 LSA matrix converted to float32 per BLAS call
+    LSA_BLOCK_ROWS = 8192
+    # Profile fields with a keyword signal of their own (see score_fields)
+    KEYWORD_FIELDS = ('skills', 'interests', 'education', 'experience')
+    CATALOG_PATH = 'static/data/careers.json'
+    # Share of the catalog that may change through incremental updates before
+    # the fitted TF-IDF vocabulary is considered stale and a full rebuild is due
+    DRIFT_THRESHOLD = 0.1
+    
+    def __init__(self, scoring_mode='matrix', artifacts_dir=None, catalog_path=None, candidate_pool=None,
+                 semantic_mode='sparse', lsa_components=128, artifacts_only=False):
+        if scoring_mode not in self.SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode: {scoring_mode}")
+        if semantic_mode not in self.SEMANTIC_MODES:
+            raise ValueError(f"Unknown semantic mode: {semantic_mode}")
+        self.scoring_mode = scoring_mode
+        self.semantic_mode = semantic_mode
+        # Dimensions of the LSA projection in the 'lsa' semantic modes
+        self.lsa_components = lsa_components
+        self.catalog_path = catalog_path or self.CATALOG_PATH
+        # Careers the candidate stage passes on to full scoring; None (or a
+        # pool at least as large as the catalog) scores every career
+        self.candidate_pool = candidate_pool
         # Load common skills across different domains to improve matching
-        self.tech_skills = [
+        # (a frozenset so the tech-skill rule in _keyword_match is O(1))
+        self.tech_skills = frozenset([
             # Technical/IT Skills
             "python", "java", "javascript", "typescript", "html", "css", "sql", "nosql", "react", 
             "angular", "vue", "node", "express", "django", "flask", "spring", "ruby", "php", "c++", "c#",
@@ -54,14 +82,64 @@ class CareerRecommendationEngine:
             # Creative/Media Skills
             "writing", "editing", "content creation", "journalism", "copywriting", "video editing",
             "animation", "photography", "storytelling", "audio production", "music", "filmmaking"
-        ]
+        ])
+        self.text_normalizer = TextNormalizer()
+        self.vectorizer = TfidfVectorizer(stop_words='english')
+        self.career_features = None
+        self.lsa_projection = None
+        # Set every time the catalog is (re)processed; used in cache keys and logs
+        self.catalog_version = 0
         
+        # Hashed before the catalog is read: should the file change in
+        # between, bundles built from this engine are stale, never wrong
+        self.catalog_file_digest = catalog_file_digest(self.catalog_path)
+        # Prefer a prebuilt artifact bundle (see engine_artifacts.py) over
+        # refitting; with artifacts_only, a missing or stale bundle is an
+        # error. A current bundle brings its own catalog, so the file is
+        # never parsed
+        if artifacts_dir and self._load_artifacts(artifacts_dir, required=artifacts_only):
+            return
+        if artifacts_only:
+            raise ValueError("No engine artifacts directory given")
+        self.careers_data = self._load_careers_data()
+        self._preprocess_careers()
+    
+    @property
+    def careers_data(self):
+        """The catalog as a CareerCatalog; lists of career dicts assigned to it are converted"""
+        return self._careers_data
+    
+    @careers_data.setter
+    def careers_data(self, careers):
+        self._careers_data = CareerCatalog.from_records(careers)
+    
+    def _load_artifacts(self, artifacts_dir, required=False):
+        """Load the fitted engine state from an artifact bundle; False (or the error, if required) if unavailable"""
+        try:
+            # The bundle must have been built from the current catalog file
+            load_artifacts(self, artifacts_dir, self.catalog_file_digest)
+        except (OSError, ValueError, KeyError) as e:
+            if required:
+                raise
+            logging.warning(f"Could not load engine artifacts from {artifacts_dir}, rebuilding: {str(e)}")
+            return False
+        
+        # Keyword sets are only needed by the loop scoring path; built on demand
+        self.career_keywords = None
+        self._reset_drift()
+        self._build_lookup_tables()
+        if self.candidate_postings is None:
+            self._build_candidate_postings()
+        self.catalog_version = next(_catalog_versions)
+        return True
+    
     def _load_careers_data(self):
         """Load career data from JSON file or database"""
         try:
             # Attempt to load from the static data file
-            with open('static/data/careers.json', 'r') as f:
-                return json.load(f)
+            # Streamed into the compact catalog, never held as a list of dicts
+            with open(self.catalog_path, 'r') as f:
+                return CareerCatalog.from_records(iter_json_records(f))
         except FileNotFoundError:
             # Fallback to a minimal dataset if file not found
             logging.warning("Careers data file not found. Using minimal dataset.")
@@ -109,15 +187,329 @@ class CareerRecommendationEngine:
     
     def _preprocess_careers(self):
         """Preprocess career data to create feature vectors"""
-        career_texts = []
-        for career in self.careers_data:
-            # Combine relevant fields for better matching
-            combined_text = f"{career['name']} {career['description']} {career['required_skills']} {career['industry']}"
-            career_texts.append(combined_text.lower())
+        career_texts = [self._career_text(career) for career in self.careers_data]
+        
+        # Create TF-IDF features. Counting and IDF weighting are fitted as two
+        # steps (exactly what TfidfVectorizer.fit_transform does) so the raw
+        # counts can be kept for incremental catalog updates
+        counter = CountVectorizer(stop_words='english', ngram_range=(1, 2), max_features=5000,
+                                  dtype=np.float64)
+        self.term_counts = counter.fit_transform(career_texts)
+        transformer = TfidfTransformer().fit(self.term_counts)
+        self.vectorizer = self._fitted_vectorizer(counter.vocabulary_, transformer.idf_)
+        self.career_features = transformer.transform(self.term_counts)
+        self._reset_drift()
+        
+        self.catalog_version = next(_catalog_versions)
+        
+        # Tokenise every career once so scoring never re-parses the catalog.
+        # Only the loop scoring path keeps the keyword sets; the matrices
+        # are built from them as they are produced
+        career_keywords = (self._build_career_keywords(career) for career in self.careers_data)
+        if self.scoring_mode == 'loop':
+            career_keywords = list(career_keywords)
+        self._build_keyword_matrices(career_keywords)
+        self.career_keywords = career_keywords if self.scoring_mode == 'loop' else None
+        self._build_lookup_tables()
+        self._build_candidate_postings()
+        self._build_semantic_index()
+    
+    @staticmethod
+    def _career_text(career):
+        """Combine relevant fields for better matching"""
+        combined_text = f"{career['name']} {career['description']} {career['required_skills']} {career['industry']}"
+        return combined_text.lower()
+    
+    @staticmethod
+    def _fitted_vectorizer(vocabulary, idf):
+        """A TfidfVectorizer with the given vocabulary and IDF weights, ready to transform
+        
+        The vocabulary is kept as a SortedStringTable, which transform() reads
+        like the dict fitting produces."""
+        vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_features=5000)
+        vectorizer.vocabulary_ = SortedStringTable.from_mapping(vocabulary)
+        vectorizer.idf_ = idf
+        return vectorizer
+    
+    def _reset_drift(self):
+        """Mark the TF-IDF vocabulary as freshly fitted to the current catalog"""
+        # Number of careers containing each term (count rows hold a term at
+        # most once), maintained by incremental updates on their copies
+        self.document_frequencies = np.bincount(self.term_counts.indices, minlength=self.term_counts.shape[1])
+        self.fitted_catalog_size = len(self.careers_data)
+        self.incremental_changes = 0
+    
+    def _build_career_keywords(self, career):
+        """Build the keyword sets used for direct matching against a career"""
+        skills = frozenset(self._extract_keywords(career['required_skills']))
+        description = frozenset(self._extract_keywords(career['description']))
+        industry = frozenset(self._extract_keywords(career['industry']))
+        name = frozenset(self._extract_keywords(career['name']))
+        return {
+            'skills': skills,
+            'description': description,
+            'industry': industry,
+            'name': name,
+            # Interests are matched against description and industry only
+            'description_industry': description | industry,
+            'all': skills | description | industry | name
+        }
+    
+    def _build_lookup_tables(self):
+        """Build immutable industry lookup tables for the current catalog
+        
+        Careers are looked up by id with careers_data.position(), and the ids
+        of the careers with a name with careers_data.ids_named()."""
+        catalog = self.careers_data
+        # Industries in order of first appearance; industry_codes[i] indexes into it
+        # (the catalog's own table may hold industries no career uses any more)
+        present, first_positions = np.unique(catalog.industry_codes, return_index=True)
+        present = present[np.argsort(first_positions)]
+        codes = np.zeros(len(catalog.industries), dtype=np.int32)
+        codes[present] = np.arange(len(present), dtype=np.int32)
+        industry_codes = codes[catalog.industry_codes]
+        
+        self.industry_names = tuple(catalog.industries[code] for code in present)
+        # Positions of each industry's careers in catalog order, from one stable sort
+        members = np.argsort(industry_codes, kind='stable')
+        boundaries = np.cumsum(np.bincount(industry_codes, minlength=len(present)))[:-1]
+        self.industry_index = MappingProxyType({
+            industry: self._readonly(positions)
+            for industry, positions in zip(self.industry_names, np.split(members, boundaries))
+        })
+        self.industry_codes = self._readonly(industry_codes)
+        self.num_industries = len(self.industry_names)
+    
+    @staticmethod
+    def _readonly(array):
+        """Mark a lookup array as immutable"""
+        array.setflags(write=False)
+        return array
+    
+    def _build_keyword_matrices(self, career_keywords):
+        """Encode career keyword sets as sparse indicator matrices over a shared vocabulary
+        
+        career_keywords is consumed in one pass: keywords get provisional ids
+        as they are first seen, renumbered in sorted order at the end."""
+        fields = ('skills', 'description_industry', 'all')
+        provisional = {}
+        indices = {field: array('q') for field in fields}
+        indptr = {field: array('q', [0]) for field in fields}
+        num_careers = 0
+        for keywords in career_keywords:
+            for field in fields:
+                indices[field].extend(provisional.setdefault(keyword, len(provisional))
+                                      for keyword in keywords[field])
+                indptr[field].append(len(indices[field]))
+            num_careers += 1
+        
+        sorted_keywords = sorted(provisional)
+        self.keyword_vocabulary = SortedStringTable.from_strings(sorted_keywords)
+        renumber = np.empty(len(provisional), dtype=np.int64)
+        renumber[[provisional[keyword] for keyword in sorted_keywords]] = np.arange(len(provisional))
+        matrices = {
+            field: sparse.csr_matrix((np.ones(len(indices[field])), renumber[np.asarray(indices[field], dtype=np.int64)],
+                                      np.asarray(indptr[field], dtype=np.int64)),
+                                     shape=(num_careers, len(self.keyword_vocabulary)))
+            for field in fields
+        }
+        self.career_skill_matrix = matrices['skills']
+        self.career_interest_matrix = matrices['description_industry']
+        self.career_keyword_matrix = matrices['all']
+        
+        # Partial matches against the vocabulary are answered by an inverted index
+        self.keyword_index = KeywordMatchIndex(self.keyword_vocabulary, self.tech_skills)
+    
+    def _build_candidate_postings(self):
+        """Term -> career postings (column-major copies of the career matrices) for the candidate stage"""
+        if not self.candidate_pool:
+            self.candidate_postings = None
+            return
+        self.candidate_postings = {
+            'features': self.career_features.tocsc(),
+            'skills': self.career_skill_matrix.tocsc(),
+            'interests': self.career_interest_matrix.tocsc(),
+            'keywords': self.career_keyword_matrix.tocsc()
+        }
+    
+    def _build_semantic_index(self, refit=True):
+        """The careers' side of _score_semantic_batch, for the engine's semantic mode
+        
+        'sparse': the row-normalised career features, transposed to terms x
+        careers. cosine_similarity normalises and transposes the whole career
+        matrix on every call; doing it once per catalog gives exactly the
+        same scores.
+        
+        'lsa' and 'lsa_int8': a TruncatedSVD of the career features gives a
+        terms x components projection (lsa_projection); every career is
+        projected and L2-normalised into a contiguous float32 matrix
+        (lsa_vectors), or quantised to int8 with one scale per career
+        (lsa_scales). Without refit the existing projection is kept, as the
+        TF-IDF vocabulary is for incremental updates.
+        """
+        if self.semantic_mode == 'sparse':
+            self.semantic_index = normalize(self.career_features).T.tocsr()
+            self.lsa_projection = self.lsa_vectors = self.lsa_scales = None
+            return
+        
+        self.semantic_index = None
+        if refit or self.lsa_projection is None:
+            # TruncatedSVD needs fewer components than careers and terms
+            n_components = max(1, min(self.lsa_components, min(self.career_features.shape) - 1))
+            svd = TruncatedSVD(n_components, random_state=0).fit(self.career_features)
+            self.lsa_projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        vectors = normalize(np.asarray(self.career_features @ self.lsa_projection)).astype(np.float32)
+        if self.semantic_mode == 'lsa':
+            self.lsa_vectors = vectors
+            self.lsa_scales = None
+        else:
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            self.lsa_vectors = np.round(vectors / scales[:, np.newaxis]).astype(np.int8)
+            self.lsa_scales = scales.astype(np.float32)
+    
+    def _keyword_rows(self, career_keywords, field):
+        """Indicator rows over the keyword vocabulary for the keyword sets of some careers"""
+        indptr = [0]
+        keywords = []
+        for career in career_keywords:
+            keywords.extend(career[field])
+            indptr.append(len(keywords))
+        indices = self.keyword_vocabulary.numbers(keywords)
+        return sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                                 shape=(len(career_keywords), len(self.keyword_vocabulary)))
+    
+    def copy(self):
+        """Shallow copy, sharing every array and table with this engine
+        
+        Incremental updates replace the copy's arrays and tables instead of
+        modifying them, so this engine is never changed by them.
+        """
+        return copy.copy(self)
+    
+    def add_career(self, career):
+        """A new engine with a career appended to the catalog, without refitting the TF-IDF vocabulary"""
+        return self.update_catalog(added=[career])
+    
+    def update_career(self, career):
+        """A new engine with the career of the same id replaced, keeping its position in the catalog"""
+        return self.update_catalog(updated=[career])
+    
+    def remove_career(self, career_id):
+        """A new engine without a career"""
+        return self.update_catalog(removed_ids=[career_id])
+    
+    def update_catalog(self, added=(), updated=(), removed_ids=()):
+        """A new engine with a batch of career additions, edits and removals applied
+        
+        This engine is left unchanged and keeps serving: the changes are
+        applied to a copy(), which is returned. The fitted TF-IDF vocabulary
+        is kept: term counts of the changed careers are computed against it,
+        document frequencies are adjusted and the IDF weights and feature
+        rows are recomputed from the stored counts. New keywords are appended
+        to the keyword vocabulary and index. Terms outside the fitted
+        vocabulary are ignored until the next refit: once the changes would
+        push catalog_drift() past DRIFT_THRESHOLD (see needs_rebuild), the
+        copy is instead refitted to its whole new catalog, like a new engine.
+        """
+        added, updated, removed_ids = list(added), list(updated), list(removed_ids)
+        engine = self.copy()
+        engine._apply_catalog_changes(added, updated, removed_ids,
+                                      refit=self.needs_rebuild(len(added) + len(updated) + len(removed_ids)))
+        # The copy no longer matches the catalog file it was loaded from
+        engine.catalog_file_digest = None
+        return engine
+    
+    def _apply_catalog_changes(self, added, updated, removed_ids, refit=False):
+        """update_catalog on this engine itself; only for a copy no other thread can see yet"""
+        position = self.careers_data.position
+        for career_id in [career['id'] for career in updated] + removed_ids:
+            if position(career_id) is None:
+                raise KeyError(f"Career {career_id} is not in the catalog")
+        added_ids = [career['id'] for career in added]
+        if len(set(added_ids)) != len(added_ids) or any(position(career_id) is not None for career_id in added_ids):
+            raise ValueError("Added careers must have ids that are new to the catalog")
+        
+        # Changed careers become extra rows after the current ones; rows then
+        # selects the new catalog order from old and extra rows in one pass
+        num_careers = len(self.careers_data)
+        changed = updated + added
+        replaced = {position(career['id']): num_careers + j for j, career in enumerate(updated)}
+        removed = {position(career_id) for career_id in removed_ids}
+        rows = [replaced.get(idx, idx) for idx in range(num_careers) if idx not in removed]
+        rows.extend(range(num_careers + len(updated), num_careers + len(changed)))
+        rows = np.array(rows, dtype=np.int64)
+        if refit:
+            logging.info(f"{len(changed) + len(removed_ids)} catalog changes pass the drift threshold, "
+                         f"refitting the engine")
+            self.careers_data = self.careers_data.select(rows, changed)
+            self._preprocess_careers()
+            return
+        
+        # Keyword side: new keywords get the next free ids; keywords nobody
+        # uses any more keep an empty column until the next full build
+        changed_keywords = [self._build_career_keywords(career) for career in changed]
+        changed_vocabulary = {keyword for keywords in changed_keywords for keyword in keywords['all']}
+        new_keywords = sorted(keyword for keyword in changed_vocabulary if keyword not in self.keyword_vocabulary)
+        if new_keywords:
+            vocabulary = self.keyword_vocabulary.extended(new_keywords)
+            self.keyword_vocabulary = vocabulary
+            self.keyword_index = self.keyword_index.extended(vocabulary, new_keywords)
+        for attribute, field in (('career_skill_matrix', 'skills'),
+                                 ('career_interest_matrix', 'description_industry'),
+                                 ('career_keyword_matrix', 'all')):
+            setattr(self, attribute, self._select_rows(
+                getattr(self, attribute), self._keyword_rows(changed_keywords, field), rows))
+        if self.career_keywords is not None:
+            pool = self.career_keywords + changed_keywords
+            self.career_keywords = [pool[row] for row in rows]
+        
+        # TF-IDF side: counts over the fitted vocabulary, then new IDF weights
+        counter = CountVectorizer(stop_words='english', ngram_range=(1, 2),
+                                  vocabulary=self.vectorizer.vocabulary_, dtype=np.float64)
+        changed_counts = counter.transform([self._career_text(career) for career in changed])
+        document_frequencies = self.document_frequencies.copy()
+        dropped = sorted(removed | replaced.keys())
+        np.subtract.at(document_frequencies, self.term_counts[dropped].indices, 1)
+        np.add.at(document_frequencies, changed_counts.indices, 1)
+        self.document_frequencies = document_frequencies
+        self.term_counts = self._select_rows(self.term_counts, changed_counts, rows)
+        self._reweight_features()
         
-        # Create TF-IDF features
-        self.vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_features=5000)
-        self.career_features = self.vectorizer.fit_transform(career_texts)
+        self.careers_data = self.careers_data.select(rows, changed)
+        self._build_lookup_tables()
+        self._build_candidate_postings()
+        self._build_semantic_index(refit=False)
+        self.incremental_changes += len(changed) + len(removed_ids)
+        self.catalog_version = next(_catalog_versions)
+    
+    def catalog_drift(self, pending_changes=0):
+        """Share of the catalog changed incrementally since the TF-IDF vocabulary was fitted"""
+        return (self.incremental_changes + pending_changes) / max(self.fitted_catalog_size, 1)
+    
+    def needs_rebuild(self, pending_changes=0):
+        """Whether drift would pass DRIFT_THRESHOLD, so update_catalog refits rather than updates"""
+        return self.catalog_drift(pending_changes) > self.DRIFT_THRESHOLD
+    
+    def _reweight_features(self):
+        """Recompute IDF weights and L2-normalised feature rows from the stored counts"""
+        # Smoothed IDF, as computed by TfidfTransformer
+        num_documents = self.term_counts.shape[0] + 1
+        idf = np.log(num_documents / (self.document_frequencies + 1.0)) + 1
+        features = self.term_counts.copy()
+        features.data *= idf[features.indices]
+        self.career_features = normalize(features, copy=False)
+        self.vectorizer = self._fitted_vectorizer(self.vectorizer.vocabulary_, idf)
+    
+    @staticmethod
+    def _select_rows(matrix, extra_rows, rows):
+        """Rows of matrix stacked on extra_rows, picked (and ordered) by rows"""
+        num_columns = extra_rows.shape[1]
+        if matrix.shape[1] < num_columns:
+            # New vocabulary columns are empty for the existing rows
+            matrix = sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr),
+                                       shape=(matrix.shape[0], num_columns))
+        return sparse.vstack([matrix, extra_rows], format='csr')[rows]
     
     def _preprocess_user_profile(self, user_profile):
         """Preprocess user profile for recommendation"""
@@ -131,8 +523,16 @@ class CareerRecommendationEngine:
         weighted_text = f"{skills} {skills} {skills} {interests} {interests} {education} {experience}"
         return weighted_text.lower()
     
-    def get_recommendations(self, user_profile, num_recommendations=5):
-        """Generate career recommendations based on user profile using a sophisticated matching algorithm"""
+    def get_recommendations(self, user_profile, num_recommendations=5, min_industries=3, diversity_window=10):
+        """Generate career recommendations based on user profile using a sophisticated matching algorithm
+        
+        The top results are re-ranked to cover at least min_industries
+        industries, drawing replacements from the next diversity_window careers.
+        With metrics enabled, each stage is timed (see metrics.py)."""
+        with metrics_registry.timer('engine_recommendation_seconds'):
+            return self._get_recommendations(user_profile, num_recommendations, min_industries, diversity_window)
+    
+    def _get_recommendations(self, user_profile, num_recommendations, min_industries, diversity_window):
         # Check if user profile has sufficient data
         if not user_profile.get('skills') and not user_profile.get('interests'):
             logging.warning("User profile lacks sufficient data for accurate recommendations")
@@ -140,40 +540,336 @@ class CareerRecommendationEngine:
             return self._get_diverse_recommendations(num_recommendations)
         
         # Extract user skills and interests as separate lists for direct matching
-        user_skills = self._extract_keywords(user_profile.get('skills', ''))
-        user_interests = self._extract_keywords(user_profile.get('interests', ''))
-        user_education = self._extract_keywords(user_profile.get('education', ''))
-        user_experience = self._extract_keywords(user_profile.get('experience', ''))
+        with metrics_registry.stage('keyword_extraction'):
+            user_keywords = self._extract_user_keywords(user_profile)
         
-        logging.debug(f"User skills: {user_skills}")
-        logging.debug(f"User interests: {user_interests}")
+        logging.debug(f"User skills: {user_keywords['skills']}")
+        logging.debug(f"User interests: {user_keywords['interests']}")
+        
+        pool_size = self._candidate_pool_size(num_recommendations, diversity_window)
+        if pool_size is not None:
+            # Two stages: retrieve candidates from the postings, then score only those
+            combined_scores = self._score_candidates(user_profile, user_keywords, pool_size)
+        else:
+            combined_scores = self._score_exhaustive(user_profile, user_keywords)
+        
+        logging.debug(f"Combined scores range: {combined_scores.min():.4f} to {combined_scores.max():.4f}")
+        
+        with metrics_registry.stage('diversity_rerank'):
+            return self._select_recommendations(combined_scores, num_recommendations, min_industries,
+                                                diversity_window)
+    
+    def _score_exhaustive(self, user_profile, user_keywords):
+        """Combined score of every career for a profile"""
+        metrics_registry.count('engine_careers_scored_total', len(self.careers_data))
+        # 1-4. Keyword match scores for skills, interests, education and experience
+        with metrics_registry.stage('keyword_matching'):
+            if self.scoring_mode == 'matrix':
+                match_scores = self._score_keywords_matrix(user_keywords)
+            else:
+                match_scores = self._score_keywords_loop(user_keywords)
+        
+        # 5. Calculate semantic similarity using TF-IDF vectorization
+        semantic_match_scores = self._score_semantic(user_profile)
+        
+        # 6. Combine all scores with appropriate weights
+        with metrics_registry.stage('combine_scores'):
+            return self._combine_scores(match_scores, semantic_match_scores)
+    
+    def score_careers(self, user_profile):
+        """Combined score of every career for a profile, for paging with recommendation_page
+        
+        Always exhaustive: pages deep in the ranking would fall outside any
+        candidate pool."""
+        with metrics_registry.stage('keyword_extraction'):
+            user_keywords = self._extract_user_keywords(user_profile)
+        return self._score_exhaustive(user_profile, user_keywords)
+    
+    def score_fields(self, user_profile, previous=None):
+        """Unweighted score of every career on each of the five signals, for combine_field_scores
+        
+        Each keyword signal depends on one profile field only, so a signal
+        whose field is unchanged since previous (this method's result for an
+        earlier version of the same profile) is reused instead of recomputed.
+        The semantic signal is a single TF-IDF vector of all fields and is
+        recomputed whenever any of them changed. Results from another catalog
+        version are ignored. Always exhaustive, like score_careers."""
+        if previous is not None and previous['catalog_version'] != self.catalog_version:
+            previous = None
+        profile = {field: user_profile.get(field, '') for field in self.KEYWORD_FIELDS}
+        semantic_text = self._preprocess_user_profile(user_profile)
+        
+        scores = {}
+        changed = []
+        for field in self.KEYWORD_FIELDS:
+            if previous is not None and previous['profile'][field] == profile[field]:
+                scores[field] = previous['scores'][field]
+            else:
+                changed.append(field)
+        if previous is not None and previous['semantic_text'] == semantic_text:
+            scores['semantic'] = previous['scores']['semantic']
+        metrics_registry.count('engine_signals_reused_total', len(scores))
+        
+        if changed or 'semantic' not in scores:
+            metrics_registry.count('engine_careers_scored_total', len(self.careers_data))
+        if changed:
+            with metrics_registry.stage('keyword_extraction'):
+                user_keywords = {field: self._extract_keywords(profile[field]) for field in changed}
+            with metrics_registry.stage('keyword_matching'):
+                match_scores = self._score_keywords_batch([user_keywords], fields=changed)
+            scores.update((field, field_scores[0]) for field, field_scores in match_scores.items())
+        if 'semantic' not in scores:
+            scores['semantic'] = self._score_semantic(user_profile)
+        
+        return {'catalog_version': self.catalog_version, 'profile': profile, 'semantic_text': semantic_text,
+                'scores': scores}
+    
+    def combine_field_scores(self, field_scores):
+        """Combined score of every career from score_fields, equal to score_careers for the same profile"""
+        with metrics_registry.stage('combine_scores'):
+            return self._combine_scores(field_scores['scores'], field_scores['scores']['semantic'])
+    
+    def rescore_recommendations(self, user_profile, previous=None, num_recommendations=5, min_industries=3,
+                                diversity_window=10):
+        """get_recommendations for a profile that may have changed only in part since it was last ranked
+        
+        previous is the field scores returned for the earlier version of the
+        profile (see score_fields); only the signals of changed fields are
+        recomputed. Returns the recommendations, identical to an exhaustive
+        get_recommendations, and the field scores to pass next time. With a
+        candidate pool in use there are no full vectors to keep, so this is
+        plain get_recommendations and the field scores are None."""
+        with metrics_registry.timer('engine_recommendation_seconds'):
+            if ((not user_profile.get('skills') and not user_profile.get('interests')) or
+                    self._candidate_pool_size(num_recommendations, diversity_window) is not None):
+                return self._get_recommendations(user_profile, num_recommendations, min_industries,
+                                                 diversity_window), None
+            
+            field_scores = self.score_fields(user_profile, previous)
+            combined_scores = self.combine_field_scores(field_scores)
+            with metrics_registry.stage('diversity_rerank'):
+                return self._select_recommendations(combined_scores, num_recommendations, min_industries,
+                                                    diversity_window), field_scores
+    
+    def recommendation_page(self, user_profile, combined_scores, offset=0, limit=10, industry=None):
+        """Recommendations at ranks offset..offset+limit of a score vector from score_careers
+        
+        Returns the page and the number of careers ranked. With an industry,
+        only its careers are ranked. Careers are in plain score order (ties
+        as in top_k_order) without the industry diversity re-ranking of
+        get_recommendations, so consecutive pages never overlap. Each result
+        has its rank and the unweighted score of every signal."""
+        if industry is None:
+            positions = None
+            scores = combined_scores
+        else:
+            positions = self.industry_index.get(industry)
+            if positions is None:
+                return [], 0
+            scores = combined_scores[positions]
+        
+        rows = top_k_order(scores, offset + limit)[offset:]
+        if positions is not None:
+            rows = positions[rows]
+        if len(rows) == 0:
+            return [], len(scores)
+        
+        # Signals are recomputed for the page's careers only
+        match_scores = self._score_keywords_batch([self._extract_user_keywords(user_profile)], rows)
+        semantic_scores = self._score_semantic_batch([user_profile], rows)[0]
+        page = []
+        for i, idx in enumerate(rows):
+            recommendation = self._build_recommendation(self.careers_data[idx], combined_scores[idx])
+            recommendation['rank'] = offset + i + 1
+            recommendation['signals'] = {
+                'skills': float(match_scores['skills'][0, i]),
+                'interests': float(match_scores['interests'][0, i]),
+                'semantic': float(semantic_scores[i]),
+                'education': float(match_scores['education'][0, i]),
+                'experience': float(match_scores['experience'][0, i])
+            }
+            page.append(recommendation)
+        return page, len(scores)
+    
+    def get_recommendations_batch(self, user_profiles, num_recommendations=5, min_industries=3, diversity_window=10):
+        """Generate recommendations for many profiles at once
+        
+        All profiles go through the TF-IDF vectorizer in one call and share
+        the keyword match matrices, so the per-user cost is mostly the final
+        top-k selection. Returns one list per profile, identical to calling
+        get_recommendations on each of them (in the LSA semantic modes, up to
+        float32 rounding of the semantic scores). Every career is scored: the
+        candidate stage is not used here."""
+        results = [None] * len(user_profiles)
+        scored = []
+        for position, user_profile in enumerate(user_profiles):
+            if not user_profile.get('skills') and not user_profile.get('interests'):
+                # Same diverse fallback as the single-profile path
+                results[position] = self._get_diverse_recommendations(num_recommendations)
+            else:
+                scored.append(position)
+        
+        if scored:
+            profiles = [user_profiles[position] for position in scored]
+            keywords_list = [self._extract_user_keywords(user_profile) for user_profile in profiles]
+            if self.scoring_mode == 'matrix':
+                match_scores = self._score_keywords_batch(keywords_list)
+            else:
+                loop_scores = [self._score_keywords_loop(keywords) for keywords in keywords_list]
+                match_scores = {field: np.vstack([scores[field] for scores in loop_scores])
+                                for field in loop_scores[0]}
+            combined_scores = self._combine_scores(match_scores, self._score_semantic_batch(profiles))
+            
+            for row, position in enumerate(scored):
+                results[position] = self._select_recommendations(
+                    combined_scores[row], num_recommendations, min_industries, diversity_window)
+        
+        return results
+    
+    def _select_recommendations(self, combined_scores, num_recommendations, min_industries, diversity_window):
+        """Pick the final, industry-diverse and de-duplicated recommendations from a score vector"""
+        # Ensure diversity by getting recommendations from different industries if possible
+        # (if we have enough high scoring careers). Only the best few candidates
+        # are ever ordered, never the whole catalog.
+        ranked = top_k_order(combined_scores, max(num_recommendations + diversity_window, num_recommendations * 3))
+        top_indices = diversify(ranked, combined_scores, self.industry_codes, self.num_industries,
+                                num_recommendations, min_industries, diversity_window)
+        
+        # Create recommendation results, ensuring no duplicates. Names are
+        # compared by their interned codes; only the chosen careers are materialised
+        recommendations = []
+        name_codes = self.careers_data.name_codes
+        seen_names = set()  # Track career names to prevent duplicates
+        
+        # First pass: Add top scoring unique careers
+        for idx in top_indices:
+            if name_codes[idx] not in seen_names:
+                recommendations.append(self._build_recommendation(self.careers_data[idx], combined_scores[idx]))
+                seen_names.add(name_codes[idx])
+        
+        # Second pass: If we don't have enough recommendations due to duplicates,
+        # find additional careers from other high-scoring options
+        if len(recommendations) < num_recommendations:
+            for idx in ranked[:num_recommendations * 3]:
+                if len(recommendations) >= num_recommendations:
+                    break
+                
+                if name_codes[idx] not in seen_names:
+                    recommendations.append(self._build_recommendation(self.careers_data[idx], combined_scores[idx]))
+                    seen_names.add(name_codes[idx])
+        
+        return recommendations
+    
+    def _candidate_pool_size(self, num_recommendations, diversity_window):
+        """Number of candidates to score fully, or None to score the whole catalog"""
+        if not self.candidate_pool or self.scoring_mode != 'matrix':
+            return None
+        # Selection looks at this many careers, so they must all be scored
+        pool_size = max(self.candidate_pool, num_recommendations + diversity_window, num_recommendations * 3)
+        if pool_size >= len(self.careers_data):
+            return None
+        return pool_size
+    
+    def _score_candidates(self, user_profile, user_keywords, pool_size):
+        """Combined scores of the pool_size careers with the highest score bounds
+        
+        Stage one bounds every career's score from the postings of the user's
+        terms and matched keywords; stage two runs the full scoring on the
+        best candidates only. Other careers get -inf, so they are never
+        selected."""
+        with metrics_registry.stage('candidate_retrieval'):
+            bounds = self._score_bounds(user_profile, user_keywords)
+            # Same tie-breaking as the final selection, so ties resolve as in exhaustive scoring
+            candidates = np.sort(top_k_order(bounds, pool_size))
+        metrics_registry.count('engine_careers_scored_total', len(candidates))
+        
+        with metrics_registry.stage('keyword_matching'):
+            match_scores = self._score_keywords_batch([user_keywords], candidates)
+        semantic_scores = self._score_semantic_batch([user_profile], candidates)
+        with metrics_registry.stage('combine_scores'):
+            combined_scores = np.full(len(self.careers_data), -np.inf)
+            combined_scores[candidates] = self._combine_scores(match_scores, semantic_scores)[0]
+        return combined_scores
+    
+    def _score_bounds(self, user_profile, user_keywords):
+        """Cheap upper bound of every career's combined score, from the candidate postings
+        
+        A user keyword adds at most weight / field size to a field score for
+        a career it matches (skills: 1.5 for an exact match times the 1.2
+        coverage bonus), so summing the postings of the matched vocabulary
+        columns, once per matching user keyword, can only overcount. The
+        semantic term is the exact cosine, as both sides are unit length (in
+        the LSA semantic modes it only approximates the scored one)."""
+        postings = self.candidate_postings
+        user_features = self._tfidf_features([self._preprocess_user_profile(user_profile)])
+        bounds = postings['features'][:, user_features.indices] @ user_features.data * 0.15
+        
+        for field, postings_name, weight in (('skills', 'skills', 0.45 * 1.5 * 1.2),
+                                             ('interests', 'interests', 0.25),
+                                             ('education', 'keywords', 0.1 * 0.8),
+                                             ('experience', 'keywords', 0.05 * 0.8)):
+            keywords = user_keywords[field]
+            if not keywords:
+                continue
+            # How many of the user's keywords match each vocabulary keyword
+            multiplicity = np.asarray(self._keyword_match_matrix(keywords).sum(axis=0)).ravel()
+            columns = np.flatnonzero(multiplicity)
+            bounds += postings[postings_name][:, columns] @ multiplicity[columns] * (weight / len(keywords))
+        return bounds
+    
+    def _build_recommendation(self, career, score):
+        """Build the recommendation record returned for a career"""
+        return {
+            'career_id': career['id'],
+            'name': career['name'],
+            'description': career['description'],
+            'required_skills': career['required_skills'],
+            'industry': career['industry'],
+            'score': float(score),  # Convert numpy float to Python float
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _extract_user_keywords(self, user_profile):
+        """Extract the keyword lists used for direct matching from each profile field"""
+        return {
+            'skills': self._extract_keywords(user_profile.get('skills', '')),
+            'interests': self._extract_keywords(user_profile.get('interests', '')),
+            'education': self._extract_keywords(user_profile.get('education', '')),
+            'experience': self._extract_keywords(user_profile.get('experience', ''))
+        }
+    
+    def _score_keywords_loop(self, user_keywords):
+        """Score every career against the user keywords one career at a time
+        
+        This is the reference implementation the matrix path must agree with."""
+        user_skills = user_keywords['skills']
+        user_interests = user_keywords['interests']
+        user_education = user_keywords['education']
+        user_experience = user_keywords['experience']
         
         # Initialize scores for each matching method
         skill_match_scores = []
         interest_match_scores = []
         education_match_scores = []
         experience_match_scores = []
-        semantic_match_scores = []
+        
+        # Artifact-loaded engines build the per-career keyword sets lazily
+        if self.career_keywords is None:
+            self.career_keywords = [self._build_career_keywords(career) for career in self.careers_data]
         
         # Calculate detailed match scores for each career
-        for idx, career in enumerate(self.careers_data):
-            # Extract career keywords
-            career_skills = self._extract_keywords(career['required_skills'])
-            career_desc = self._extract_keywords(career['description'])
-            career_industry = self._extract_keywords(career['industry'])
-            career_name_keywords = self._extract_keywords(career['name'])
-            
-            # Combined career keywords for better matching
-            all_career_keywords = career_skills + career_desc + career_industry + career_name_keywords
+        for keywords in self.career_keywords:
+            # Career keywords are precomputed in _preprocess_careers
+            career_skills = keywords['skills']
             
             # 1. Skill matching with detailed scoring
             skill_score = 0
             if user_skills:
                 # Count exact matches (higher weight)
-                exact_matches = sum(1 for skill in user_skills if any(skill.lower() == cs.lower() for cs in career_skills))
+                exact_matches = sum(1 for skill in user_skills if skill in career_skills)
                 # Count partial matches (lower weight)
-                partial_matches = sum(1 for skill in user_skills if any(self._keyword_match(skill, cs) for cs in career_skills) and 
-                                     not any(skill.lower() == cs.lower() for cs in career_skills))
+                partial_matches = sum(1 for skill in user_skills if skill not in career_skills and
+                                      any(self._keyword_match(skill, cs) for cs in career_skills))
                 
                 # Calculate weighted score (exact matches count more)
                 skill_score = (exact_matches * 1.5 + partial_matches * 0.5) / max(len(user_skills), 1)
@@ -185,19 +881,19 @@ class CareerRecommendationEngine:
             # 2. Interest matching (check against description and industry)
             interest_score = 0
             if user_interests:
-                interest_matches = sum(1 for interest in user_interests if any(self._keyword_match(interest, kw) for kw in career_desc + career_industry))
+                interest_matches = sum(1 for interest in user_interests if any(self._keyword_match(interest, kw) for kw in keywords['description_industry']))
                 interest_score = interest_matches / max(len(user_interests), 1)
             
             # 3. Education matching
             education_score = 0
             if user_education:
-                edu_matches = sum(1 for edu in user_education if any(self._keyword_match(edu, kw) for kw in all_career_keywords))
+                edu_matches = sum(1 for edu in user_education if any(self._keyword_match(edu, kw) for kw in keywords['all']))
                 education_score = edu_matches / max(len(user_education), 1) * 0.8  # Slightly less weight
             
             # 4. Experience matching
             experience_score = 0
             if user_experience:
-                exp_matches = sum(1 for exp in user_experience if any(self._keyword_match(exp, kw) for kw in all_career_keywords))
+                exp_matches = sum(1 for exp in user_experience if any(self._keyword_match(exp, kw) for kw in keywords['all']))
                 experience_score = exp_matches / max(len(user_experience), 1) * 0.8
             
             # Store individual scores
@@ -206,133 +902,192 @@ class CareerRecommendationEngine:
             education_match_scores.append(education_score)
             experience_match_scores.append(experience_score)
         
-        # 5. Calculate semantic similarity using TF-IDF vectorization
-        user_text = self._preprocess_user_profile(user_profile)
-        try:
-            user_features = self.vectorizer.transform([user_text])
-            semantic_similarities = cosine_similarity(user_features, self.career_features).flatten()
-            semantic_match_scores = list(semantic_similarities)
-        except Exception as e:
-            logging.error(f"Error calculating semantic similarity: {str(e)}")
-            semantic_match_scores = [0.3] * len(self.careers_data)  # Fallback
+        return {
+            'skills': np.array(skill_match_scores, dtype=float),
+            'interests': np.array(interest_match_scores, dtype=float),
+            'education': np.array(education_match_scores, dtype=float),
+            'experience': np.array(experience_match_scores, dtype=float)
+        }
+    
+    def _score_keywords_matrix(self, user_keywords):
+        """Score every career against the user keywords with sparse matrix products
         
-        # 6. Combine all scores with appropriate weights
-        combined_scores = []
-        for i in range(len(self.careers_data)):
-            # Weighted average of all scores - skills have highest weight
-            score = (
-                skill_match_scores[i] * 0.45 +          # Skills (highest weight)
-                interest_match_scores[i] * 0.25 +        # Interests
-                semantic_match_scores[i] * 0.15 +        # Semantic analysis
-                education_match_scores[i] * 0.1 +        # Education
-                experience_match_scores[i] * 0.05        # Experience
-            )
-            combined_scores.append(score)
-        
-        logging.debug(f"Combined scores range: {min(combined_scores):.4f} to {max(combined_scores):.4f}")
+        Produces exactly the same scores as _score_keywords_loop."""
+        batch_scores = self._score_keywords_batch([user_keywords])
+        return {field: scores[0] for field, scores in batch_scores.items()}
+    
+    def _score_keywords_batch(self, keywords_list, rows=None, fields=KEYWORD_FIELDS):
+        """Score every career (or the careers at rows) against the keywords of several users at once
         
-        # Ensure diversity by getting recommendations from different industries if possible
-        # (if we have enough high scoring careers)
-        top_indices = []
-        all_indices = np.array(combined_scores).argsort()[::-1]  # All indices, sorted by score
-        
-        # First, add the highest scoring careers up to num_recommendations
-        top_indices = list(all_indices[:num_recommendations])
-        
-        # Ensure we have careers from at least 3 different industries if possible
-        seen_industries = set(self.careers_data[idx]['industry'] for idx in top_indices)
-        if len(seen_industries) < min(3, len(set(career['industry'] for career in self.careers_data))):
-            # Try to add more diverse industries by replacing lower scored careers
-            for idx in all_indices[num_recommendations:num_recommendations+10]:  # Look at next 10 careers
-                industry = self.careers_data[idx]['industry']
-                if industry not in seen_industries:
-                    # Replace the lowest scored career in our recommendations
-                    lowest_score_idx = min(top_indices, key=lambda i: combined_scores[i])
-                    lowest_score_industry = self.careers_data[lowest_score_idx]['industry']
-                    
-                    # Only replace if we have more than one career from this industry
-                    if list(self.careers_data[i]['industry'] for i in top_indices).count(lowest_score_industry) > 1:
-                        top_indices.remove(lowest_score_idx)
-                        top_indices.append(idx)
-                        seen_industries.add(industry)
-                
-                # Stop if we've reached desired industry diversity
-                if len(seen_industries) >= 3:
-                    break
+        Returns users x careers arrays for each of fields, which the keyword
+        dicts need only have. Users with an empty field get zero scores for
+        it, exactly as in the single-profile path."""
+        def career_matrix(matrix):
+            return matrix if rows is None else matrix[rows]
         
-        # Sort final recommendations by score
-        top_indices.sort(key=lambda idx: combined_scores[idx], reverse=True)
+        def field_sizes(field):
+            return np.array([len(keywords[field]) for keywords in keywords_list], dtype=float)[:, np.newaxis]
         
-        # Create recommendation results, ensuring no duplicates
-        recommendations = []
-        seen_names = set()  # Track career names to prevent duplicates
+        scores = {}
+        # 1. Skill matching: exact matches from the indicator product, partial
+        # matches are skills matching some career skill without being exact
+        if 'skills' in fields:
+            skill_matrix = career_matrix(self.career_skill_matrix)
+            user_skills = [keywords['skills'] for keywords in keywords_list]
+            num_skills = field_sizes('skills')
+            exact_matches = (skill_matrix @ self._keyword_indicator_matrix(user_skills).T).T.toarray()
+            any_matches = self._count_matched_keywords(skill_matrix, user_skills)
+            partial_matches = any_matches - exact_matches
+            skill_scores = (exact_matches * 1.5 + partial_matches * 0.5) / np.maximum(num_skills, 1)
+            # Bonus for high skill coverage
+            scores['skills'] = np.where((num_skills > 2) & (exact_matches >= num_skills * 0.5),
+                                        skill_scores * 1.2, skill_scores)
         
-        # First pass: Add top scoring unique careers
-        for idx in top_indices:
-            career = self.careers_data[idx]
-            if career['name'] not in seen_names:
-                recommendations.append({
-                    'career_id': career['id'],
-                    'name': career['name'],
-                    'description': career['description'],
-                    'required_skills': career['required_skills'],
-                    'industry': career['industry'],
-                    'score': float(combined_scores[idx]),  # Convert numpy float to Python float
-                    'timestamp': datetime.now().isoformat()
-                })
-                seen_names.add(career['name'])
+        # 2. Interest matching (check against description and industry)
+        if 'interests' in fields:
+            interest_matches = self._count_matched_keywords(
+                career_matrix(self.career_interest_matrix), [keywords['interests'] for keywords in keywords_list])
+            scores['interests'] = interest_matches / np.maximum(field_sizes('interests'), 1)
         
-        # Second pass: If we don't have enough recommendations due to duplicates,
-        # find additional careers from other high-scoring options
-        if len(recommendations) < num_recommendations:
-            # Get more indices beyond what we originally selected
-            extended_indices = np.array(combined_scores).argsort()[-(num_recommendations*3):][::-1]
-            
-            # Fill in with additional recommendations
-            for idx in extended_indices:
-                if len(recommendations) >= num_recommendations:
-                    break
-                    
-                career = self.careers_data[idx]
-                if career['name'] not in seen_names:
-                    recommendations.append({
-                        'career_id': career['id'],
-                        'name': career['name'],
-                        'description': career['description'],
-                        'required_skills': career['required_skills'],
-                        'industry': career['industry'],
-                        'score': float(combined_scores[idx]),  # Convert numpy float to Python float
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    seen_names.add(career['name'])
+        # 3. Education matching
+        if 'education' in fields:
+            edu_matches = self._count_matched_keywords(
+                career_matrix(self.career_keyword_matrix), [keywords['education'] for keywords in keywords_list])
+            scores['education'] = edu_matches / np.maximum(field_sizes('education'), 1) * 0.8
         
-        return recommendations
+        # 4. Experience matching
+        if 'experience' in fields:
+            exp_matches = self._count_matched_keywords(
+                career_matrix(self.career_keyword_matrix), [keywords['experience'] for keywords in keywords_list])
+            scores['experience'] = exp_matches / np.maximum(field_sizes('experience'), 1) * 0.8
+        
+        return scores
+    
+    def _keyword_indicator_matrix(self, keywords_list):
+        """Sparse users x vocabulary indicator of each user's keywords"""
+        rows = []
+        cols = []
+        for row, keywords in enumerate(keywords_list):
+            for keyword in keywords:
+                idx = self.keyword_vocabulary.get(keyword)
+                if idx is not None:
+                    rows.append(row)
+                    cols.append(idx)
+        return sparse.csr_matrix((np.ones(len(cols)), (rows, cols)),
+                                 shape=(len(keywords_list), len(self.keyword_vocabulary)))
+    
+    def _keyword_match_matrix(self, keywords):
+        """Sparse matrix whose row i flags every vocabulary keyword matched by keywords[i]"""
+        rows = []
+        cols = []
+        for row, matches in enumerate(self.keyword_index.matches_all(keywords)):
+            rows.extend([row] * len(matches))
+            cols.extend(matches)
+        metrics_registry.count('engine_keyword_lookups_total', len(keywords))
+        metrics_registry.count('engine_keyword_matches_total', len(cols))
+        return sparse.csr_matrix((np.ones(len(cols)), (rows, cols)),
+                                 shape=(len(keywords), len(self.keyword_vocabulary)))
+    
+    def _count_matched_keywords(self, career_matrix, keywords_list):
+        """Count, per user and career, the user keywords matching at least one career keyword
+        
+        All users' keywords are stacked into one match matrix; an ownership
+        matrix then folds the per-keyword hits back into per-user counts."""
+        all_keywords = [keyword for keywords in keywords_list for keyword in keywords]
+        if not all_keywords:
+            # Nothing to match: skip the products over the whole career matrix
+            return np.zeros((len(keywords_list), career_matrix.shape[0]))
+        owners = np.repeat(np.arange(len(keywords_list)), [len(keywords) for keywords in keywords_list])
+        ownership = sparse.csr_matrix((np.ones(len(all_keywords)), (np.arange(len(all_keywords)), owners)),
+                                      shape=(len(all_keywords), len(keywords_list)))
+        
+        hits = career_matrix @ self._keyword_match_matrix(all_keywords).T
+        return ((hits > 0).astype(float) @ ownership).T.toarray()
+    
+    def _score_semantic(self, user_profile):
+        """Cosine similarity between the weighted profile text and every career"""
+        return self._score_semantic_batch([user_profile])[0]
+    
+    def _tfidf_features(self, texts):
+        """self.vectorizer.transform(texts), with every term of the texts looked up in one call
+        
+        The terms are counted over the vocabulary (a SortedStringTable, see
+        _fitted_vectorizer), then weighted by IDF and L2-normalised exactly as
+        transform() does, which looks the terms up one at a time."""
+        analyze = self.vectorizer.build_analyzer()
+        terms = [analyze(text) for text in texts]
+        columns = self.vectorizer.vocabulary_.numbers([term for text_terms in terms for term in text_terms])
+        rows = np.repeat(np.arange(len(texts)), [len(text_terms) for text_terms in terms])
+        known = columns >= 0
+        # Repeated terms are summed into counts when converting to CSR
+        counts = sparse.coo_matrix((np.ones(known.sum()), (rows[known], columns[known])),
+                                   shape=(len(texts), len(self.vectorizer.vocabulary_))).tocsr()
+        counts.data *= self.vectorizer.idf_[counts.indices]
+        return normalize(counts)
+    
+    def _score_semantic_batch(self, user_profiles, rows=None):
+        """Cosine similarity of several profiles against every career, or the careers at rows (users x careers)"""
+        user_texts = [self._preprocess_user_profile(user_profile) for user_profile in user_profiles]
+        try:
+            with metrics_registry.stage('tfidf_transform'):
+                user_features = self._tfidf_features(user_texts)
+            with metrics_registry.stage('cosine_similarity'):
+                if self.semantic_mode != 'sparse':
+                    return self._score_lsa(user_features, rows)
+                if rows is None:
+                    # cosine_similarity against career_features, with the careers' side prepared once
+                    return (normalize(user_features) @ self.semantic_index).toarray()
+                return cosine_similarity(user_features, self.career_features[rows])
+        except Exception as e:
+            logging.error(f"Error calculating semantic similarity: {str(e)}")
+            num_careers = len(self.careers_data) if rows is None else len(rows)
+            return np.full((len(user_profiles), num_careers), 0.3)  # Fallback
+    
+    def _score_lsa(self, user_features, rows=None):
+        """Approximate cosine similarity of TF-IDF user vectors in the LSA space (users x careers)
+        
+        Users are projected like the careers in _build_semantic_index, then
+        scored against every career (or the careers at rows) with one BLAS
+        matrix product; int8 vectors are converted LSA_BLOCK_ROWS at a time.
+        Negative cosines are clipped, as TF-IDF cosines never are."""
+        user_vectors = normalize(np.asarray(user_features @ self.lsa_projection)).astype(np.float32)
+        vectors = self.lsa_vectors if rows is None else self.lsa_vectors[rows]
+        if self.lsa_scales is None:
+            scores = user_vectors @ vectors.T
+        else:
+            scores = np.empty((len(user_vectors), len(vectors)), dtype=np.float32)
+            for start in range(0, len(vectors), self.LSA_BLOCK_ROWS):
+                block = vectors[start:start + self.LSA_BLOCK_ROWS].astype(np.float32)
+                scores[:, start:start + len(block)] = user_vectors @ block.T
+            scores *= self.lsa_scales if rows is None else self.lsa_scales[rows]
+        return np.maximum(scores, 0)
+    
+    def _combine_scores(self, match_scores, semantic_scores):
+        """Weighted sum of the five signals - skills have highest weight"""
+        return (
+            match_scores['skills'] * 0.45 +          # Skills (highest weight)
+            match_scores['interests'] * 0.25 +       # Interests
+            semantic_scores * 0.15 +                 # Semantic analysis
+            match_scores['education'] * 0.1 +        # Education
+            match_scores['experience'] * 0.05        # Experience
+        )
     
     def get_career_by_id(self, career_id):
         """Retrieve a career by its ID"""
-        for career in self.careers_data:
-            if career['id'] == career_id:
-                return career
-        return None
+        idx = self.careers_data.position(career_id)
+        return None if idx is None else self.careers_data[idx]
     
     def get_all_careers(self):
         """Return all careers data"""
         return self.careers_data
-        
+    
     def _get_diverse_recommendations(self, num_recommendations=5):
         """Return diverse career recommendations from different industries"""
-        # Get unique industries
-        industries = {}
-        for career in self.careers_data:
-            industry = career['industry']
-            if industry not in industries:
-                industries[industry] = []
-            industries[industry].append(career)
-        
         # Select careers from different industries
         recommendations = []
-        seen_career_names = set()  # Track career names to ensure no duplicates
-        industries_list = list(industries.keys())
+        catalog = self.careers_data
+        seen_career_names = set()  # Track career name codes to ensure no duplicates
+        industries_list = list(self.industry_names)
         
         # Shuffle industries to get different recommendations each time
         np.random.shuffle(industries_list)
@@ -343,73 +1098,50 @@ class CareerRecommendationEngine:
         for i in range(num_industries):
             industry = industries_list[i % len(industries_list)]
             # Shuffle careers within this industry to get different ones each time
-            industry_careers = industries[industry].copy()
-            np.random.shuffle(industry_careers)
+            industry_careers = np.random.permutation(self.industry_index[industry])
             
             # Find a career from this industry that we haven't recommended yet
             added = False
-            for career in industry_careers:
+            for idx in industry_careers:
                 # Check if career name is already in recommendations
-                if career['name'] not in seen_career_names:
-                    recommendations.append({
-                        'career_id': career['id'],
-                        'name': career['name'],
-                        'description': career['description'],
-                        'required_skills': career['required_skills'],
-                        'industry': career['industry'],
-                        'score': 0.6,  # Medium score for default recommendations
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    seen_career_names.add(career['name'])
+                if catalog.name_codes[idx] not in seen_career_names:
+                    # Medium score for default recommendations
+                    recommendations.append(self._build_recommendation(catalog[idx], 0.6))
+                    seen_career_names.add(catalog.name_codes[idx])
                     added = True
                     break
             
             # If we couldn't add any career from this industry, try the next one
             if not added:
                 continue
-                
+            
             # If we have enough recommendations, stop
             if len(recommendations) >= num_recommendations:
                 break
-                
+        
         # If we still don't have enough recommendations, add careers from any industry
         if len(recommendations) < num_recommendations:
-            all_careers = self.careers_data.copy()
-            np.random.shuffle(all_careers)
+            all_careers = np.random.permutation(len(catalog))
+            
+            for idx in all_careers:
+                if catalog.name_codes[idx] not in seen_career_names and len(recommendations) < num_recommendations:
+                    # Slightly lower score for these fallback recommendations
+                    recommendations.append(self._build_recommendation(catalog[idx], 0.5))
+                    seen_career_names.add(catalog.name_codes[idx])
             
-            for career in all_careers:
-                if career['name'] not in seen_career_names and len(recommendations) < num_recommendations:
-                    recommendations.append({
-                        'career_id': career['id'],
-                        'name': career['name'],
-                        'description': career['description'],
-                        'required_skills': career['required_skills'],
-                        'industry': career['industry'],
-                        'score': 0.5,  # Slightly lower score for these fallback recommendations
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    seen_career_names.add(career['name'])
-                    
             # If we still don't have enough, that means our dataset is too small
             if len(recommendations) < num_recommendations:
                 logging.warning(f"Could only generate {len(recommendations)} recommendations from the available data")
-                
+        
         return recommendations
     
     def _extract_keywords(self, text):
         """Extract keywords from text, removing stopwords and normalizing"""
         if not text:
             return []
-            
-        # Convert to lowercase and tokenize by splitting on commas and spaces
-        keywords = []
-        for token in text.lower().replace(',', ' ').split():
-            # Filter out stopwords and short words
-            if len(token) > 2 and token not in stopwords.words('english'):
-                keywords.append(token)
-                
-        # Return unique keywords
-        return list(set(keywords))
+        
+        # Tokenisation and stopword filtering are shared and cached
+        return list(self.text_normalizer.keywords(text))
     
     def _keyword_match(self, user_keyword, career_keyword):
         """Check if a user keyword matches a career keyword
@@ -417,31 +1149,32 @@ class CareerRecommendationEngine:
         # Exact match
         if user_keyword == career_keyword:
             return True
-            
+        
         # One is substring of the other (case insensitive)
         if user_keyword in career_keyword or career_keyword in user_keyword:
             return True
-            
+        
         # Special case for tech skills (exact match only)
         if user_keyword.lower() in self.tech_skills and career_keyword.lower() in self.tech_skills:
             return user_keyword.lower() == career_keyword.lower()
-            
+        
         # Substring match but need at least 4 characters to match
         if len(user_keyword) >= 4 and len(career_keyword) >= 4:
             if user_keyword[:4] in career_keyword or career_keyword[:4] in user_keyword:
                 return True
-                
+        
         return False
     
     def extract_skills_from_text(self, text):
         """Extract potential skills from a text input"""
         if not text:
             return []
-            
+        
+        # pandas is only needed here, so it is not loaded with the engine
+        import pandas as pd
+        
         # Tokenize and filter tokens
-        tokens = word_tokenize(text.lower())
-        stop_words = set(stopwords.words('english'))
-        tokens = [token for token in tokens if token.isalpha() and token not in stop_words]
+        tokens = list(self.text_normalizer.tokens(text))
         
         # Count frequency
         freq = pd.Series(tokens).value_counts()
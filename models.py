@@ -1,4 +1,5 @@
 from app import db
+from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -23,10 +24,28 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
-        
+    
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def has_recommendation_profile(self):
+        """Whether the user has provided enough information to be recommended careers"""
+        return bool(self.skills or self.education or self.interests)
+    
+    def recommendation_profile(self):
+        """Profile fields in the form expected by the ML engine"""
+        return {
+            'skills': self.skills or '',
+            'education': self.education or '',
+            'experience': self.experience or '',
+            'interests': self.interests or ''
+        }
+    
+    @property
+    def is_admin(self):
+        """Whether the user's email is listed in the ADMIN_EMAILS setting"""
+        return self.email.lower() in current_app.config["ADMIN_EMAILS"]
+    
     def __repr__(self):
         return f'<User {self.name}>'
 
@@ -64,6 +83,25 @@ class Recommendation(db.Model):
         return f'<Recommendation {self.id} - Score: {self.score}>'
 
 
+class RecommendationJob(db.Model):
+    """A ranking computed in the background job pool (see recommendation_jobs.py)"""
+    __tablename__ = 'recommendation_jobs'
+    
+    QUEUED = 'queued'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<RecommendationJob {self.id} - {self.status}>'
+
+
 class Feedback(db.Model):
     __tablename__ = 'feedbacks'
     
@@ -0,0 +1,72 @@
+import heapq
+from collections import Counter
+
+import numpy as np
+
+
+def top_k_order(scores, k):
+    """Indices of the k highest scores, best first, in O(N + k log k)
+    
+    Uses np.argpartition instead of a full argsort. Ties are broken by
+    catalog position with later entries first, i.e. the order a reversed
+    stable argsort would give.
+    """
+    scores = np.asarray(scores)
+    num_scores = len(scores)
+    k = min(k, num_scores)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    
+    if k < num_scores:
+        # The k-th largest score; everything strictly above it is selected and
+        # the remaining slots go to the latest careers tied with it
+        threshold = scores[np.argpartition(scores, num_scores - k)[num_scores - k]]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[::-1][:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(num_scores)
+    
+    # lexsort orders by the last key first: ascending score, then ascending index
+    return candidates[np.lexsort((candidates, scores[candidates]))[::-1]]
+
+
+def diversify(ranked, scores, industry_codes, num_industries, num_results, min_industries=3, lookahead=10):
+    """Re-rank the top results so they span at least min_industries industries
+    
+    ranked holds candidate indices best first (see top_k_order) and
+    num_industries is the number of distinct industry codes. When the top
+    num_results cover too few industries, the next `lookahead` candidates from
+    unseen industries replace the lowest-scoring pick, as long as that pick's
+    industry stays represented. Returns the selected indices sorted by score.
+    """
+    selected = [int(idx) for idx in ranked[:num_results]]
+    # Counts never drop to zero: a pick is only replaced when its industry has another
+    industry_counts = Counter(int(industry_codes[idx]) for idx in selected)
+    target = min(min_industries, num_industries)
+    
+    # Min-heap of (score, insertion rank, index): the lowest-scoring pick,
+    # earliest selected on ties
+    heap = [(scores[idx], rank, idx) for rank, idx in enumerate(selected)]
+    
+    if len(industry_counts) < target:
+        heapq.heapify(heap)
+        next_rank = len(heap)
+        for idx in ranked[num_results:num_results + lookahead]:
+            idx = int(idx)
+            industry = int(industry_codes[idx])
+            if industry not in industry_counts:
+                lowest_industry = int(industry_codes[heap[0][2]])
+                # Only replace if we have more than one career from this industry
+                if industry_counts[lowest_industry] > 1:
+                    heapq.heapreplace(heap, (scores[idx], next_rank, idx))
+                    next_rank += 1
+                    industry_counts[lowest_industry] -= 1
+                    industry_counts[industry] += 1
+            
+            # Stop if we've reached desired industry diversity
+            if len(industry_counts) >= target:
+                break
+    
+    # Sort by score, keeping selection order on ties
+    return [idx for _, _, idx in sorted(heap, key=lambda entry: (-entry[0], entry[1]))]
@@ -0,0 +1,39 @@
+"""Code run inside the recommendation job processes
+
+Kept free of Flask and the database so that spawned worker processes only
+import the engine; the web process persists the results (see
+recommendation_jobs.py).
+"""
+import logging
+import os
+import time
+
+# The engine of this worker process, mapped once by init_worker, and the
+# per-field score vectors of the users it ranked last
+_engine = None
+_field_scores = None
+
+
+def init_worker(engine_options, field_cache_size=16):
+    """Process pool initializer: map the engine bundle the web worker prepared (see RecommendationJobQueue)"""
+    global _engine, _field_scores
+    from ml_engine import CareerRecommendationEngine
+    from recommendation_cache import FieldScoreCache
+    
+    start = time.perf_counter()
+    _engine = CareerRecommendationEngine(**engine_options)
+    _field_scores = FieldScoreCache(maxsize=field_cache_size)
+    logging.info(f"Ranking process {os.getpid()} ready with {len(_engine.careers_data)} careers "
+                 f"in {time.perf_counter() - start:.2f}s")
+
+
+def rank_profile(user_id, user_profile, num_recommendations=5):
+    """Rank the careers for one profile; returns the recommendations and the ranking time
+    
+    Like routes.rank_for_user, only the fields changed since this process
+    last ranked the user are rescored."""
+    start = time.perf_counter()
+    recommendations, field_scores = _engine.rescore_recommendations(
+        user_profile, _field_scores.get(user_id, _engine.catalog_version), num_recommendations)
+    _field_scores.put(user_id, field_scores)
+    return recommendations, time.perf_counter() - start
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+PROFILE_FIELDS = ('skills', 'interests', 'education', 'experience')
+
+
+class RecommendationCache:
+    """LRU/TTL cache of ranked recommendations
+    
+    Entries are keyed by a hash of the normalised profile and the engine's
+    catalog version, so an unchanged profile is never re-ranked while a new
+    catalog never serves stale rankings. Entries are also dropped explicitly
+    when a user edits their profile.
+    """
+    
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, recommendations)
+        self._user_keys = {}           # user id -> key of their last ranking
+        self._catalog_version = None
+        self._lock = threading.Lock()
+        
+        # Counters used to estimate how much ranking work the cache saves
+        self.hits = 0
+        self.misses = 0
+        self.compute_seconds = 0.0
+    
+    @staticmethod
+    def make_key(user_profile, catalog_version, num_recommendations=5):
+        """Hash the normalised profile fields together with the catalog version"""
+        # The engine lowercases and splits on whitespace, so neither case nor
+        # spacing can change the ranking
+        normalised = {field: ' '.join(str(user_profile.get(field) or '').lower().split())
+                      for field in PROFILE_FIELDS}
+        payload = json.dumps([normalised, catalog_version, num_recommendations], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get_or_compute(self, user_id, user_profile, catalog_version, compute, num_recommendations=5):
+        """Return cached recommendations for the profile, calling compute() on a miss"""
+        recommendations = self.lookup(user_id, user_profile, catalog_version, num_recommendations)
+        if recommendations is not None:
+            return recommendations
+        
+        start = time.perf_counter()
+        recommendations = compute()
+        self.store(user_id, user_profile, catalog_version, recommendations, num_recommendations,
+                   time.perf_counter() - start)
+        return recommendations
+    
+    def lookup(self, user_id, user_profile, catalog_version, num_recommendations=5):
+        """Cached recommendations for the profile, or None on a miss"""
+        key = self.make_key(user_profile, catalog_version, num_recommendations)
+        now = time.monotonic()
+        
+        with self._lock:
+            # A catalog reload invalidates every cached ranking
+            if catalog_version != self._catalog_version:
+                self._entries.clear()
+                self._user_keys.clear()
+                self._catalog_version = catalog_version
+            
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._user_keys[user_id] = key
+                self.hits += 1
+                logging.debug(f"Recommendation cache hit for user {user_id} ({self.hits} hits, {self.misses} misses)")
+                return entry[1]
+            self.misses += 1
+            return None
+    
+    def store(self, user_id, user_profile, catalog_version, recommendations, num_recommendations=5,
+              compute_seconds=0.0):
+        """Cache a ranking computed after a miss (e.g. by a background job)"""
+        key = self.make_key(user_profile, catalog_version, num_recommendations)
+        with self._lock:
+            self.compute_seconds += compute_seconds
+            if catalog_version == self._catalog_version:
+                self._entries[key] = (time.monotonic() + self.ttl, recommendations)
+                self._entries.move_to_end(key)
+                self._user_keys[user_id] = key
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+    
+    def invalidate_user(self, user_id):
+        """Drop the cached ranking last served to a user (e.g. after a profile edit)"""
+        with self._lock:
+            key = self._user_keys.pop(user_id, None)
+            if key is not None:
+                self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop every cached ranking (e.g. after a catalog reload)"""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+    
+    def stats(self):
+        """Hit/miss counters and an estimate of the ranking time saved by hits"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            average_compute = self.compute_seconds / self.misses if self.misses else 0.0
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'compute_seconds': self.compute_seconds,
+                'estimated_seconds_saved': self.hits * average_compute
+            }
+
+
+class FieldScoreCache:
+    """Each user's latest per-field score vectors (CareerRecommendationEngine.score_fields)
+    
+    Keyed by user id rather than by profile, so the vectors are still found
+    after the user edits their profile and the engine only recomputes the
+    signals of the fields that changed. Every entry holds five floats per
+    career; keep maxsize small for big catalogs (0 disables the cache).
+    """
+    
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # user id -> field scores
+        self._lock = threading.Lock()
+    
+    def get(self, user_id, catalog_version):
+        """The user's field scores if computed for this catalog version, else None"""
+        with self._lock:
+            field_scores = self._entries.get(user_id)
+            if field_scores is None or field_scores['catalog_version'] != catalog_version:
+                return None
+            self._entries.move_to_end(user_id)
+            return field_scores
+    
+    def put(self, user_id, field_scores):
+        """Keep the user's latest field scores; None drops them"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if field_scores is None or self.maxsize <= 0:
+                return
+            self._entries[user_id] = field_scores
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,178 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+
+from app import app, db
+from engine_loader import engine_provider
+from models import RecommendationJob, User
+from recommendation_store import replace_user_recommendations
+import ranking_worker
+
+
+class RecommendationJobQueue:
+    """Ranks profiles in a local process pool instead of inside the request
+    
+    Each job is a row of the recommendation_jobs table, so any web worker
+    can report its status. The ranking runs in a pool of spawned processes
+    (ranking_worker.py), so scoring uses every core without holding the web
+    worker's GIL; the web worker then persists the result from the future's
+    callback and marks the job done.
+    
+    The processes never fit an engine: they memory-map an artifact bundle
+    of the web worker's engine read-only (see _pool_options), so the pages
+    of its arrays are shared with every other process mapping it. Each
+    keeps a FieldScoreCache of field_cache_size users of its own.
+    
+    The pool belongs to the web worker that created it and is replaced
+    when that worker's engine moves to a new catalog version; jobs already
+    submitted finish on the old one.
+    """
+    
+    def __init__(self, max_workers=0, timeout=300, cache=None, field_cache_size=16):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache = cache
+        self.field_cache_size = field_cache_size
+        self._pool = None
+        self._pool_pid = None
+        self._pool_version = None
+        # Private bundle written for the pool when no shared one is current
+        self._bundle = None
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return self.max_workers > 0
+    
+    def enqueue(self, user_id, user_profile, engine):
+        """Start ranking the profile against the engine's catalog in the background; returns the (possibly already running) job"""
+        # A user refreshing the page while a job is pending gets that job back
+        pending = RecommendationJob.query.filter(
+            RecommendationJob.user_id == user_id,
+            RecommendationJob.status == RecommendationJob.QUEUED,
+            RecommendationJob.created_at >= datetime.utcnow() - timedelta(seconds=self.timeout)
+        ).order_by(RecommendationJob.id.desc()).first()
+        if pending is not None:
+            return pending
+        
+        job = RecommendationJob(user_id=user_id, status=RecommendationJob.QUEUED)
+        db.session.add(job)
+        db.session.commit()
+        
+        pool = self._executor(engine)
+        future = pool.submit(ranking_worker.rank_profile, user_id, user_profile)
+        future.add_done_callback(partial(self._finish, job.id, user_id, user_profile, engine.catalog_version, pool))
+        logging.info(f"Queued recommendation job {job.id} for user {user_id}")
+        return job
+    
+    def status(self, job):
+        """Current state of a job, failing it if it has been queued for longer than the timeout"""
+        if job.status == RecommendationJob.QUEUED and job.created_at < datetime.utcnow() - timedelta(seconds=self.timeout):
+            # e.g. the web worker that owned the pool was restarted
+            job.status = RecommendationJob.FAILED
+            job.error = 'Timed out'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        return job.status
+    
+    def _executor(self, engine):
+        """The pool of this web worker for the engine's catalog version, created on first use"""
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid() or self._pool_version != engine.catalog_version:
+                # A pool inherited through fork belongs to the parent process
+                if self._pool is not None and self._pool_pid == os.getpid():
+                    self._pool.shutdown(wait=False)
+                    if self._bundle is not None:
+                        # Processes still ranking on it keep their mapping
+                        self._bundle.cleanup()
+                self._bundle = None
+                # Spawned, not forked: the web worker runs threads (reloads,
+                # profiling) that must not be copied mid-operation
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=ranking_worker.init_worker,
+                    initargs=(self._pool_options(engine), self.field_cache_size)
+                )
+                self._pool_pid = os.getpid()
+                self._pool_version = engine.catalog_version
+            return self._pool
+    
+    def _pool_options(self, engine):
+        """Engine options making the ranking processes map a bundle of the engine instead of building one
+        
+        That is the shared bundle with ENGINE_SHARED_DIR, and the
+        ENGINE_ARTIFACTS_DIR one if it was built from the engine's catalog
+        file. Otherwise the engine (say, one fitted because the bundle was
+        stale, or updated incrementally) is written once to a private
+        bundle, deleted when the pool is replaced. Should the catalog file
+        change before the processes start, they refuse the bundle and the
+        job fails; jobs after the web worker's reload get a fresh pool.
+        """
+        from engine_artifacts import build_artifacts, current_catalog_file_digest
+        
+        options = dict(engine_provider.engine_options(), artifacts_only=True)
+        if app.config["ENGINE_SHARED_DIR"]:
+            return options
+        if (options['artifacts_dir'] and engine.incremental_changes == 0 and engine.catalog_file_digest is not None
+                and current_catalog_file_digest(options['artifacts_dir']) == engine.catalog_file_digest):
+            return options
+        self._bundle = tempfile.TemporaryDirectory(prefix='ranking-engine-')
+        build_artifacts(engine, self._bundle.name)
+        options['artifacts_dir'] = self._bundle.name
+        return options
+    
+    def _finish(self, job_id, user_id, user_profile, catalog_version, pool, future):
+        """Future callback: persist the ranking and record the job's outcome"""
+        try:
+            recommendations, seconds = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # A ranking process died (or failed to build its engine); start afresh next time
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+            logging.error(f"Recommendation job {job_id} failed: {str(e)}")
+            self._fail(job_id, str(e) or type(e).__name__)
+            return
+        
+        if self.cache is not None:
+            self.cache.store(user_id, user_profile, catalog_version, recommendations, compute_seconds=seconds)
+        
+        with app.app_context():
+            try:
+                job = db.session.get(RecommendationJob, job_id)
+                user = db.session.get(User, user_id)
+                if user is None or user.recommendation_profile() != user_profile:
+                    # Ranked for a profile the user has since edited
+                    job.status = RecommendationJob.FAILED
+                    job.error = 'Profile changed while ranking'
+                else:
+                    # Replace the user's old recommendations (and their feedback) in bulk
+                    replace_user_recommendations(user_id, recommendations)
+                    job.status = RecommendationJob.DONE
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                logging.info(f"Recommendation job {job_id} {job.status} after ranking in {seconds:.3f}s")
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Error saving recommendation job {job_id}: {str(e)}")
+                self._fail(job_id, 'Could not save the recommendations')
+    
+    def _fail(self, job_id, error):
+        with app.app_context():
+            try:
+                job = db.session.get(RecommendationJob, job_id)
+                job.status = RecommendationJob.FAILED
+                job.error = error
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Error updating recommendation job {job_id}: {str(e)}")
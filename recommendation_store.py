@@ -0,0 +1,66 @@
+from sqlalchemy import delete, insert, select
+
+from app import db
+from models import Career, Recommendation, Feedback
+from market_data import trend_repository
+
+
+def replace_user_recommendations(user_id, recommendations):
+    """Replace a user's stored recommendations using a constant number of round trips"""
+    replace_recommendations({user_id: recommendations})
+
+
+def replace_recommendations(recommendations_by_user):
+    """Replace the stored recommendations of several users using a constant number of round trips
+    
+    Feedback on the old recommendations and the recommendations themselves are
+    removed with set-based deletes, missing careers are found with a single IN
+    lookup and every new row (including the market trends of new careers) is
+    bulk-inserted. The caller commits.
+    """
+    user_ids = list(recommendations_by_user)
+    if not user_ids:
+        return
+    
+    # Remove any associated feedback first (to avoid foreign key constraint errors)
+    old_recommendation_ids = select(Recommendation.id).where(Recommendation.user_id.in_(user_ids))
+    db.session.execute(
+        delete(Feedback).where(Feedback.recommendation_id.in_(old_recommendation_ids)),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.execute(
+        delete(Recommendation).where(Recommendation.user_id.in_(user_ids)),
+        execution_options={'synchronize_session': False}
+    )
+    
+    # Keep the first recommendation for each (user, career) pair (prevents duplicates)
+    rows = {}
+    careers = {}
+    for user_id, recommendations in recommendations_by_user.items():
+        for rec in recommendations:
+            rows.setdefault((user_id, rec['career_id']), rec['score'])
+            careers.setdefault(rec['career_id'], rec)
+    if not rows:
+        return
+    
+    # Create any careers the database does not know about yet
+    existing_ids = set(db.session.scalars(select(Career.id).where(Career.id.in_(list(careers)))))
+    new_careers = [
+        {
+            'id': rec['career_id'],
+            'name': rec['name'],
+            'description': rec['description'],
+            'required_skills': rec['required_skills'],
+            'industry': rec['industry']
+        }
+        for career_id, rec in careers.items() if career_id not in existing_ids
+    ]
+    if new_careers:
+        db.session.execute(insert(Career), new_careers)
+        # New careers get their market trend rows in the same transaction
+        trend_repository.insert_trends([career['id'] for career in new_careers])
+    
+    db.session.execute(insert(Recommendation), [
+        {'user_id': user_id, 'career_id': career_id, 'score': score}
+        for (user_id, career_id), score in rows.items()
+    ])
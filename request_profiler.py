@@ -0,0 +1,225 @@
+import cProfile
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Requests carrying this header are profiled once the app has checked they
+# come from an admin, by calling the function the middleware leaves in the
+# environ under START_PROFILING_ENVIRON (see routes.authorize_profiling)
+PROFILE_HEADER = 'X-Profile-Request'
+PROFILE_HEADER_ENVIRON = 'HTTP_' + PROFILE_HEADER.upper().replace('-', '_')
+START_PROFILING_ENVIRON = 'request_profiler.start'
+
+# Extensions of the files written per capture; the JSON file describes it
+CAPTURE_FILES = ('json', 'collapsed', 'prof')
+
+
+def collapse_stack(frame):
+    """One sampled stack as a flamegraph.pl 'outer;...;inner' line"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Background thread sampling the Python stacks of registered threads
+    
+    The thread is started lazily, so each forked gunicorn worker gets its
+    own. While no thread is registered it only sleeps.
+    """
+    
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of collapsed stacks
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+    
+    def start(self, thread_id):
+        """Start collecting samples of a thread; returns its Counter of stacks"""
+        self._ensure_running()
+        samples = Counter()
+        with self._lock:
+            self._active[thread_id] = samples
+        return samples
+    
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, None)
+    
+    def _ensure_running(self):
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                    self._thread.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[collapse_stack(frame)] += 1
+
+
+class ProfilingMiddleware:
+    """WSGI middleware capturing profiles of slow or explicitly marked requests
+    
+    Every request is stack-sampled by a background thread; the samples are
+    kept only if the request took at least `threshold` seconds, so fast
+    requests just pay for registering with the sampler. Requests sent with
+    the X-Profile-Request header are also run under cProfile and always
+    kept, but only from the moment the app calls the environ's
+    START_PROFILING_ENVIRON function for an admin: until then the header
+    neither starts a profiler nor takes the profiler lock.
+    
+    Each capture is written to `directory` as <id>.collapsed (input for
+    flamegraph.pl or speedscope), <id>.prof (pstats, header-triggered only)
+    and <id>.json with the request and its hottest functions. Only the
+    newest `max_captures` are kept.
+    """
+    
+    def __init__(self, wsgi_app, directory, threshold=1.0, max_captures=100, interval=0.005):
+        self.wsgi_app = wsgi_app
+        self.directory = directory
+        self.threshold = threshold
+        self.max_captures = max_captures
+        self.sampler = StackSampler(interval)
+        # Only one cProfile profiler can run per process at a time
+        self._profiler_lock = threading.Lock()
+        self._captures = itertools.count(1)
+        os.makedirs(directory, exist_ok=True)
+    
+    def __call__(self, environ, start_response):
+        requested = PROFILE_HEADER_ENVIRON in environ
+        if not requested and not self.threshold:
+            return self.wsgi_app(environ, start_response)
+        
+        thread_id = threading.get_ident()
+        status = []
+        # Filled in by start_profiling: 'authorized', and 'profiler' if it got the lock
+        profiling = {}
+        samples = self.sampler.start(thread_id) if self.threshold else None
+        
+        def capture_status(response_status, headers, exc_info=None):
+            status.append(response_status)
+            return start_response(response_status, headers, exc_info)
+        
+        def start_profiling():
+            """Run the rest of this request under cProfile; called by the app for admins only"""
+            nonlocal samples
+            if profiling:
+                return
+            profiling['authorized'] = True
+            if samples is None:
+                samples = self.sampler.start(thread_id)
+            if self._profiler_lock.acquire(blocking=False):
+                profiling['profiler'] = cProfile.Profile()
+                profiling['profiler'].enable()
+        
+        if requested:
+            environ[START_PROFILING_ENVIRON] = start_profiling
+        start = time.perf_counter()
+        try:
+            response = self.wsgi_app(environ, capture_status)
+        finally:
+            profiler = profiling.get('profiler')
+            if profiler is not None:
+                profiler.disable()
+                self._profiler_lock.release()
+            duration = time.perf_counter() - start
+            if samples is not None:
+                self.sampler.stop(thread_id)
+        
+        if profiling.get('authorized'):
+            trigger = 'header'
+        elif self.threshold and duration >= self.threshold:
+            trigger = 'threshold'
+        else:
+            return response
+        try:
+            self._write_capture(environ, status[0] if status else None, duration, trigger, samples, profiler)
+        except OSError as e:
+            logging.error(f"Could not write request profile: {str(e)}")
+        return response
+    
+    def _write_capture(self, environ, status, duration, trigger, samples, profiler):
+        capture_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{next(self._captures)}"
+        base = os.path.join(self.directory, capture_id)
+        
+        with open(base + '.collapsed', 'w') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        if profiler is not None:
+            profiler.dump_stats(base + '.prof')
+        
+        # Functions at the top of the most samples, i.e. where the time went
+        hottest = Counter()
+        for stack, count in samples.items():
+            hottest[stack.rsplit(';', 1)[-1]] += count
+        total_samples = sum(samples.values())
+        capture = {
+            'id': capture_id,
+            'method': environ.get('REQUEST_METHOD'),
+            'path': environ.get('PATH_INFO'),
+            'query': environ.get('QUERY_STRING', ''),
+            'status': status,
+            'duration_seconds': round(duration, 4),
+            'trigger': trigger,
+            'pid': os.getpid(),
+            'captured_at': datetime.utcnow().isoformat(),
+            'samples': total_samples,
+            'hottest': [{'function': function, 'share': round(count / total_samples, 3)}
+                        for function, count in hottest.most_common(10)],
+            'files': [f"{capture_id}.{extension}" for extension in CAPTURE_FILES
+                      if extension != 'prof' or profiler is not None]
+        }
+        # Written last, so listings never see a capture whose files are missing
+        with open(base + '.json', 'w') as f:
+            json.dump(capture, f)
+        logging.info(f"Profiled {capture['method']} {capture['path']} ({trigger}, {duration:.3f}s) as {capture_id}")
+        self._rotate()
+    
+    def _rotate(self):
+        """Delete the oldest captures beyond max_captures"""
+        captures = sorted(name[:-len('.json')] for name in os.listdir(self.directory) if name.endswith('.json'))
+        for capture_id in captures[:max(len(captures) - self.max_captures, 0)]:
+            for extension in CAPTURE_FILES:
+                try:
+                    os.remove(os.path.join(self.directory, f"{capture_id}.{extension}"))
+                except FileNotFoundError:
+                    # Already removed by another worker
+                    pass
+
+
+def list_captures(directory, limit=20):
+    """The slowest captures still on disk, slowest first"""
+    captures = []
+    if not os.path.isdir(directory):
+        return captures
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r') as f:
+                captures.append(json.load(f))
+        except (OSError, ValueError):
+            # Rotated away or still being written by another worker
+            continue
+    captures.sort(key=lambda capture: capture['duration_seconds'], reverse=True)
+    return captures[:limit]
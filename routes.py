@@ -1,16 +1,117 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify, session
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, g, abort, Response, send_from_directory, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
 from app import app, db
-from models import User, Career, Recommendation, Feedback, MarketTrend, MLModel
-from ml_engine import CareerRecommendationEngine
+from models import User, Career, Recommendation, Feedback, MarketTrend, MLModel, RecommendationJob
+from engine_loader import engine_provider, get_engine
+from metrics import metrics_registry
+from request_profiler import START_PROFILING_ENVIRON, list_captures
+from recommendation_cache import FieldScoreCache, RecommendationCache
+from recommendation_jobs import RecommendationJobQueue
+from recommendation_store import replace_user_recommendations
+from market_data import trend_repository
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
 import logging
+import time
 from datetime import datetime
+from functools import wraps
 import os
 
-# Initialize the ML engine
-ml_engine = CareerRecommendationEngine()
+# Cache rankings for unchanged profiles so repeat clicks skip the engine
+recommendation_cache = RecommendationCache(
+    maxsize=app.config["RECOMMENDATION_CACHE_SIZE"],
+    ttl=app.config["RECOMMENDATION_CACHE_TTL"]
+)
+
+# Full score vectors, so /api/recommendations pages never rescore a profile
+score_cache = RecommendationCache(
+    maxsize=app.config["SCORE_CACHE_SIZE"],
+    ttl=app.config["RECOMMENDATION_CACHE_TTL"]
+)
+
+# Each user's per-field score vectors, so a profile edit only rescores the changed fields
+field_score_cache = FieldScoreCache(maxsize=app.config["FIELD_SCORE_CACHE_SIZE"])
+
+# Largest page of /api/recommendations, and largest NDJSON stream
+API_MAX_PAGE_SIZE = 100
+API_MAX_STREAM_SIZE = 1000
+
+# Background ranking for /get-recommendations (disabled unless RECOMMENDATION_JOB_WORKERS > 0)
+job_queue = RecommendationJobQueue(
+    max_workers=app.config["RECOMMENDATION_JOB_WORKERS"],
+    timeout=app.config["RECOMMENDATION_JOB_TIMEOUT"],
+    cache=recommendation_cache,
+    field_cache_size=app.config["FIELD_SCORE_CACHE_SIZE"]
+)
+
+metrics_registry.enabled = app.config["METRICS_ENABLED"]
+
+def rank_for_user(ml_engine, user_id, user_profile):
+    """Rank a user's profile, recomputing only the signals of fields changed since their last ranking"""
+    recommendations, field_scores = ml_engine.rescore_recommendations(
+        user_profile, field_score_cache.get(user_id, ml_engine.catalog_version))
+    field_score_cache.put(user_id, field_scores)
+    return recommendations
+
+def score_for_user(ml_engine, user_id, user_profile):
+    """score_careers for a user's profile, reusing their per-field score vectors like rank_for_user"""
+    field_scores = ml_engine.score_fields(user_profile, field_score_cache.get(user_id, ml_engine.catalog_version))
+    field_score_cache.put(user_id, field_scores)
+    return ml_engine.combine_field_scores(field_scores)
+
+def admin_required(view):
+    """Restrict a JSON endpoint to users listed in ADMIN_EMAILS"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated or not current_user.is_admin:
+            return jsonify({'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
+@app.before_request
+def check_catalog_changes():
+    """Start a background engine reload when the career catalog changed"""
+    engine_provider.check_for_changes()
+
+@app.before_request
+def authorize_profiling():
+    """Start profiling a request sent with the X-Profile-Request header, once its user is known to be an admin"""
+    start_profiling = request.environ.get(START_PROFILING_ENVIRON)
+    if start_profiling is not None and current_user.is_authenticated and current_user.is_admin:
+        start_profiling()
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started, for the route latency histogram"""
+    if metrics_registry.enabled:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Add the request's latency to the histogram of its route"""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics_registry.observe('http_request_seconds', time.perf_counter() - started,
+                                 (('route', route), ('method', request.method), ('status', str(response.status_code))))
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Stage timings, counters and cache statistics in the Prometheus text format"""
+    if not metrics_registry.enabled:
+        abort(404)
+    cache = recommendation_cache.stats()
+    samples = [
+        ('recommendation_cache_hits_total', 'counter', 'Recommendation cache hits', cache['hits']),
+        ('recommendation_cache_misses_total', 'counter', 'Recommendation cache misses', cache['misses']),
+        ('recommendation_cache_entries', 'gauge', 'Rankings currently cached', cache['size']),
+        ('recommendation_cache_compute_seconds_total', 'counter', 'Time spent ranking on cache misses',
+         cache['compute_seconds']),
+        ('engine_catalog_version', 'gauge', 'Catalog version of the engine serving requests',
+         engine_provider.status()['catalog_version'] or 0)
+    ]
+    return Response(metrics_registry.render(samples), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -30,17 +131,17 @@ def register():
         if not name or not email or not password:
             flash('All fields are required', 'danger')
             return render_template('register.html')
-            
+        
         if password != confirm_password:
             flash('Passwords do not match', 'danger')
             return render_template('register.html')
-            
+        
         # Check if user already exists
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
             flash('Email already registered', 'danger')
             return render_template('register.html')
-            
+        
         # Create new user
         new_user = User(name=name, email=email)
         new_user.set_password(password)
@@ -106,6 +207,9 @@ def edit_profile():
         
         try:
             db.session.commit()
+            # Only the ranking is dropped: the user's per-field score vectors
+            # stay, so the next ranking only rescores the edited fields
+            recommendation_cache.invalidate_user(current_user.id)
             flash('Profile updated successfully', 'success')
             return redirect(url_for('profile'))
         except Exception as e:
@@ -120,67 +224,34 @@ def edit_profile():
 def get_recommendations():
     """Generate career recommendations for the user"""
     # Check if user has provided necessary information
-    if not current_user.skills and not current_user.education and not current_user.interests:
+    if not current_user.has_recommendation_profile():
         flash('Please complete your profile to get recommendations', 'warning')
         return redirect(url_for('edit_profile'))
     
     # Prepare user profile for the ML engine
-    user_profile = {
-        'skills': current_user.skills or '',
-        'education': current_user.education or '',
-        'experience': current_user.experience or '',
-        'interests': current_user.interests or ''
-    }
+    user_profile = current_user.recommendation_profile()
     
     try:
-        # First, delete all existing recommendations for this user
-        # This ensures we don't have duplicates or old recommendations
-        existing_recommendations = Recommendation.query.filter_by(user_id=current_user.id).all()
-        
-        # Remove any associated feedback first (to avoid foreign key constraint errors)
-        for rec in existing_recommendations:
-            Feedback.query.filter_by(recommendation_id=rec.id).delete()
-        
-        # Now delete the recommendations
-        Recommendation.query.filter_by(user_id=current_user.id).delete()
-        
-        # Get recommendations from ML engine
-        recommendations = ml_engine.get_recommendations(user_profile)
-        
-        # Create a set to track career IDs we've already added
-        # This provides an extra layer of deduplication
-        added_career_ids = set()
-        
-        # Store recommendations in the database
-        for rec in recommendations:
-            # Skip if we already added this career (prevents duplicates)
-            if rec['career_id'] in added_career_ids:
-                continue
-                
-            # Add to our tracking set
-            added_career_ids.add(rec['career_id'])
-            
-            # Check if career exists in the database, if not create it
-            career = Career.query.filter_by(id=rec['career_id']).first()
-            if not career:
-                career = Career(
-                    id=rec['career_id'],
-                    name=rec['name'],
-                    description=rec['description'],
-                    required_skills=rec['required_skills'],
-                    industry=rec['industry']
-                )
-                db.session.add(career)
-            
-            # Create recommendation
-            new_recommendation = Recommendation(
-                user_id=current_user.id,
-                career_id=career.id,
-                score=rec['score']
+        # Get recommendations from the cache, or from the ML engine on a miss
+        ml_engine = get_engine()
+        if job_queue.enabled:
+            recommendations = recommendation_cache.lookup(current_user.id, user_profile, ml_engine.catalog_version)
+            if recommendations is None:
+                # Rank in the job pool; the job page polls until it is done
+                job = job_queue.enqueue(current_user.id, user_profile, ml_engine)
+                return redirect(url_for('recommendation_job', job_id=job.id))
+        else:
+            recommendations = recommendation_cache.get_or_compute(
+                current_user.id,
+                user_profile,
+                ml_engine.catalog_version,
+                lambda: rank_for_user(ml_engine, current_user.id, user_profile)
             )
-            db.session.add(new_recommendation)
         
-        db.session.commit()
+        # Replace the user's old recommendations (and their feedback) in bulk
+        with metrics_registry.stage('db_persist'):
+            replace_user_recommendations(current_user.id, recommendations)
+            db.session.commit()
         flash('Your career recommendations have been updated', 'success')
     except Exception as e:
         db.session.rollback()
@@ -190,6 +261,36 @@ def get_recommendations():
     
     return redirect(url_for('recommendations'))
 
+@app.route('/recommendation-jobs/<int:job_id>')
+@login_required
+def recommendation_job(job_id):
+    """Wait for a background ranking, then go to the recommendations"""
+    job = RecommendationJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        abort(404)
+    if job_queue.status(job) == RecommendationJob.DONE:
+        flash('Your career recommendations have been updated', 'success')
+        return redirect(url_for('recommendations'))
+    return render_template('recommendation_job.html', job=job)
+
+@app.route('/api/recommendation-jobs/<int:job_id>')
+@login_required
+def recommendation_job_status(job_id):
+    """Status of a background ranking, polled by the job page"""
+    job = RecommendationJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return jsonify({'error': 'Job not found'}), 404
+    status = job_queue.status(job)
+    return jsonify({
+        'job_id': job.id,
+        'status': status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        # The job page flashes the confirmation before redirecting
+        'redirect_url': url_for('recommendation_job', job_id=job.id) if status == RecommendationJob.DONE else None
+    })
+
 @app.route('/recommendations')
 @login_required
 def recommendations():
@@ -205,35 +306,10 @@ def career_details(career_id):
     career = Career.query.get_or_404(career_id)
     market_trend = MarketTrend.query.filter_by(career_id=career_id).first()
     
-    # If market trend doesn't exist in database, try to get it from JSON data
+    # If market trend doesn't exist in database, fall back to the in-memory
+    # trend index without writing anything on this read path
     if not market_trend:
-        try:
-            with open('static/data/market_trends.json', 'r') as f:
-                trends_data = json.load(f)
-                for trend in trends_data:
-                    if trend.get('career_id') == career_id:
-                        # Create market trend in the database
-                        market_trend = MarketTrend(
-                            career_id=career_id,
-                            demand_level=trend.get('demand_level', 0.5),
-                            salary_range_min=trend.get('salary_range_min', 30000),
-                            salary_range_max=trend.get('salary_range_max', 80000)
-                        )
-                        try:
-                            db.session.add(market_trend)
-                            db.session.commit()
-                        except Exception as e:
-                            db.session.rollback()
-                            logging.error(f"Error creating market trend: {str(e)}")
-        except FileNotFoundError:
-            logging.warning("Market trends data file not found")
-            # Create a default market trend
-            market_trend = MarketTrend(
-                career_id=career_id,
-                demand_level=0.5,  # Medium demand
-                salary_range_min=40000,
-                salary_range_max=90000
-            )
+        market_trend = trend_repository.build_trend(career_id)
     
     # Get the recommendation for this career (if exists)
     recommendation = Recommendation.query.filter_by(user_id=current_user.id, career_id=career_id).first()
@@ -306,6 +382,62 @@ def market_trends():
     
     return render_template('market_trends.html', careers_with_trends=careers_with_trends)
 
+@app.route('/api/recommendations')
+@login_required
+def api_recommendations():
+    """Page through the current user's ranking as JSON, or stream it as NDJSON"""
+    if not current_user.has_recommendation_profile():
+        return jsonify({'error': 'Please complete your profile to get recommendations'}), 400
+    
+    stream = request.args.get('format') == 'ndjson'
+    # `limit` is the older name of `k`. Parsed by hand, as type=int would
+    # silently replace a malformed value with the default
+    try:
+        k = int(request.args.get('k', request.args.get('limit', 5)))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        k = offset = None
+    industry = request.args.get('industry') or None
+    if k is None or offset is None or k < 1 or offset < 0 or k > (API_MAX_STREAM_SIZE if stream else API_MAX_PAGE_SIZE):
+        return jsonify({'error': f"k must be between 1 and {API_MAX_STREAM_SIZE if stream else API_MAX_PAGE_SIZE} "
+                                 f"and offset must not be negative"}), 400
+    
+    # Scored once per profile and catalog version; later pages only re-sort
+    user_profile = current_user.recommendation_profile()
+    ml_engine = get_engine()
+    scores = score_cache.get_or_compute(
+        current_user.id,
+        user_profile,
+        ml_engine.catalog_version,
+        lambda: score_for_user(ml_engine, current_user.id, user_profile),
+        num_recommendations=None
+    )
+    
+    if stream:
+        def generate():
+            # One career per line, computed API_MAX_PAGE_SIZE at a time
+            for start in range(offset, offset + k, API_MAX_PAGE_SIZE):
+                page, _ = ml_engine.recommendation_page(user_profile, scores, start,
+                                                         min(API_MAX_PAGE_SIZE, offset + k - start), industry)
+                for recommendation in page:
+                    yield json.dumps(recommendation) + '\n'
+                if len(page) < API_MAX_PAGE_SIZE:
+                    break
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        response.headers['X-Catalog-Version'] = str(ml_engine.catalog_version)
+        return response
+    
+    page, total = ml_engine.recommendation_page(user_profile, scores, offset, k, industry)
+    return jsonify({
+        'recommendations': page,
+        'offset': offset,
+        'k': k,
+        'total': total,
+        'next_offset': offset + k if offset + k < total else None,
+        'industry': industry,
+        'catalog_version': ml_engine.catalog_version
+    })
+
 @app.route('/api/extract-skills', methods=['POST'])
 @login_required
 def extract_skills():
@@ -313,10 +445,46 @@ def extract_skills():
     data = request.get_json()
     text = data.get('text', '')
     
-    skills = ml_engine.extract_skills_from_text(text)
+    skills = get_engine().extract_skills_from_text(text)
     
     return jsonify({'skills': skills})
 
+@app.route('/admin/catalog')
+@admin_required
+def catalog_status():
+    """Catalog version and reload state of the worker serving this request"""
+    return jsonify(engine_provider.status())
+
+@app.route('/admin/reload-catalog', methods=['POST'])
+@admin_required
+def reload_catalog():
+    """Rebuild this worker's engine from the current catalog in the background"""
+    started = engine_provider.reload()
+    return jsonify({'reload_started': started, 'status': engine_provider.status()}), 202
+
+@app.route('/admin/profiles')
+@admin_required
+def request_profiles():
+    """The slowest request profiles still on disk, slowest first"""
+    if not app.config["PROFILE_DIR"]:
+        return jsonify({'error': 'Request profiling is disabled (set PROFILE_DIR)'}), 404
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        limit = None
+    if limit is None or limit < 0:
+        return jsonify({'error': 'limit must be a non-negative integer'}), 400
+    return jsonify({'profiles': list_captures(app.config["PROFILE_DIR"], limit)})
+
+@app.route('/admin/profiles/<path:filename>')
+@admin_required
+def request_profile_file(filename):
+    """Download one file of a capture (.collapsed, .prof or .json)"""
+    if not app.config["PROFILE_DIR"]:
+        abort(404)
+    # send_from_directory rejects paths outside the profile directory
+    return send_from_directory(os.path.abspath(app.config["PROFILE_DIR"]), filename, as_attachment=True)
+
 # Error handlers
 @app.errorhandler(404)
 def page_not_found(e):
@@ -0,0 +1,45 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+# Process start as seen by this module; main.py imports it first, so stage
+# offsets are measured from the start of application import
+PROCESS_START = time.perf_counter()
+
+_stages = []
+
+
+def record(stage, seconds):
+    """Record how long one startup stage took"""
+    _stages.append({
+        'stage': stage,
+        'seconds': round(seconds, 4),
+        'finished_at': round(time.perf_counter() - PROCESS_START, 4)
+    })
+
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block as a named startup stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def report():
+    """Startup stages recorded so far in this process, in completion order"""
+    return {
+        'pid': os.getpid(),
+        'release': os.environ.get('APP_RELEASE', ''),
+        'stages': list(_stages),
+        'total_seconds': round(sum(stage['seconds'] for stage in _stages), 4)
+    }
+
+
+def log_report():
+    """Write the startup report to the log as a single JSON line"""
+    logging.info(f"Startup timing: {json.dumps(report())}")
@@ -0,0 +1,36 @@
+"""Configuration shared by the test modules: a throwaway database and an admin user, set before the app is imported"""
+import os
+import tempfile
+
+import pytest
+
+_database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_database.name}'
+os.environ['ADMIN_EMAILS'] = 'admin@example.com'
+
+PROFILE = {'name': 'Admin', 'age': '30', 'skills': 'Python, SQL, machine learning', 'interests': 'data research',
+           'education': 'BSc', 'experience': '3 years as analyst'}
+
+
+def pytest_sessionfinish(session, exitstatus):
+    os.unlink(_database.name)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app, init_database
+    import main  # noqa: F401  (registers the routes)
+    
+    init_database()
+    return app
+
+
+@pytest.fixture(scope='session')
+def admin_client(app):
+    """A test client logged in as an admin with a complete profile"""
+    client = app.test_client()
+    client.post('/register', data={'name': 'Admin', 'email': 'admin@example.com', 'password': 'secret',
+                                   'confirm_password': 'secret'})
+    client.post('/login', data={'email': 'admin@example.com', 'password': 'secret'})
+    client.post('/edit-profile', data=PROFILE)
+    return client
@@ -0,0 +1,27 @@
+"""Query parameters of the JSON endpoints are validated, never silently replaced by defaults"""
+import pytest
+
+
+@pytest.mark.parametrize('query', ['k=abc', 'offset=xyz', 'limit=abc', 'k=2.5', 'k=', 'k=0', 'offset=-1',
+                                   'k=abc&format=ndjson'])
+def test_api_recommendations_rejects_bad_paging(admin_client, query):
+    response = admin_client.get(f'/api/recommendations?{query}')
+    assert response.status_code == 400
+    assert 'k must be between' in response.get_json()['error']
+
+
+def test_api_recommendations_accepts_valid_paging(admin_client):
+    response = admin_client.get('/api/recommendations?k=3&offset=1')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['k'], body['offset'], len(body['recommendations'])) == (3, 1, 3)
+
+
+@pytest.mark.parametrize('query, status', [('limit=abc', 400), ('limit=-1', 400), ('limit=5', 200), ('', 200)])
+def test_request_profiles_validates_limit(app, admin_client, tmp_path, query, status):
+    app.config['PROFILE_DIR'] = str(tmp_path)
+    try:
+        response = admin_client.get(f'/admin/profiles?{query}')
+    finally:
+        app.config['PROFILE_DIR'] = ''
+    assert response.status_code == status
@@ -0,0 +1,50 @@
+"""Column storage of the catalog: sorted string tables read like the dicts they replace"""
+import numpy as np
+
+from career_catalog import CareerCatalog, SortedStringTable
+
+# Two long strings sharing their first PREFIX_BYTES bytes, and non-ASCII ones
+STRINGS = ['python', 'data', 'machine learning engineering', 'machine learning engineer', 'café', 'ca', 'c++']
+
+
+def test_sorted_string_table_looks_up_like_a_dict():
+    table = SortedStringTable.from_strings(STRINGS)
+    missing = ['java', 'caf', 'machine learning', 'machine learning engineers']
+    
+    assert dict(table) == {string: number for number, string in enumerate(STRINGS)}
+    assert [table.get(string) for string in STRINGS + missing] == list(range(len(STRINGS))) + [None] * len(missing)
+    assert table.numbers(STRINGS + missing).tolist() == list(range(len(STRINGS))) + [-1] * len(missing)
+    assert [table.string(number) for number in range(len(table))] == STRINGS
+    assert table.lengths().tolist() == [len(string) for string in STRINGS]
+    assert sorted(table.containing('a', range(len(table)))) == [1, 2, 3, 4, 5]
+    assert sorted(table.containing('caf', [0, 4, 5])) == [4]
+
+
+def test_extended_table_shares_arrays_and_round_trips():
+    table = SortedStringTable.from_strings(STRINGS)
+    extended = table.extended(['java', 'python', 'go'])
+    
+    assert 'java' not in table
+    assert extended.order is table.order
+    assert (extended['java'], extended['go'], extended['python']) == (7, 8, 0)
+    assert extended.numbers(['go', 'rust']).tolist() == [8, -1]
+    assert extended.containing('av', range(len(extended))) == [7]
+    restored = SortedStringTable.from_arrays(extended.arrays())
+    assert dict(restored) == dict(extended)
+    assert list(restored) == STRINGS + ['java', 'go']
+    assert isinstance(restored.prefixes, np.ndarray) and not restored.extra
+
+
+def career(career_id, name):
+    return {'id': career_id, 'name': name, 'industry': 'Healthcare', 'description': '', 'required_skills': ''}
+
+
+def test_ids_named_survives_select_and_from_arrays():
+    catalog = CareerCatalog.from_records([career(7, 'Nurse'), career(3, 'Data Scientist'), career(5, 'Nurse')])
+    selected = catalog.select([2, 1, 3, 4], [career(9, 'Nurse'), career(4, 'Pilot')])
+    mapped = CareerCatalog.from_arrays(selected.arrays())
+    
+    assert (catalog.ids_named('Nurse'), catalog.ids_named('Pilot')) == ((7, 5), ())
+    for rebuilt in (selected, mapped):
+        assert [rebuilt.ids_named(name) for name in ('Nurse', 'Data Scientist', 'Pilot', 'Analyst')] == [
+            (5, 9), (3,), (4,), ()]
@@ -0,0 +1,64 @@
+"""Deduplication and catalog rewriting of the job export ingestion, kept on disk rather than in memory"""
+import json
+import os
+import subprocess
+import sys
+
+from catalog_ingest import DedupIndex, _career_key, _write_catalog
+
+CATALOG = [
+    {'id': 1, 'name': 'Data Scientist', 'industry': 'Technology'},
+    {'id': 2, 'name': 'Nurse', 'industry': 'Healthcare'}
+]
+
+
+def career(career_id, name, industry='Technology'):
+    return {'id': career_id, 'name': name, 'industry': industry}
+
+
+def test_career_key_is_stable_across_processes():
+    code = ("import sys; sys.path.insert(0, '.'); from catalog_ingest import _career_key; "
+            "print(_career_key({'name': 'Data Scientist', 'industry': 'Technology'}).hex())")
+    digests = {subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                              env={**os.environ, 'PYTHONHASHSEED': seed}).stdout.strip()
+               for seed in ('1', '2')}
+    assert digests == {_career_key(CATALOG[0]).hex()}
+
+
+def test_career_key_ignores_case_only():
+    assert _career_key(career(5, 'DATA scientist', 'technology')) == _career_key(CATALOG[0])
+    assert _career_key(career(5, 'Data', 'Scientist Technology')) != _career_key(career(5, 'Data Scientist',
+                                                                                        'Technology'))
+
+
+def test_first_row_wins_for_each_id_and_key():
+    index = DedupIndex()
+    index.add_catalog(CATALOG)
+    accepted = [index.accept(row, _career_key(row)) for row in [
+        career(10, 'Analyst'),
+        career(10, 'Other Title'),           # id already seen
+        career(11, 'analyst'),               # key already seen
+        career(12, 'Data Scientist'),        # catalog key under another id
+        career(1, 'Data Scientist'),         # catalog career itself
+        career(2, 'Head Nurse', 'Healthcare')
+    ]]
+    index.close()
+    assert accepted == [True, False, False, False, True, True]
+
+
+def test_write_catalog_updates_in_place_and_appends(tmp_path):
+    catalog_path = tmp_path / 'careers.json'
+    catalog_path.write_text(json.dumps(CATALOG))
+    spool_path = tmp_path / 'spool'
+    spool_path.write_text(json.dumps(career(10, 'Analyst')) + '\n')
+    index = DedupIndex()
+    index.add_catalog(CATALOG)
+    index.set_override(career(2, 'Head Nurse', 'Healthcare'))
+    
+    with open(spool_path) as spool:
+        num_careers = _write_catalog(str(catalog_path), index, spool)
+    index.close()
+    
+    assert num_careers == 3
+    assert json.loads(catalog_path.read_text()) == [CATALOG[0], career(2, 'Head Nurse', 'Healthcare'),
+                                                    career(10, 'Analyst')]
@@ -0,0 +1,67 @@
+"""Engines load from a bundle matching the catalog file without parsing it, and refuse stale bundles"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from engine_artifacts import build_artifacts
+from ml_engine import CareerRecommendationEngine
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'data',
+                            'careers.json')
+PROFILE = {'skills': 'Python, SQL, machine learning', 'interests': 'data research', 'education': 'BSc',
+           'experience': '3 years as analyst'}
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    """Path of a copy of the shipped catalog, and the root of a bundle built from it"""
+    catalog_path = str(tmp_path / 'careers.json')
+    shutil.copy(CATALOG_PATH, catalog_path)
+    engine = CareerRecommendationEngine(catalog_path=catalog_path)
+    build_artifacts(engine, str(tmp_path / 'artifacts'))
+    return catalog_path, str(tmp_path / 'artifacts'), engine
+
+
+def test_current_bundle_is_loaded_without_parsing_the_catalog(bundle, monkeypatch):
+    catalog_path, root, fitted = bundle
+    
+    def parse(engine):
+        raise AssertionError('catalog file parsed')
+    
+    monkeypatch.setattr(CareerRecommendationEngine, '_load_careers_data', parse)
+    engine = CareerRecommendationEngine(catalog_path=catalog_path, artifacts_dir=root, artifacts_only=True)
+    
+    assert engine.careers_data == fitted.careers_data
+    np.testing.assert_allclose(engine.score_careers(PROFILE), fitted.score_careers(PROFILE))
+
+
+def test_bundle_of_another_catalog_file_is_stale(bundle):
+    catalog_path, root, _ = bundle
+    with open(catalog_path, 'r') as f:
+        careers = json.load(f)
+    with open(catalog_path, 'w') as f:
+        json.dump(careers[:-1], f)
+    
+    with pytest.raises(ValueError, match='stale'):
+        CareerRecommendationEngine(catalog_path=catalog_path, artifacts_dir=root, artifacts_only=True)
+    # Without artifacts_only, the engine falls back to fitting the file
+    engine = CareerRecommendationEngine(catalog_path=catalog_path, artifacts_dir=root)
+    assert len(engine.careers_data) == len(careers) - 1
+
+
+def test_bundle_vocabularies_stay_memory_mapped(bundle):
+    catalog_path, root, fitted = bundle
+    engine = CareerRecommendationEngine(catalog_path=catalog_path, artifacts_dir=root, artifacts_only=True)
+    
+    tables = [engine.keyword_vocabulary, engine.vectorizer.vocabulary_]
+    tables.extend(postings.keys for postings in engine.keyword_index.postings().values())
+    assert all(isinstance(table.strings.buffer, np.memmap) and isinstance(table.order, np.memmap)
+               for table in tables)
+    assert dict(engine.keyword_vocabulary) == dict(fitted.keyword_vocabulary)
+    assert dict(engine.vectorizer.vocabulary_) == dict(fitted.vectorizer.vocabulary_)
+    keywords = ['python', 'sql', 'data', 'analytics', 'management', 'nurse', 'zzz']
+    assert ([sorted(matches) for matches in engine.keyword_index.matches_all(keywords)]
+            == [sorted(fitted.keyword_index.matches(keyword)) for keyword in keywords])
@@ -0,0 +1,102 @@
+"""Incremental catalog updates return a new engine and leave the serving one untouched"""
+import json
+import os
+
+import numpy as np
+
+from benchmarks.synthetic import load_base_catalog
+from career_catalog import CareerCatalog
+from engine_loader import catalog_changes
+from ml_engine import CareerRecommendationEngine
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'data',
+                            'careers.json')
+PROFILE = {'skills': 'Python, SQL, machine learning', 'interests': 'data research', 'education': 'BSc',
+           'experience': '3 years as analyst'}
+
+
+def test_update_catalog_returns_updated_copy():
+    engine = CareerRecommendationEngine(catalog_path=CATALOG_PATH)
+    careers = load_base_catalog(CATALOG_PATH)
+    catalog = engine.careers_data
+    features = engine.career_features
+    scores = engine.score_careers(PROFILE)
+    version = engine.catalog_version
+    
+    added = dict(careers[0], id=999999, name='Quantum Gardener', required_skills='Botany, Quantum Physics')
+    updated = dict(careers[1], description='Builds data pipelines in Python and SQL.')
+    updated_engine = engine.update_catalog(added=[added], updated=[updated], removed_ids=[careers[2]['id']])
+    
+    assert updated_engine is not engine
+    assert engine.careers_data is catalog and engine.career_features is features
+    assert engine.catalog_version == version and engine.incremental_changes == 0
+    np.testing.assert_allclose(engine.score_careers(PROFILE), scores)
+    
+    assert len(updated_engine.careers_data) == len(careers)
+    assert updated_engine.get_career_by_id(999999) == added
+    assert updated_engine.get_career_by_id(careers[1]['id']) == updated
+    assert updated_engine.get_career_by_id(careers[2]['id']) is None
+    assert updated_engine.catalog_version != version
+    assert updated_engine.score_careers(PROFILE).shape == (len(careers),)
+
+
+def test_single_career_helpers_chain():
+    engine = CareerRecommendationEngine(catalog_path=CATALOG_PATH)
+    careers = load_base_catalog(CATALOG_PATH)
+    updated_engine = (engine.add_career(dict(careers[0], id=999999))
+                      .update_career(dict(careers[3], name='Renamed'))
+                      .remove_career(careers[4]['id']))
+    assert len(engine.careers_data) == len(careers)
+    assert engine.get_career_by_id(999999) is None
+    assert updated_engine.get_career_by_id(999999) is not None
+    assert updated_engine.get_career_by_id(careers[3]['id'])['name'] == 'Renamed'
+    assert updated_engine.get_career_by_id(careers[4]['id']) is None
+
+
+def test_update_past_drift_threshold_refits_the_copy(tmp_path):
+    engine = CareerRecommendationEngine(catalog_path=CATALOG_PATH)
+    careers = load_base_catalog(CATALOG_PATH)
+    frequencies = engine.document_frequencies
+    added = [dict(careers[0], id=999990 + i, name=f'Quantum Gardener {i}',
+                  description='Tends quantum gardens.') for i in range(3)]
+    assert engine.needs_rebuild(len(added))
+    
+    refitted = engine.update_catalog(added=added)
+    
+    assert refitted.incremental_changes == 0 and refitted.fitted_catalog_size == len(careers) + 3
+    assert 'quantum' in refitted.vectorizer.vocabulary_
+    assert 'quantum' not in engine.vectorizer.vocabulary_
+    assert engine.document_frequencies is frequencies
+    # The same as an engine fitted to the new catalog from scratch
+    catalog_path = tmp_path / 'careers.json'
+    catalog_path.write_text(json.dumps(careers + added))
+    fitted = CareerRecommendationEngine(catalog_path=str(catalog_path))
+    np.testing.assert_allclose(refitted.score_careers(PROFILE), fitted.score_careers(PROFILE))
+
+
+def test_small_update_keeps_the_original_document_frequencies():
+    engine = CareerRecommendationEngine(catalog_path=CATALOG_PATH)
+    careers = load_base_catalog(CATALOG_PATH)
+    frequencies = engine.document_frequencies.copy()
+    
+    updated_engine = engine.update_career(dict(careers[0], description='Tends quantum gardens.'))
+    
+    assert not engine.needs_rebuild(1) and updated_engine.incremental_changes == 1
+    np.testing.assert_array_equal(engine.document_frequencies, frequencies)
+    assert updated_engine.document_frequencies is not engine.document_frequencies
+
+
+def test_catalog_changes_between_catalogs():
+    careers = load_base_catalog(CATALOG_PATH)
+    # The engine's catalog may be mapped from a bundle, with TextColumn string tables
+    old_catalog = CareerCatalog.from_arrays(CareerCatalog.from_records(careers).arrays())
+    edited = dict(careers[1], description=careers[1]['description'] + ' Now in Rust.')
+    renamed = dict(careers[2], name='Renamed')
+    added = dict(careers[0], id=999999)
+    new_careers = [careers[0], edited, renamed] + careers[4:] + [added]
+    
+    changes = catalog_changes(old_catalog, CareerCatalog.from_records(new_careers))
+    
+    assert changes == ([added], [edited, renamed], [careers[3]['id']])
+    assert old_catalog == CareerCatalog.from_records(careers)
+    assert old_catalog != CareerCatalog.from_records(new_careers)
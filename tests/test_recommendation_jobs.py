@@ -0,0 +1,67 @@
+"""Queued rankings run in spawned processes that map a bundle of the web worker's engine"""
+import time
+
+import pytest
+
+import ranking_worker
+import routes
+from engine_loader import get_engine
+from models import Recommendation, RecommendationJob, User
+
+PROFILE = {'skills': 'Python, SQL, machine learning', 'interests': 'data research', 'education': 'BSc',
+           'experience': '3 years as analyst'}
+
+
+def career_ids(recommendations):
+    return [recommendation['career_id'] for recommendation in recommendations]
+
+
+@pytest.fixture
+def job_queue(monkeypatch):
+    """The app's job queue with a one-process pool, shut down afterwards"""
+    monkeypatch.setattr(routes.job_queue, 'max_workers', 1)
+    routes.recommendation_cache.clear()
+    yield routes.job_queue
+    if routes.job_queue._pool is not None:
+        routes.job_queue._pool.shutdown()
+        routes.job_queue._pool = None
+    if routes.job_queue._bundle is not None:
+        routes.job_queue._bundle.cleanup()
+        routes.job_queue._bundle = None
+
+
+def test_job_is_ranked_in_the_pool_and_saved(app, admin_client, job_queue):
+    response = admin_client.get('/get-recommendations')
+    assert '/recommendation-jobs/' in response.headers['Location']
+    job_id = int(response.headers['Location'].rstrip('/').split('/')[-1])
+    
+    deadline = time.monotonic() + 120
+    while True:
+        status = admin_client.get(f'/api/recommendation-jobs/{job_id}').get_json()
+        if status['status'] != RecommendationJob.QUEUED or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+    assert (status['status'], status['error']) == (RecommendationJob.DONE, None)
+    
+    # The process only mapped a bundle, yet ranks exactly like the web worker's engine
+    with app.app_context():
+        user = User.query.filter_by(email='admin@example.com').one()
+        saved = {recommendation.career_id for recommendation in Recommendation.query.filter_by(user_id=user.id)}
+        expected = career_ids(get_engine().get_recommendations(user.recommendation_profile()))
+    assert saved == set(expected)
+
+
+def test_rank_profile_rescores_changed_fields_only(job_queue):
+    ranking_worker.init_worker(job_queue._pool_options(get_engine()), field_cache_size=4)
+    engine = ranking_worker._engine
+    
+    first, _ = ranking_worker.rank_profile(7, PROFILE)
+    previous = ranking_worker._field_scores.get(7, engine.catalog_version)
+    edited = dict(PROFILE, experience='10 years as nurse')
+    second, _ = ranking_worker.rank_profile(7, edited)
+    current = ranking_worker._field_scores.get(7, engine.catalog_version)
+    
+    assert career_ids(first) == career_ids(engine.get_recommendations(PROFILE))
+    assert career_ids(second) == career_ids(engine.get_recommendations(edited))
+    # Unchanged fields keep the very same score vectors
+    assert current['scores']['skills'] is previous['scores']['skills']
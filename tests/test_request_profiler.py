@@ -0,0 +1,47 @@
+"""The X-Profile-Request header only starts cProfile once the request is known to come from an admin"""
+import cProfile
+import json
+
+import pytest
+
+import request_profiler
+from request_profiler import PROFILE_HEADER, ProfilingMiddleware
+
+
+@pytest.fixture
+def profiled(app, tmp_path, monkeypatch):
+    """The app behind a ProfilingMiddleware writing to tmp_path; yields the middleware and the profilers it created"""
+    profilers = []
+    
+    class RecordedProfile(cProfile.Profile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            profilers.append(self)
+    
+    monkeypatch.setattr(request_profiler.cProfile, 'Profile', RecordedProfile)
+    middleware = ProfilingMiddleware(app.wsgi_app, str(tmp_path), threshold=0)
+    monkeypatch.setattr(app, 'wsgi_app', middleware)
+    yield middleware, profilers
+
+
+def test_anonymous_header_never_creates_a_profiler(app, profiled, tmp_path):
+    middleware, profilers = profiled
+    response = app.test_client().get('/', headers={PROFILE_HEADER: '1'})
+    
+    assert response.status_code == 200
+    assert profilers == []
+    assert not middleware._profiler_lock.locked()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_admin_header_is_profiled(admin_client, profiled, tmp_path):
+    middleware, profilers = profiled
+    response = admin_client.get('/api/recommendations?k=1', headers={PROFILE_HEADER: '1'})
+    
+    assert response.status_code == 200
+    assert len(profilers) == 1
+    assert not middleware._profiler_lock.locked()
+    [capture_path] = tmp_path.glob('*.json')
+    capture = json.loads(capture_path.read_text())
+    assert capture['trigger'] == 'header'
+    assert (tmp_path / f"{capture['id']}.prof").exists()
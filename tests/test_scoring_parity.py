@@ -0,0 +1,63 @@
+"""The matrix scoring path must give the same scores as the loop reference implementation"""
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import load_base_catalog, synthetic_catalog, synthetic_engine, synthetic_profiles
+from ml_engine import CareerRecommendationEngine
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'data',
+                            'careers.json')
+SYNTHETIC_SIZE = 800
+
+PROFILES = synthetic_profiles(25, seed=7, base_catalog=load_base_catalog(CATALOG_PATH)) + [
+    {'skills': 'Python, SQL, machine learning', 'interests': 'data research', 'education': 'BSc',
+     'experience': '3 years as analyst'},
+    {'skills': 'design', 'interests': '', 'education': '', 'experience': ''},
+    {'skills': '', 'interests': 'healthcare patients', 'education': 'nursing degree', 'experience': ''},
+]
+
+
+def build_engine(catalog, scoring_mode):
+    if catalog == 'shipped':
+        return CareerRecommendationEngine(scoring_mode=scoring_mode, catalog_path=CATALOG_PATH)
+    careers = synthetic_catalog(SYNTHETIC_SIZE, seed=0, base_catalog=load_base_catalog(CATALOG_PATH))
+    return synthetic_engine(careers, scoring_mode=scoring_mode)
+
+
+@pytest.fixture(scope='module', params=['shipped', 'synthetic'])
+def engines(request):
+    """A matrix and a loop engine fitted on the same catalog"""
+    return build_engine(request.param, 'matrix'), build_engine(request.param, 'loop')
+
+
+@pytest.mark.parametrize('profile', PROFILES)
+def test_keyword_signals_match(engines, profile):
+    matrix_engine, loop_engine = engines
+    user_keywords = matrix_engine._extract_user_keywords(profile)
+    matrix_scores = matrix_engine._score_keywords_matrix(user_keywords)
+    loop_scores = loop_engine._score_keywords_loop(user_keywords)
+    assert set(matrix_scores) == set(loop_scores)
+    for field, scores in loop_scores.items():
+        np.testing.assert_allclose(matrix_scores[field], scores, rtol=1e-12, atol=1e-12, err_msg=field)
+
+
+@pytest.mark.parametrize('profile', PROFILES)
+def test_combined_scores_match(engines, profile):
+    matrix_engine, loop_engine = engines
+    np.testing.assert_allclose(matrix_engine.score_careers(profile), loop_engine.score_careers(profile),
+                               rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('profile', [profile for profile in PROFILES if profile['skills'] or profile['interests']])
+def test_recommendations_match(engines, profile):
+    # Profiles without skills or interests get random fallback recommendations
+    matrix_engine, loop_engine = engines
+    matrix_recommendations = matrix_engine.get_recommendations(profile)
+    loop_recommendations = loop_engine.get_recommendations(profile)
+    assert ([recommendation['career_id'] for recommendation in matrix_recommendations] ==
+            [recommendation['career_id'] for recommendation in loop_recommendations])
+    np.testing.assert_allclose([recommendation['score'] for recommendation in matrix_recommendations],
+                               [recommendation['score'] for recommendation in loop_recommendations],
+                               rtol=1e-12, atol=1e-12)
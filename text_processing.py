@@ -0,0 +1,64 @@
+import logging
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def ensure_nltk_resource(path, package):
+    """Download an NLTK resource the first time a code path needs it"""
+    # NLTK is imported here rather than at module level so importing the
+    # engine stays cheap until text actually has to be processed
+    import nltk
+    
+    try:
+        nltk.data.find(path)
+    except LookupError:
+        logging.info(f"Downloading NLTK resource '{package}'")
+        nltk.download(package)
+
+
+@lru_cache(maxsize=None)
+def load_stop_words(language='english'):
+    """Load the NLTK stopword list once per process"""
+    ensure_nltk_resource('corpora/stopwords', 'stopwords')
+    from nltk.corpus import stopwords
+    
+    return frozenset(stopwords.words(language))
+
+
+class TextNormalizer:
+    """Shared tokenizer/normaliser for every text-processing entry point of the engine
+    
+    Stopwords are loaded once into a frozenset and the normalised tokens of
+    repeated strings (industries, common skills, unchanged profiles) are kept
+    in a bounded LRU cache. Results are returned as tuples so cached values
+    cannot be mutated by callers.
+    """
+    
+    def __init__(self, cache_size=8192):
+        self.stop_words = load_stop_words()
+        self.keywords = lru_cache(maxsize=cache_size)(self._keywords)
+        self.tokens = lru_cache(maxsize=cache_size)(self._tokens)
+    
+    def _keywords(self, text):
+        """Unique lowercase keywords split on commas and whitespace, without stopwords or short words"""
+        keywords = (token for token in text.lower().replace(',', ' ').split()
+                    if len(token) > 2 and token not in self.stop_words)
+        # dict.fromkeys keeps first-seen order while removing duplicates
+        return tuple(dict.fromkeys(keywords))
+    
+    def _tokens(self, text):
+        """Alphabetic NLTK word tokens without stopwords"""
+        ensure_nltk_resource('tokenizers/punkt', 'punkt')
+        from nltk.tokenize import word_tokenize
+        
+        return tuple(token for token in word_tokenize(text.lower())
+                     if token.isalpha() and token not in self.stop_words)
+    
+    def cache_info(self):
+        """LRU statistics for the keyword and token caches"""
+        return {'keywords': self.keywords.cache_info(), 'tokens': self.tokens.cache_info()}
+    
+    def cache_clear(self):
+        """Empty the keyword and token caches"""
+        self.keywords.cache_clear()
+        self.tokens.cache_clear()